@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+
+## BandwidthGovernor.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Splits a total replication bandwidth budget between the rsync commands run concurrently by DataReplication.py
+
+import re
+import threading
+import time
+
+# rsync --bwlimit is expressed in KiB/s - never give a transfer less than this
+MIN_JOB_LIMIT = 64
+# headroom given to a transfer over the throughput it was last seen using
+THROUGHPUT_HEADROOM = 1.25
+# a transfer that used at least this fraction of its limit was held back by the limit, not by the link
+LIMIT_BOUND = 0.9
+# seconds between checks of a transfer waiting for bandwidth (the budget can change with the time of day)
+WAIT_INTERVAL = 5
+
+
+class BandwidthGovernor:
+    """Hands out rsync --bwlimit values so that the transfers running at the same time stay within a
+    total bandwidth budget. The budget can change with the time of day. The part of the budget that the
+    running commands do not hold is split between the transfer jobs running at the same time (see
+    start_job()), so a job that runs alone gets the whole budget. A job that was seen not to use its
+    limit (because it is limited by disk, latency or the remote host) gets what it used plus some
+    headroom, and the rest is left for the others; a job that used its whole limit can get more the
+    next time. Limits are fixed for the life of an rsync command, so the limits granted never add up to
+    more than the budget: a transfer that starts when the whole budget is granted waits until a running
+    one finishes.
+    """
+    def __init__(self, logger, limit=0, windows=""):
+        """Constructor
+
+        Args:
+            logger (Logger): Logger object
+            limit (int, optional): Total bandwidth budget in KiB/s outside the windows. 0 is unlimited. Defaults to 0.
+            windows (str, optional): Time windows with their own budget, see parse_windows(). Defaults to "".
+
+        Raises:
+            ValueError: If the windows are not valid
+        """
+        self.logger = logger
+        self.limit = int(limit)
+        self.windows = self.parse_windows(windows)
+        self.jobs = set()
+        self.active = {}
+        self.last_limit = {}
+        self.observed = {}
+        self.lock = threading.Lock()
+        self.released = threading.Condition(self.lock)
+
+    @staticmethod
+    def parse_windows(windows):
+        """Parse time windows in the format "HH:MM-HH:MM=KBPS, HH:MM-HH:MM=KBPS". A window can cross
+        midnight (for example 20:00-06:00). A KBPS of 0 is unlimited.
+
+        Args:
+            windows (str): Time windows
+
+        Raises:
+            ValueError: If a window is not valid
+
+        Returns:
+            list[tuple]: (start minute, end minute, limit) tuples
+        """
+        parsed = []
+        for window in (windows or "").replace("\n", ",").split(","):
+            window = window.strip()
+            if not window:
+                continue
+            match = re.fullmatch(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\d+)", window)
+            if not match:
+                raise ValueError(f"invalid bandwidth window [{window}] - expected HH:MM-HH:MM=KBPS")
+            start_hour, start_minute, end_hour, end_minute, limit = [int(value) for value in match.groups()]
+            if start_hour > 23 or end_hour > 24 or start_minute > 59 or end_minute > 59:
+                raise ValueError(f"invalid time in bandwidth window [{window}]")
+            parsed.append((start_hour * 60 + start_minute, end_hour * 60 + end_minute, limit))
+        return parsed
+
+    def budget(self, now=None):
+        """Total bandwidth budget at a point in time. The first matching window wins.
+
+        Args:
+            now (float, optional): Epoch time. Defaults to the current time.
+
+        Returns:
+            int: Budget in KiB/s, 0 if unlimited
+        """
+        local = time.localtime(now if now is not None else time.time())
+        minute = local.tm_hour * 60 + local.tm_min
+        for start, end, limit in self.windows:
+            if start <= end and start <= minute < end:
+                return limit
+            if start > end and (minute >= start or minute < end):
+                return limit
+        return self.limit
+
+    def start_job(self, name):
+        """Count a transfer job as running until finish_job() is called. The budget is split between
+        the running jobs, including the ones that are between two transfer commands.
+
+        Args:
+            name (str): Transfer job name
+        """
+        with self.lock:
+            self.jobs.add(name)
+
+    def finish_job(self, name):
+        """Stop counting a transfer job as running
+
+        Args:
+            name (str): Transfer job name
+        """
+        with self.lock:
+            self.jobs.discard(name)
+            self.released.notify_all()
+
+    def _grant(self, name, budget):
+        # limit for a transfer starting now - 0 if the budget has no room for it
+        running = self.jobs | set(self.active) | {name}
+        minimum = min(MIN_JOB_LIMIT, budget)
+        share = max(budget // len(running), minimum)
+        # unlimited allocations from a previous budget count as a full share
+        available = budget - sum(self.active[other] or share for other in self.active if other != name)
+        if available < minimum:
+            return 0
+        # running jobs without a command keep a share for their next command, the rest is for this one
+        idle = len([other for other in running if other != name and other not in self.active])
+        limit = min(available, max(share, available - idle * share))
+        # a transfer seen not using its limit (or running unlimited) gets what it used, the rest is left for the others
+        last_limit = self.last_limit.get(name, 0)
+        if name in self.observed and (last_limit == 0 or self.observed[name] < last_limit * LIMIT_BOUND):
+            limit = min(limit, max(minimum, int(self.observed[name] * THROUGHPUT_HEADROOM)))
+        return limit
+
+    def acquire(self, name, cancelled=None):
+        """Get the bandwidth limit for a transfer command that is about to start. Waits while the running
+        transfers hold the whole budget.
+
+        Args:
+            name (str): Transfer job name
+            cancelled (callable, optional): Function returning True if the transfer was cancelled while
+                waiting. Defaults to None.
+
+        Raises:
+            RuntimeError: If the transfer was cancelled while waiting for bandwidth
+
+        Returns:
+            int: Value for rsync --bwlimit in KiB/s, 0 if unlimited
+        """
+        waited = False
+        with self.lock:
+            while True:
+                budget = self.budget()
+                if budget == 0:
+                    self.active[name] = 0
+                    self.last_limit[name] = 0
+                    return 0
+                limit = self._grant(name, budget)
+                if limit:
+                    break
+                if cancelled is not None and cancelled():
+                    raise RuntimeError("cancelled while waiting for bandwidth")
+                if not waited:
+                    self.logger.writelog("debug", f"Transfer [{name}] waiting for bandwidth (budget {budget} KiB/s "
+                                                  f"used by {len(self.active)} transfers)")
+                    waited = True
+                self.released.wait(WAIT_INTERVAL)
+            self.active[name] = limit
+            self.last_limit[name] = limit
+            running = len(self.active) - 1
+        self.logger.writelog("debug", f"Bandwidth limit for [{name}]: {limit} KiB/s (budget {budget} KiB/s, "
+                                      f"{running} other transfers running)")
+        return limit
+
+    def granted(self):
+        """Sum of the limits of the running transfers
+
+        Returns:
+            int: KiB/s, not counting transfers started while the budget was unlimited
+        """
+        with self.lock:
+            return sum(self.active.values())
+
+    def release(self, name, transferred_bytes, elapsed):
+        """Record the throughput of a finished transfer command and free its allocation
+
+        Args:
+            name (str): Transfer job name
+            transferred_bytes (int): Bytes that went over the network
+            elapsed (float): Seconds the command ran
+        """
+        with self.lock:
+            self.active.pop(name, None)
+            self.released.notify_all()
+            # very short commands do not say anything about the available throughput
+            if elapsed >= 5 and transferred_bytes:
+                self.observed[name] = max(MIN_JOB_LIMIT, int(transferred_bytes / 1024 / elapsed))
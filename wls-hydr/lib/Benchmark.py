@@ -0,0 +1,468 @@
+#!/usr/bin/python3
+
+## Benchmark.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### This script measures the pull and push of DataReplication.py end to end, with synthetic Fusion Middleware
+### trees (products with many small files and large JAR files, private and shared domain config, server logs
+### that keep growing and rotating) and the current replication.properties options.
+### The primary and standby environments are two addresses of this host, reached over ssh with the current OS user,
+### so the ssh key supplied must be in the ~/.ssh/authorized_keys file of the user. Both environments use the same
+### paths: they point to a symbolic link in the work directory that is switched to the primary tree before each
+### pull and to the standby tree before each push.
+### Every round changes a fraction of the primary files, pulls and pushes them, and checks that the standby tree
+### matches the primary. The time, result and rsync metrics of every pull and push are written as JSON.
+### Usage:
+###
+###      ./Benchmark.py -k SSH_KEY [-w WORKDIR] [-r ROUNDS] [-c CHANGE_RATE] [-d DATA] [-O OPTION=VALUE] [--keep]
+###                     [--small-files N] [--small-size BYTES] [--jars N] [--jar-size BYTES] [--config-files N]
+###                     [--log-files N] [--log-size BYTES]
+### Examples:
+###     To run the default benchmark (3 rounds, 1% of the files changed in each one):
+###         ./Benchmark.py -k ~/.ssh/id_rsa
+###     To compare the supervised engine with more parallel transfers, with a larger products tree:
+###         ./Benchmark.py -k ~/.ssh/id_rsa --small-files 50000 --jars 100 -O engine=supervised -O max_parallel_transfers=8
+###     To measure only the products:
+###         ./Benchmark.py -k ~/.ssh/id_rsa -d products
+
+__version__= "1.0"
+
+try:
+    import os
+    import sys
+    sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}"))
+    from Logger import Logger
+    from Utils import Utils as UTILS
+    from Utils import Constants as CONSTANTS
+    from RunReport import RunReport
+    from Manifest import Manifest
+    import DataReplication as DR
+    import argparse
+    import configparser
+    import datetime
+    import getpass
+    import json
+    import platform
+    import random
+    import shutil
+    import subprocess
+    import time
+    import zipfile
+except ImportError as e:
+    raise ImportError(f"Failed to import module:\n{str(e)} \
+        \nMake sure all required modules are installed before running this script")
+
+BASEDIR = CONSTANTS.BASEDIR
+DIRECTORIES = CONSTANTS.DIRECTORIES_CFG_TAG
+OPTIONS = CONSTANTS.OPTIONS_CFG_TAG
+# marks a work directory created by this script - it is only cleaned if the marker is there
+WORKDIR_MARKER = ".hydr_benchmark"
+DOMAIN_NAME = "benchdomain"
+SERVER_NAME = "WLS_SERVER1"
+# data types benchmarked, the folder of each one in the synthetic tree and its exclude option
+DATA_TYPES = {
+    "products": ("products", "exclude_wls_products"),
+    "private_config": ("private_config", "exclude_wls_private_config"),
+    "shared_config": ("shared_config", "exclude_wls_shared_config")
+}
+CONFIG_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<domain xmlns="http://xmlns.oracle.com/weblogic/domain">
+  <name>{domain}</name>
+  <app-deployment>
+    <name>em</name>
+    <target>AdminServer</target>
+    <source-path>{apps}/em.ear</source-path>
+  </app-deployment>
+</domain>
+"""
+
+now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
+LOG_FILE = f"{BASEDIR}/log/benchmark_{now}.log"
+RESULTS_FILE = f"{BASEDIR}/log/benchmark_{now}.json"
+
+
+class SyntheticTree:
+    """Fusion Middleware shaped directory tree: products (many small files and large JAR files), private domain
+    config with server logs, and shared domain config with its config.xml, applications and deployment plans.
+    The content is generated from a seed, so that runs with the same parameters use the same data.
+    """
+    def __init__(self, root, site, args):
+        """Constructor
+
+        Args:
+            root (str): Directory where the tree is created
+            site (str): Path that the configuration uses for the tree - written in config.xml
+            args (argparse.Namespace): Tree parameters
+        """
+        self.root = root
+        self.site = site
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.small_files = []
+        self.jars = []
+        self.logs = []
+        self.log_sequence = 0
+
+    def _text(self, size):
+        # configuration-like content - compressible, but different in every file
+        line = f"<property name=\"p{self.random.getrandbits(32)}\" value=\"{self.random.getrandbits(64)}\"/>\n"
+        return (line * (size // len(line) + 1))[:size]
+
+    def _write_small(self, rel_path, size):
+        path = f"{self.root}/{rel_path}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self._text(size))
+
+    def _write_jar(self, rel_path, changed_entry=None, version=0):
+        # half of the entries are random bytes (already compressed classes and resources), half are text
+        path = f"{self.root}/{rel_path}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entries = max(1, self.args.jar_size // 16384)
+        content = random.Random(f"{self.args.seed}:{rel_path}")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as jar:
+            for index in range(entries):
+                if index % 2:
+                    data = content.getrandbits(8 * 16384).to_bytes(16384, "big")
+                else:
+                    data = (f"class C{index} {{ int v = {content.getrandbits(32)}; }}\n" * 512).encode()
+                if index == changed_entry:
+                    data = f"patched {version}\n".encode() + data
+                jar.writestr(zipfile.ZipInfo(f"oracle/bench/C{index}.class", (2024, 1, 1, 0, 0, 0)), data)
+
+    def _write_log(self):
+        self.log_sequence += 1
+        rel_path = f"private_config/domains/{DOMAIN_NAME}/servers/{SERVER_NAME}/logs/{SERVER_NAME}.log{self.log_sequence:05d}"
+        self._write_small(rel_path, self.args.log_size)
+        self.logs.append(rel_path)
+
+    def create(self):
+        """Create the tree"""
+        for index in range(self.args.small_files):
+            rel_path = f"products/oracle_common/modules/module{index // 250}/file{index}.xml"
+            self._write_small(rel_path, self.args.small_size)
+            self.small_files.append(rel_path)
+        for index in range(self.args.jars):
+            rel_path = f"products/wlserver/modules/lib{index}.jar"
+            self._write_jar(rel_path)
+            self.jars.append(rel_path)
+        for index in range(self.args.config_files):
+            for rel_path in [f"private_config/domains/{DOMAIN_NAME}/config/fmwconfig/file{index}.xml",
+                             f"shared_config/domains/{DOMAIN_NAME}/config/fmwconfig/file{index}.xml"]:
+                self._write_small(rel_path, self.args.small_size)
+                self.small_files.append(rel_path)
+        for index in range(self.args.log_files):
+            self._write_log()
+        # shared config: config.xml (read by pull and push to find the applications), applications and deployment plans
+        config_xml = f"{self.root}/shared_config/domains/{DOMAIN_NAME}/config/config.xml"
+        os.makedirs(os.path.dirname(config_xml), exist_ok=True)
+        with open(config_xml, "w") as f:
+            f.write(CONFIG_XML.format(domain=DOMAIN_NAME, apps=f"{self.site}/shared_config/applications/{DOMAIN_NAME}"))
+        self._write_jar(f"shared_config/applications/{DOMAIN_NAME}/em.ear")
+        self._write_small("shared_config/dp/plan.xml", self.args.small_size)
+
+    def change(self, round_number, rate):
+        """Change a fraction of the files, as patching and a running domain do: small files modified, added and
+        removed, JAR files with one entry patched, the current log appended to and a new log started
+
+        Args:
+            round_number (int): Round, used to make the changes different in every round
+            rate (float): Fraction of the small files and JAR files to change
+
+        Returns:
+            dict: Number of files of each kind changed
+        """
+        changes = {"modified": 0, "added": 0, "removed": 0, "jars": 0, "logs": 0}
+        count = max(1, round(len(self.small_files) * rate)) if self.small_files and rate > 0 else 0
+        for rel_path in self.random.sample(self.small_files, count):
+            self._write_small(rel_path, self.args.small_size)
+            changes['modified'] += 1
+        for _ in range(max(1, count // 10) if count else 0):
+            removed = self.random.choice(self.small_files)
+            os.remove(f"{self.root}/{removed}")
+            self.small_files.remove(removed)
+            added = f"{os.path.dirname(removed)}/added_{round_number}_{changes['added']}.xml"
+            self._write_small(added, self.args.small_size)
+            self.small_files.append(added)
+            changes['removed'] += 1
+            changes['added'] += 1
+        if self.jars and rate > 0:
+            entries = max(1, self.args.jar_size // 16384)
+            for rel_path in self.random.sample(self.jars, max(1, round(len(self.jars) * rate))):
+                self._write_jar(rel_path, changed_entry=self.random.randrange(entries), version=round_number)
+                changes['jars'] += 1
+        if self.logs:
+            with open(f"{self.root}/{self.logs[-1]}", "a") as f:
+                f.write(self._text(self.args.log_size // 4))
+            self._write_log()
+            while len(self.logs) > self.args.log_files:
+                os.remove(f"{self.root}/{self.logs.pop(0)}")
+            changes['logs'] = 2
+        return changes
+
+    def stats(self, data):
+        """Number of files and bytes of each data type of the tree
+
+        Args:
+            data (list[str]): Data types
+
+        Returns:
+            dict: Data types mapped to their files and bytes
+        """
+        stats = {}
+        for data_type in data:
+            folder = DATA_TYPES[data_type][0]
+            files = 0
+            size = 0
+            for dirpath, _, filenames in os.walk(f"{self.root}/{folder}"):
+                for filename in filenames:
+                    files += 1
+                    size += os.path.getsize(os.path.join(dirpath, filename))
+            stats[data_type] = {"files": files, "bytes": size}
+        return stats
+
+
+def point_site(site, target):
+    # switch the path used by the configuration to the primary or standby tree
+    tmp_link = f"{site}.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link)
+    os.replace(tmp_link, site)
+
+
+def benchmark_config(args, site, stage):
+    # replication.properties options, with the directories and environments of the benchmark
+    config = configparser.ConfigParser()
+    for config_file in CONSTANTS.EXTERNAL_CONFIG_FILE, CONSTANTS.INTERNAL_CONFIG_FILE:
+        tmp_cfg = configparser.RawConfigParser()
+        with open(config_file, "r") as f:
+            tmp_cfg.read_file(f)
+        config = UTILS.update_config(config, tmp_cfg)
+    config[DIRECTORIES].update({
+        "WLS_PRODUCTS": f"{site}/products",
+        "WLS_JDK_DIR": "",
+        "WLS_PRIVATE_CONFIG_DIR": f"{site}/private_config",
+        "WLS_SHARED_CONFIG_DIR": f"{site}/shared_config" if "shared_config" in args.data else "",
+        "WLS_SHARED_RUNTIME_DIR": "",
+        "WLS_CONFIG_PATH": f"{site}/shared_config/domains/{DOMAIN_NAME}/config/config.xml",
+        "WLS_DP_DIR": f"{site}/shared_config/dp",
+        "WLS_ADDITIONAL_SHARED_DIRS": "",
+        "OHS_JDK_DIR": "",
+        "STAGE_GOLD_COPY_BASE": stage
+    })
+    # a single WLS node and no OHS: every node of an environment would share the same tree in this host
+    for section, host in [(DR.PRIMARY, args.primary_host), (DR.STANDBY, args.standby_host)]:
+        config[section] = {
+            "wls_osuser": args.user,
+            "wls_osgroup": args.user,
+            "wls_ssh_key": args.ssh_key,
+            "wls_nodes": host,
+            "ohs_osuser": "",
+            "ohs_osgroup": "",
+            "ohs_ssh_key": "",
+            "ohs_nodes": ""
+        }
+    # push always goes to the standby environment of the benchmark
+    config[OPTIONS]['standby_targets'] = ""
+    for option in args.option or []:
+        name, _, value = option.partition("=")
+        config[OPTIONS][name.strip().lower()] = value.strip()
+    return config
+
+
+def tree_differences(primary_root, standby_root, config, data, workers):
+    # paths that differ between the primary and standby trees of each data type, excluded paths ignored.
+    # Paths only in the standby are differences only if push deletes them
+    use_delete = config.getboolean(OPTIONS, 'delete')
+    differences = {}
+    for data_type in data:
+        folder, exclude_option = DATA_TYPES[data_type]
+        exclude_list = [item for item in config[OPTIONS][exclude_option].split("\n") if item]
+        primary = Manifest.from_local(f"{primary_root}/{folder}", exclude_list, workers)
+        standby = Manifest.from_local(f"{standby_root}/{folder}", exclude_list, workers)
+        differences[data_type] = sorted(set(primary.diff(standby)) | (set(standby.diff(primary)) if use_delete else set()))
+    return differences
+
+
+def run_action(logger, config, action, data, report_dir, label):
+    # time one pull or push and collect its run report
+    DR.run_report = RunReport(f"{report_dir}/{label}_{action}.json", action)
+    start = time.time()
+    try:
+        if action == 'pull':
+            success = DR.pull(logger, config, data, ['wls'])
+        else:
+            success = DR.push(logger, config, data, ['wls'])
+    except Exception as e:
+        logger.writelog("error", f"{action.capitalize()} [{label}] failed: {str(e)}")
+        success = False
+    elapsed = time.time() - start
+    DR.run_report.finish(success)
+    report = DR.run_report.report
+    DR.run_report = None
+    logger.writelog("info", f"{action.capitalize()} [{label}] {'completed' if success else 'failed'} in {elapsed:.1f} seconds")
+    return {"action": action, "success": success, "elapsed": round(elapsed, 3), "totals": report['totals'], "jobs": report['jobs']}
+
+
+def rsync_version():
+    try:
+        output = subprocess.run(["rsync", "--version"], capture_output=True, text=True).stdout
+        return output.splitlines()[0].strip() if output else None
+    except OSError:
+        return None
+
+
+def run(args):
+    os.makedirs(f"{BASEDIR}/log", exist_ok=True)
+    logger = Logger(__file__, LOG_FILE, 'DEBUG' if args.debug else 'INFO')
+    # DataReplication logs to the benchmark log and writes its progress next to it
+    DR.LOG_FILE = LOG_FILE
+    DR.PROGRESS_FILE = f"{BASEDIR}/log/benchmark_progress_{now}.jsonl"
+    workdir = os.path.abspath(args.workdir)
+    if os.path.isdir(workdir) and os.listdir(workdir):
+        if not os.path.isfile(f"{workdir}/{WORKDIR_MARKER}"):
+            logger.writelog("error", f"Work directory [{workdir}] is not empty and was not created by this script - exiting")
+            sys.exit(1)
+        shutil.rmtree(workdir)
+    site = f"{workdir}/site"
+    primary_root = f"{workdir}/primary"
+    standby_root = f"{workdir}/standby"
+    report_dir = f"{workdir}/reports"
+    for directory in [workdir, primary_root, standby_root, report_dir]:
+        os.makedirs(directory, exist_ok=True)
+    open(f"{workdir}/{WORKDIR_MARKER}", "w").close()
+
+    config = benchmark_config(args, site, f"{workdir}/stage")
+    for action in ['pull', 'push']:
+        valid_config, errors = UTILS.validate_config(config, action, DR.PRIMARY, DR.STANDBY)
+        if not valid_config:
+            logger.writelog("error", "Errors found in benchmark configuration:")
+            for error in errors:
+                logger.writelog("error", error)
+            sys.exit(1)
+    for env in [DR.PRIMARY, DR.STANDBY]:
+        conn_success, errors = DR.check_connectivity(config[env])
+        if not conn_success:
+            logger.writelog("error", f"Cannot connect to [{env}] host [{config[env]['wls_nodes']}] - the ssh key must be authorized for user [{args.user}]:")
+            for error in errors:
+                logger.writelog("error", error)
+            sys.exit(1)
+
+    logger.writelog("info", f"Creating synthetic tree in [{primary_root}]")
+    start = time.time()
+    tree = SyntheticTree(primary_root, site, args)
+    tree.create()
+    logger.writelog("info", f"Synthetic tree created in {time.time() - start:.1f} seconds")
+    if not DR.check_create_dir_structure(logger, config, 1, 0, check_only=False):
+        logger.writelog("error", "Could not create the staging directories - exiting")
+        sys.exit(1)
+    results = {
+        "started": time.time(),
+        "parameters": {name: value for name, value in vars(args).items() if name not in ['ssh_key', 'debug']},
+        "environment": {
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "rsync": rsync_version(),
+            "cpus": os.cpu_count(),
+            "options": {name: value for name, value in config[OPTIONS].items() if not name.startswith("exclude")}
+        },
+        "tree": tree.stats(args.data),
+        "rounds": []
+    }
+    DR.start_ssh_multiplexer(logger, config, config[DR.PRIMARY])
+    DR.start_ssh_multiplexer(logger, config, config[DR.STANDBY])
+    workers = config.getint(OPTIONS, 'manifest_workers', fallback=4)
+    # round 0 is the initial copy, the last round has no changes (the cost of finding that nothing changed)
+    all_successful = True
+    try:
+        for round_number in range(args.rounds + 2):
+            if round_number == 0:
+                label, changes = "initial", None
+            elif round_number <= args.rounds:
+                label, changes = f"round{round_number}", tree.change(round_number, args.change_rate)
+            else:
+                label, changes = "unchanged", None
+            logger.writelog("info", f"Benchmark round [{label}]" + (f" - changes: {changes}" if changes else ""))
+            point_site(site, primary_root)
+            pull_result = run_action(logger, config, 'pull', args.data, report_dir, label)
+            point_site(site, standby_root)
+            push_result = run_action(logger, config, 'push', args.data, report_dir, label)
+            differences = tree_differences(primary_root, standby_root, config, args.data, workers)
+            in_sync = not any(differences.values())
+            if not in_sync:
+                logger.writelog("error", f"Standby tree differs from primary after round [{label}]: " +
+                                ", ".join([f"{data_type}: {len(paths)} paths" for data_type, paths in differences.items() if paths]))
+            all_successful = all_successful and pull_result['success'] and push_result['success'] and in_sync
+            results['rounds'].append({
+                "round": label,
+                "changes": changes,
+                "pull": pull_result,
+                "push": push_result,
+                "elapsed": round(pull_result['elapsed'] + push_result['elapsed'], 3),
+                "standby_in_sync": in_sync,
+                "differences": {data_type: paths[:20] for data_type, paths in differences.items() if paths}
+            })
+    finally:
+        DR.stop_ssh_multiplexer()
+        DR.session_pool.close_all()
+    results['ended'] = time.time()
+    results['success'] = all_successful
+    incremental = [item for item in results['rounds'] if item['changes']]
+    results['summary'] = {
+        "initial_seconds": results['rounds'][0]['elapsed'],
+        "incremental_seconds": round(sum(item['elapsed'] for item in incremental) / len(incremental), 3) if incremental else None,
+        "unchanged_seconds": results['rounds'][-1]['elapsed'],
+        "retries": sum(item[action]['totals'].get('retries', 0) for item in results['rounds'] for action in ['pull', 'push']),
+        "failed_jobs": sum(item[action]['totals'].get('failed_jobs', 0) for item in results['rounds'] for action in ['pull', 'push'])
+    }
+    output = args.output if args.output else RESULTS_FILE
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, output)
+    logger.writelog("info", f"Benchmark results written to {output}: initial {results['summary']['initial_seconds']} seconds, "
+                            f"incremental {results['summary']['incremental_seconds']} seconds, unchanged {results['summary']['unchanged_seconds']} seconds")
+    if not args.keep:
+        shutil.rmtree(workdir)
+    logger.logger.handlers.clear()
+    sys.exit(0 if all_successful else 1)
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description="Benchmark of DataReplication.py pull and push with synthetic trees in this host",
+                                         formatter_class=argparse.RawTextHelpFormatter)
+    arg_parser.add_argument("--debug", action="store_true", help="set logging to debug")
+    arg_parser.add_argument("-v", "--version", action='version', version=__version__)
+    arg_parser.add_argument("-k", "--ssh-key", required=True,
+                            help="Private ssh key authorized for the current OS user in this host")
+    arg_parser.add_argument("-u", "--user", default=getpass.getuser(), help="OS user to connect as (default: current user)")
+    arg_parser.add_argument("--primary-host", default="127.0.0.1", help="Address of this host used as primary (default: 127.0.0.1)")
+    arg_parser.add_argument("--standby-host", default="127.0.0.2", help="Address of this host used as standby (default: 127.0.0.2)")
+    arg_parser.add_argument("-w", "--workdir", default="/tmp/hydr_benchmark",
+                            help="Work directory for the trees and the staging folder - removed at the end\n(default: /tmp/hydr_benchmark)")
+    arg_parser.add_argument("--keep", action="store_true", help="Keep the work directory at the end")
+    arg_parser.add_argument("-o", "--output", help="JSON results file (default: log/benchmark_<date>.json)")
+    arg_parser.add_argument("-d", "--data", choices=list(DATA_TYPES), action="append", type=lambda val: val.lower(),
+                            help="Data to benchmark - repeat for several (default: all)")
+    arg_parser.add_argument("-O", "--option", action="append", metavar="OPTION=VALUE",
+                            help="Override a replication.properties option, for example -O engine=supervised")
+    arg_parser.add_argument("-r", "--rounds", type=int, default=3, help="Rounds of changes pulled and pushed (default: 3)")
+    arg_parser.add_argument("-c", "--change-rate", type=float, default=0.01,
+                            help="Fraction of the files changed in every round (default: 0.01)")
+    arg_parser.add_argument("--seed", type=int, default=1, help="Seed of the generated content (default: 1)")
+    arg_parser.add_argument("--small-files", type=int, default=5000, help="Small files in the products (default: 5000)")
+    arg_parser.add_argument("--small-size", type=int, default=4096, help="Size of the small files in bytes (default: 4096)")
+    arg_parser.add_argument("--jars", type=int, default=20, help="JAR files in the products (default: 20)")
+    arg_parser.add_argument("--jar-size", type=int, default=8 * 1024 * 1024, help="Size of the JAR files in bytes (default: 8 MiB)")
+    arg_parser.add_argument("--config-files", type=int, default=500,
+                            help="Files in each of the private and shared domain config (default: 500)")
+    arg_parser.add_argument("--log-files", type=int, default=10, help="Server log files kept (default: 10)")
+    arg_parser.add_argument("--log-size", type=int, default=1024 * 1024, help="Size of the server log files in bytes (default: 1 MiB)")
+    args = arg_parser.parse_args()
+    if args.data is None:
+        args.data = list(DATA_TYPES)
+    args.ssh_key = os.path.abspath(os.path.expanduser(args.ssh_key))
+    run(args)
@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+
+## ChangeAgent.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Change detection agent staged by DataReplication.py on the primary hosts, so that incremental pulls
+### only transfer the paths changed since the last successful pull
+
+import hashlib
+import os
+import shlex
+import shutil
+
+AGENT_DIR = "$HOME/.hydr_agent"
+# the agent is sent with every request, so the copy on the hosts is always the current one.
+# changes: prints FULL if there is no marker for the state id, otherwise every entry whose inode changed
+#          (ctime) after the marker - D for directories, followed by their entries (E), F for the rest.
+#          The scan start time is kept as pending marker.
+# commit:  makes the pending marker the new marker, after the pull succeeded
+AGENT_SCRIPT = r"""
+set -o pipefail
+state_dir="$HOME/.hydr_agent/state"
+mkdir -p "$state_dir" || exit 1
+action="$1"; state_id="$2"; root="$3"
+marker="$state_dir/$state_id.marker"
+pending="$state_dir/$state_id.pending"
+case "$action" in
+    changes)
+        touch "$pending.new" || exit 1
+        cd "$root" || exit 1
+        mv "$pending.new" "$pending" || exit 1
+        if [ ! -f "$marker" ]; then
+            echo "FULL"
+            exit 0
+        fi
+        echo "CHANGES"
+        find . -cnewer "$marker" \( -type d -printf 'D\t%p\n' -exec find {} -mindepth 1 -maxdepth 1 -printf 'E\t%p\n' \; \
+            -o -printf 'F\t%p\n' \) || exit 1
+        echo "END"
+        ;;
+    commit)
+        if [ -f "$pending" ]; then
+            mv "$pending" "$marker"
+        fi
+        ;;
+    *)
+        exit 2
+        ;;
+esac
+"""
+
+
+def state_id(host, origin_path, destination_path):
+    """Identifier of the agent state of a pull: one marker per source directory and staging directory
+
+    Returns:
+        str: State identifier
+    """
+    return hashlib.sha256(f"{host}:{origin_path}:{destination_path}".encode()).hexdigest()[:24]
+
+
+def agent_command(action, state, root=""):
+    """Command that stages the agent on the host (read from the standard input) and runs it
+
+    Args:
+        action (str): 'changes' or 'commit'
+        state (str): State identifier
+        root (str, optional): Directory to scan, for the 'changes' action. Defaults to "".
+
+    Returns:
+        str: Command to be run on the remote host, with AGENT_SCRIPT as standard input
+    """
+    return f"mkdir -p {AGENT_DIR} && cat > {AGENT_DIR}/change_agent.sh && " \
+           f"bash {AGENT_DIR}/change_agent.sh {action} {state} {shlex.quote(root)}"
+
+
+def normalize(path):
+    path = path[2:] if path.startswith("./") else path
+    return "" if path == "." else path
+
+
+class ChangeSet:
+    """Paths changed in a source directory since the last successful pull, as reported by the agent
+    """
+    def __init__(self, full=True, changed=None, dirs=None):
+        """Constructor
+
+        Args:
+            full (bool, optional): True if there is no previous pull to compare with. Defaults to True.
+            changed (set, optional): Changed relative paths (files, links and directories). Defaults to None.
+            dirs (dict, optional): Changed directories mapped to the set of their current entries. Defaults to None.
+        """
+        self.full = full
+        self.changed = changed if changed else set()
+        self.dirs = dirs if dirs else {}
+
+    @staticmethod
+    def from_output(output):
+        """Parse the output of the agent 'changes' action
+
+        Raises:
+            Exception: If the output is not complete
+
+        Returns:
+            ChangeSet: Changes
+        """
+        lines = output.splitlines()
+        if "FULL" in lines:
+            return ChangeSet()
+        if "CHANGES" not in lines or "END" not in lines:
+            raise Exception("incomplete change agent output")
+        changed = set()
+        dirs = {}
+        for line in lines:
+            kind, _, path = line.partition("\t")
+            path = normalize(path)
+            if kind == "D":
+                dirs.setdefault(path, set())
+                if path:
+                    changed.add(path)
+            elif kind == "E":
+                dirs.setdefault(os.path.dirname(path), set()).add(path)
+            elif kind == "F":
+                changed.add(path)
+        return ChangeSet(False, changed, dirs)
+
+    def transfer_paths(self, local_root, exclude_filter):
+        """Paths to transfer with rsync --files-from -r: changed files and links, plus the changed
+        entries missing in the staging directory (directories moved into the tree keep the ctime of
+        their contents, so they are transferred recursively)
+
+        Args:
+            local_root (str): Staging directory
+            exclude_filter (ExcludeFilter): Exclude rules of the transfer
+
+        Returns:
+            list[str]: Sorted relative paths
+        """
+        paths = set()
+        for path in self.changed | set(entry for entries in self.dirs.values() for entry in entries):
+            local_path = os.path.join(local_root, path)
+            if os.path.isdir(local_path) and not os.path.islink(local_path):
+                # existing directories only changed their list of entries, handled one by one
+                continue
+            if path in self.dirs and os.path.lexists(local_path):
+                continue
+            if path not in self.changed and os.path.lexists(local_path):
+                continue
+            if exclude_filter.excluded(path, is_dir=path in self.dirs):
+                continue
+            paths.add(path)
+        return sorted(paths)
+
+    def apply_deletes(self, local_root, exclude_filter, keep=None):
+        """Remove from the staging directory the entries that no longer exist in the changed source
+        directories. Excluded entries are kept, as rsync --delete does.
+
+        Args:
+            local_root (str): Staging directory
+            exclude_filter (ExcludeFilter): Exclude rules of the transfer
+            keep (list[str], optional): Entry names never removed. Defaults to None.
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        for directory, entries in self.dirs.items():
+            local_dir = os.path.join(local_root, directory)
+            if not os.path.isdir(local_dir) or os.path.islink(local_dir):
+                continue
+            for entry in os.scandir(local_dir):
+                path = f"{directory}/{entry.name}" if directory else entry.name
+                if path in entries or (keep and entry.name in keep):
+                    continue
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if exclude_filter.excluded(path, is_dir=is_dir):
+                    continue
+                if is_dir:
+                    shutil.rmtree(entry.path)
+                else:
+                    os.remove(entry.path)
+                removed += 1
+        return removed
+
+
+def expand_paths(local_root, paths, exclude_filter):
+    """Files and links under a list of paths of a local directory, descending into directories
+
+    Args:
+        local_root (str): Local directory
+        paths (list[str]): Relative paths
+        exclude_filter (ExcludeFilter): Exclude rules of the transfer
+
+    Returns:
+        list[str]: Sorted relative paths of files and links
+    """
+    expanded = set()
+    for path in paths:
+        local_path = os.path.join(local_root, path)
+        if not os.path.isdir(local_path) or os.path.islink(local_path):
+            expanded.add(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(local_path):
+            rel_dir = os.path.relpath(dirpath, local_root)
+            dirnames[:] = [name for name in dirnames if not exclude_filter.excluded(f"{rel_dir}/{name}", is_dir=True)]
+            for name in filenames + [name for name in dirnames if os.path.islink(os.path.join(dirpath, name))]:
+                if not exclude_filter.excluded(f"{rel_dir}/{name}"):
+                    expanded.add(f"{rel_dir}/{name}")
+    return sorted(expanded)
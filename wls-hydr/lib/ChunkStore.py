@@ -0,0 +1,322 @@
+#!/usr/bin/python3
+
+## ChunkStore.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Content-defined chunking of the archives (JAR, WAR, EAR) pushed by DataReplication.py, so that only the
+### chunks that a standby host does not have in its chunk store are sent when an archive changes
+
+import concurrent.futures
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import shlex
+import sqlite3
+import threading
+import zipfile
+
+ARCHIVE_SUFFIXES = (".jar", ".war", ".ear", ".zip")
+# chunk size limits - chunks average about 64 KiB
+MIN_CHUNK = 16 * 1024
+MAX_CHUNK = 256 * 1024
+# a chunk ends where the top 16 bits of the gear hash are zero
+CUT_MASK = 0xFFFF << 48
+HASH_MASK = (1 << 64) - 1
+# gear hash table - derived from sha256, so that chunk boundaries are the same in every host and version
+GEAR = [int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], "big") for value in range(256)]
+# with zip entry alignment, about one zip entry in ZIP_ENTRY_GROUP starts a chunk (chosen by entry name)
+ZIP_ENTRY_GROUP = 8
+# chunk store in the standby hosts - chunks not used in CHUNK_RETENTION_DAYS are removed
+REMOTE_STORE = "$HOME/.hydr_chunks"
+CHUNK_RETENTION_DAYS = 30
+STORE_MARKER = "__HYDR_CHUNKS_END__"
+
+# reads chunk digests from the standard input and prints the ones missing from the store.
+# The chunks found are touched, so that they are kept in the store
+MISSING_SCRIPT = r"""
+store="$HOME/.hydr_chunks"
+mkdir -p "$store" || exit 1
+present=$(mktemp) || exit 1
+while read -r digest; do
+    if [ -f "$store/${digest:0:2}/$digest" ]; then
+        echo "$store/${digest:0:2}/$digest" >> "$present"
+    else
+        echo "$digest"
+    fi
+done
+xargs -d '\n' -r touch -c < "$present"
+rm -f "$present"
+echo "__HYDR_CHUNKS_END__"
+"""
+
+# reads PATH MODE MTIME DIGEST CHUNKS lines (tab separated, chunks separated by spaces) from the standard input and
+# writes every file under ROOT from the chunks in the store, checking its sha256. Then removes the old chunks
+ASSEMBLE_SCRIPT = r"""
+set -o pipefail
+store="$HOME/.hydr_chunks"; root="$1"; retention="$2"; rc=0
+while IFS=$'\t' read -r path mode mtime digest chunks; do
+    target="$root/$path"
+    tmp="$(dirname "$target")/.$(basename "$target").hydr-chunks"
+    if mkdir -p "$(dirname "$target")" && \
+       (cd "$store" && for chunk in $chunks; do cat "${chunk:0:2}/$chunk" || exit 1; done) > "$tmp" && \
+       [ "$(sha256sum < "$tmp" | cut -d ' ' -f 1)" = "$digest" ] && \
+       chmod "$mode" "$tmp" && touch -d "@$mtime" "$tmp" && mv -f "$tmp" "$target"; then
+        echo "ASSEMBLED $path"
+    else
+        rm -f "$tmp"
+        echo "FAILED $path"
+        rc=1
+    fi
+done
+find "$store" -type f -mtime +"$retention" -delete 2>/dev/null
+exit $rc
+"""
+
+# reads PATH DIGEST OFFSET LENGTH lines (tab separated) from the standard input and copies each chunk of the
+# files under ROOT to the store, if it is not there yet. No data is sent to the host
+SEED_SCRIPT = r"""
+store="$HOME/.hydr_chunks"; root="$1"; rc=0
+while IFS=$'\t' read -r path digest offset length; do
+    chunk="$store/${digest:0:2}/$digest"
+    [ -f "$chunk" ] && continue
+    mkdir -p "$store/${digest:0:2}" && \
+        dd if="$root/$path" of="$chunk.tmp" bs=65536 iflag=skip_bytes,count_bytes skip="$offset" count="$length" status=none && \
+        mv -f "$chunk.tmp" "$chunk" || { rm -f "$chunk.tmp"; rc=1; }
+done
+exit $rc
+"""
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS recipes (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        inode INTEGER,
+        zip_entries INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        chunks TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS seeded (
+        host TEXT NOT NULL,
+        path TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        PRIMARY KEY (host, path))"""
+]
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def content_chunks(data, start, end):
+    """Content-defined chunk boundaries of data[start:end], found with a gear rolling hash. The hash runs in
+    the interpreter, at about 5 MB/s per CPU - ChunkIndex.recipes() chunks several archives in parallel
+
+    Returns:
+        list[int]: End offset of every chunk. The last one is end.
+    """
+    ends = []
+    gear = GEAR
+    hash_mask = HASH_MASK
+    # the top 16 bits of the hash are zero
+    cut_below = (CUT_MASK ^ HASH_MASK) + 1
+    position = start
+    while position < end:
+        limit = min(position + MAX_CHUNK, end)
+        cut = limit
+        if limit - position > MIN_CHUNK:
+            value = 0
+            index = position + MIN_CHUNK
+            for byte in data[index:limit]:
+                index += 1
+                value = ((value << 1) + gear[byte]) & hash_mask
+                if value < cut_below:
+                    cut = index
+                    break
+        ends.append(cut)
+        position = cut
+    return ends
+
+
+def zip_cuts(path):
+    """Offsets where chunks of a zip archive can start: the local header of the entries whose name hash selects
+    them, and the central directory. Boundaries depend on the entry names, so an entry that changes only changes
+    the chunks that hold it
+
+    Returns:
+        list[int]: Sorted offsets, empty if the file is not a zip archive
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            cuts = [info.header_offset for info in archive.infolist()
+                    if hashlib.sha256(info.filename.encode(errors="replace")).digest()[0] % ZIP_ENTRY_GROUP == 0]
+            if getattr(archive, 'start_dir', None):
+                cuts.append(archive.start_dir)
+    except (zipfile.BadZipFile, OSError, ValueError):
+        return []
+    return sorted(set(cuts))
+
+
+def chunk_file(path, zip_entries=True):
+    """Split a file into content-defined chunks
+
+    Args:
+        path (str): File path
+        zip_entries (bool, optional): Align chunk boundaries with the entries of zip archives. Defaults to True.
+
+    Returns:
+        tuple: (sha256 of the file, list of (sha256, offset, length) tuples, one per chunk)
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return hashlib.sha256().hexdigest(), []
+    cuts = zip_cuts(path) if zip_entries else []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        ends = []
+        position = 0
+        for cut in cuts + [size]:
+            if cut - position < MIN_CHUNK and cut != size:
+                continue
+            if cut - position > MAX_CHUNK:
+                ends += content_chunks(data, position, cut)
+            elif cut > position:
+                ends.append(cut)
+            position = cut
+        file_digest = hashlib.sha256()
+        chunks = []
+        position = 0
+        for end in ends:
+            block = data[position:end]
+            file_digest.update(block)
+            chunks.append((hashlib.sha256(block).hexdigest(), position, end - position))
+            position = end
+    return file_digest.hexdigest(), chunks
+
+
+def store_command(action, root=""):
+    """Command run in a standby host to use its chunk store
+
+    Args:
+        action (str): 'missing' (digests read from the standard input), 'receive' (tar stream of chunks read from
+            the standard input), 'assemble' or 'seed' (lines read from the standard input, see the scripts)
+        root (str, optional): Destination directory, for 'assemble' and 'seed'. Defaults to "".
+
+    Returns:
+        str: Command to be run on the remote host
+    """
+    if action == 'missing':
+        return f"bash -c {shlex.quote(MISSING_SCRIPT)}"
+    if action == 'receive':
+        return f"mkdir -p {REMOTE_STORE} && tar -x -C {REMOTE_STORE} -f -"
+    if action == 'assemble':
+        return f"bash -c {shlex.quote(ASSEMBLE_SCRIPT)} hydr {shlex.quote(root)} {CHUNK_RETENTION_DAYS}"
+    return f"bash -c {shlex.quote(SEED_SCRIPT)} hydr {shlex.quote(root)}"
+
+
+class ChunkIndex:
+    """SQLite cache, in the bastion, of the chunks of the staged archives (the chunk data is read from the staged
+    files when it has to be sent), and of the archives whose chunks were already stored in each standby host.
+    Archives are only chunked again when their size, modification time or inode change.
+    """
+    def __init__(self, db_path, zip_entries=True):
+        """Constructor. Creates the database if it does not exist.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            zip_entries (bool, optional): Align chunk boundaries with the entries of zip archives. Defaults to True.
+        """
+        self.db_path = db_path
+        self.zip_entries = zip_entries
+        # transfer jobs use the index from several threads
+        self.lock = threading.Lock()
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def cached(self, path):
+        """Chunks of a file, if they are in the cache
+
+        Args:
+            path (str): Absolute path of the file
+
+        Returns:
+            tuple: (sha256 of the file, list of (sha256, offset, length) tuples), None if the file has to be chunked
+        """
+        stat = os.stat(path)
+        with self.lock, self._connect() as conn:
+            row = conn.execute("SELECT size, mtime, inode, zip_entries, digest, chunks FROM recipes WHERE path = ?", (path,)).fetchone()
+        if row is not None and tuple(row[:4]) == (stat.st_size, stat.st_mtime, stat.st_ino, int(self.zip_entries)):
+            return row[4], [tuple(chunk) for chunk in json.loads(row[5])]
+        return None
+
+    def recipe(self, path):
+        """Chunks of a file, from the cache or computed now
+
+        Args:
+            path (str): Absolute path of the file
+
+        Returns:
+            tuple: (sha256 of the file, list of (sha256, offset, length) tuples)
+        """
+        return self.recipes([path])[path]
+
+    def recipes(self, paths, workers=1):
+        """Chunks of several files, from the cache or computed now. Files that are not in the cache are
+        chunked in parallel by worker processes
+
+        Args:
+            paths (list[str]): Absolute paths of the files
+            workers (int, optional): Number of worker processes. Defaults to 1 (chunked in this process).
+
+        Returns:
+            dict: Paths mapped to (sha256 of the file, list of (sha256, offset, length) tuples)
+        """
+        results = {}
+        pending = []
+        for path in paths:
+            recipe = self.cached(path)
+            if recipe is None:
+                pending.append((path, os.stat(path)))
+            else:
+                results[path] = recipe
+        if not pending:
+            return results
+        workers = min(max(1, int(workers)), len(pending))
+        if workers > 1:
+            # worker processes are started, not forked: the transfer threads may hold locks
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                computed = list(executor.map(chunk_file, [path for path, _ in pending], [self.zip_entries] * len(pending)))
+        else:
+            computed = [chunk_file(path, self.zip_entries) for path, _ in pending]
+        with self.lock, self._connect() as conn:
+            for (path, stat), (digest, chunks) in zip(pending, computed):
+                conn.execute("INSERT OR REPLACE INTO recipes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime, stat.st_ino, int(self.zip_entries), digest, json.dumps(chunks)))
+                results[path] = (digest, chunks)
+        return results
+
+    def seeded(self, host):
+        """Files whose chunks are already in the chunk store of a host
+
+        Returns:
+            dict: Destination file paths mapped to the sha256 of the file seeded
+        """
+        with self.lock, self._connect() as conn:
+            rows = conn.execute("SELECT path, digest FROM seeded WHERE host = ?", (host,)).fetchall()
+        return dict(rows)
+
+    def set_seeded(self, host, files):
+        """Record files whose chunks were stored in the chunk store of a host
+
+        Args:
+            host (str): Host
+            files (dict): Destination file paths mapped to their sha256
+        """
+        with self.lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO seeded VALUES (?, ?, ?)", [(host, path, digest) for path, digest in files.items()])
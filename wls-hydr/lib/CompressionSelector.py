@@ -0,0 +1,228 @@
+#!/usr/bin/python3
+
+## CompressionSelector.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Selection of the rsync compression codec used by DataReplication.py, with a per host and direction calibration cache
+
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+# codecs that can be configured - 'default' lets rsync use plain -z as it always did
+CODECS = ["default", "none", "zlib", "zstd", "lz4"]
+# size of the sample sent to each host to calibrate the codecs
+CALIBRATION_SIZE = 8 * 1024 * 1024
+# calibration results older than this are measured again
+CALIBRATION_TTL = 7 * 24 * 3600
+# directions of a transfer, seen from the bastion
+DIRECTIONS = ["push", "pull"]
+
+
+def rsync_options(codec, level=None):
+    """rsync compression options for a codec
+
+    Args:
+        codec (str): One of CODECS
+        level (int, optional): Compression level. Defaults to None (codec default).
+
+    Returns:
+        str: rsync options
+    """
+    if codec == "none":
+        return ""
+    options = "-z" if codec == "default" else f"-z --compress-choice={codec}"
+    if level is not None:
+        options += f" --compress-level={level}"
+    return options
+
+
+def local_codecs():
+    """Compression codecs supported by the local rsync
+
+    Returns:
+        list[str]: Codec names. Empty if rsync is older than 3.2 and does not support --compress-choice.
+    """
+    try:
+        run = subprocess.run(["rsync", "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                             universal_newlines=True, timeout=30)
+    except Exception:
+        return []
+    match = re.search(r"^Compress list:\s*\n\s*(.+)$", run.stdout, re.MULTILINE)
+    if not match:
+        return []
+    return [codec for codec in match.group(1).split() if codec in CODECS]
+
+
+class CompressionSelector:
+    """Picks, for each host and direction, the compression codec with the best effective throughput.
+    The codecs are calibrated by sending the same sample to the host (push) or receiving it from the host
+    (pull) with each of them, as the links are often asymmetric and compression costs CPU on a different
+    end in each direction. The result is cached in a JSON file so that the calibration is only repeated
+    after CALIBRATION_TTL.
+    """
+    def __init__(self, logger, cache_path, level=None, start_process=subprocess.Popen):
+        """Constructor. Loads the calibration cache if it exists.
+
+        Args:
+            logger (Logger): Logger object
+            cache_path (str): Path to the calibration cache file
+            level (int, optional): Compression level used with the selected codec. Defaults to None.
+            start_process (callable, optional): Starts the calibration commands, with the arguments of
+                subprocess.Popen. Defaults to subprocess.Popen.
+        """
+        self.logger = logger
+        self.cache_path = cache_path
+        self.level = level
+        self.start_process = start_process
+        self.lock = threading.Lock()
+        self.host_locks = {}
+        self.cache = {}
+        if os.path.isfile(cache_path):
+            try:
+                with open(cache_path, "r") as f:
+                    self.cache = json.load(f)
+            except Exception as e:
+                self.logger.writelog("warn", f"Could not read compression calibration cache {cache_path}: {str(e)}")
+        self.codecs = [codec for codec in local_codecs() if codec != "default"]
+
+    def _save(self):
+        # must be called with the lock held
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    @staticmethod
+    def cache_key(host, direction):
+        """Key of the calibration of a host and direction in the cache
+
+        Args:
+            host (str): Host name or IP address
+            direction (str): One of DIRECTIONS
+
+        Returns:
+            str: Cache key
+        """
+        return f"{direction}:{host}"
+
+    def options(self, username, host, key_path, ssh_cmd, direction="push"):
+        """rsync compression options for a host and direction, calibrating the codecs if there is no recent result
+
+        Args:
+            username (str): OS user
+            host (str): Host name or IP address
+            key_path (str): Path to the ssh private key
+            ssh_cmd (str): ssh command line used by rsync to connect to the host
+            direction (str, optional): One of DIRECTIONS. Defaults to "push".
+
+        Returns:
+            str: rsync options
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown transfer direction [{direction}]")
+        if not self.codecs:
+            # rsync without --compress-choice - nothing to choose from
+            return rsync_options("default", self.level)
+        key = self.cache_key(host, direction)
+        with self.lock:
+            host_lock = self.host_locks.setdefault(key, threading.Lock())
+        # only one calibration per host and direction, even if several jobs against the host start together
+        with host_lock:
+            with self.lock:
+                entry = self.cache.get(key)
+            if entry is None or time.time() - entry['calibrated'] > CALIBRATION_TTL or entry['codec'] not in self.codecs:
+                entry = self.calibrate(username, host, ssh_cmd, direction)
+                with self.lock:
+                    self.cache[key] = entry
+                    try:
+                        self._save()
+                    except Exception as e:
+                        self.logger.writelog("warn", f"Could not save compression calibration cache {self.cache_path}: {str(e)}")
+        return rsync_options(entry['codec'], self.level)
+
+    def _run(self, args, timeout=600):
+        # run a calibration command - returns its return code and standard error
+        process = self.start_process(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                     universal_newlines=True)
+        try:
+            _, error = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise
+        if process.returncode < 0:
+            # killed from outside, typically because the transfer job that runs the calibration was stopped
+            raise RuntimeError(f"calibration command stopped by signal {-process.returncode}")
+        return process.returncode, error
+
+    def calibrate(self, username, host, ssh_cmd, direction="push"):
+        """Send a sample to the host (push) or receive it from the host (pull) with each codec and
+        measure the effective throughput. The sample mixes incompressible data (like JAR files) and
+        text (like configuration files).
+
+        Returns:
+            dict: Cache entry with keys 'codec', 'calibrated' and 'throughput' (codec -> bytes per second)
+
+        Raises:
+            RuntimeError: If a calibration command is killed. The partial result is not returned, so
+                that it is not cached.
+        """
+        self.logger.writelog("info", f"Calibrating compression codecs for host [{host}] ({direction})")
+        local_dir = tempfile.mkdtemp(prefix="hydr-calibration-")
+        remote_dir = f"/tmp/.hydr-calibration-{uuid.uuid4().hex}"
+        sample = os.path.join(local_dir, "sample")
+        text = b"".join(f"<property name=\"key{i}\" value=\"/u01/oracle/config/domains/value{i % 97}\"/>\n".encode()
+                        for i in range(CALIBRATION_SIZE // 128))
+        with open(sample, "wb") as f:
+            f.write(os.urandom(CALIBRATION_SIZE // 2))
+            f.write(text[:CALIBRATION_SIZE - CALIBRATION_SIZE // 2])
+        throughput = {}
+        try:
+            if direction == "pull":
+                # the sample is placed on the host first, this copy is not measured
+                returncode, error = self._run(["rsync", "-e", ssh_cmd, "-a", "--whole-file", sample, f"{username}@{host}:{remote_dir}/"])
+                if returncode != 0:
+                    self.logger.writelog("debug", f"Could not place the calibration sample on host [{host}]: {error.strip()}")
+                    return {"codec": "default", "calibrated": time.time(), "throughput": throughput}
+            for codec in self.codecs:
+                # every codec copies the sample to a new directory, so the whole sample is transferred
+                if direction == "pull":
+                    endpoints = [f"{username}@{host}:{remote_dir}/sample", f"{local_dir}/{codec}/"]
+                else:
+                    endpoints = [sample, f"{username}@{host}:{remote_dir}/{codec}/"]
+                rsync_cmd = ["rsync", "-e", ssh_cmd, "-a", "--whole-file"] + \
+                            shlex.split(rsync_options(codec, self.level)) + endpoints
+                start = time.time()
+                try:
+                    returncode, error = self._run(rsync_cmd)
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    self.logger.writelog("debug", f"Compression codec [{codec}] calibration failed for host [{host}]: {str(e)}")
+                    continue
+                elapsed = max(time.time() - start, 0.001)
+                if returncode != 0:
+                    # typically the remote rsync does not support the codec
+                    self.logger.writelog("debug", f"Compression codec [{codec}] calibration failed for host [{host}]: {error.strip()}")
+                    continue
+                throughput[codec] = int(CALIBRATION_SIZE / elapsed)
+        finally:
+            shutil.rmtree(local_dir, ignore_errors=True)
+            # not started with start_process - the sample is removed even if the job was stopped
+            try:
+                subprocess.run(shlex.split(ssh_cmd) + [f"{username}@{host}", f"rm -rf {remote_dir}"],
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                self.logger.writelog("debug", f"Could not remove calibration sample from host [{host}]: {str(e)}")
+        codec = max(throughput, key=throughput.get) if throughput else "default"
+        self.logger.writelog("info", f"Compression codec for host [{host}] ({direction}): {codec} " +
+                                     ", ".join(f"({name}: {int(value / 1024)} KiB/s)" for name, value in throughput.items()))
+        return {"codec": codec, "calibrated": time.time(), "throughput": throughput}
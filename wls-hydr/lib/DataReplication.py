@@ -9,18 +9,23 @@
 ### This script should be executed in a bastion node with connectivity to both environments 
 ### Usage:
 ###
-###      ./DataReplication.py <ACTION> [-i/--instance INSTANCE] [-d/--data DATA] [--pull/--push]
+###      ./DataReplication.py <ACTION> [-i/--instance INSTANCE] [-d/--data DATA] [--resume] [--pull/--push]
 ### Where:
 ###     ACTION:
 ###         Transfer actions to execute:
 ###             1. init:       Check and create staging environment   
 ###             2. pull:       Pull data from primary environment
 ###             3. push:       Push data to secondary environment
-###             4. lifecycle:  Lifecycle operations (push and pull)
+###             4. lifecycle:  Continuous replication: pull the data changed in primary and push it to secondary
+###                           every LIFECYCLE_INTERVAL seconds, tracking the replication lag of each data type
 ###             5. tnsnames    Retrieve tnsnames file from on-prem, 
 ###                           update values with OCI details and push to all OCI WLS nodes
 ###             5.1 tnsnames --pull     Will only retrieve tnsnames file from primary
 ###             5.2 tnsnames --push     Will only update tnsnames with OCI details and push to all OCI WLS nodes
+###             6. status:     Report the contents of the staging environment and when each directory
+###                           was last pulled, changed and pushed (read from the staging index, no remote access)
+###             7. direct:     Copy data from each primary node straight to the matching secondary node, without
+###                           staging it in the bastion (only an audit manifest of each transfer is kept)
 ###                     
 ###
 ###     INSTANCE:
@@ -36,6 +41,10 @@
 ###             shared_config:  Replicate shared config data (only applies to WLS instances)
 ###         NOTE: Optional parameter; if no DATA is supplied, all DATA will be replicated
 ###
+###     --resume:
+###         Resume an interrupted pull or push: transfer jobs completed in the previous run are skipped
+###         if their source has not changed since
+###
 ### Examples:
 ###     To pull all data from WLS instances only:
 ###         ./DataReplication.py pull --instance WLS
@@ -49,6 +58,15 @@
 ###     To push ALL data to ALL instances:
 ###         ./DataReplication.py push
 ###
+###     To push to several standby environments at the same time, list their env files in standby_targets
+###     (replication.properties) and run:
+###         ./DataReplication.py push
+###     To resume a push that failed halfway:
+###         ./DataReplication.py push --resume
+###
+###     To copy WLS private config from primary to secondary without staging it:
+###         ./DataReplication.py direct -i WLS -d private_config
+###
 ###     To replicate tnsnames.ora in OCI with OCI values (scan address and service name)
 ###         ./DataReplication.py tnsnames
 ###
@@ -58,6 +76,12 @@
 ###     To only update tnsnames.ora file in staging environment with OCI details and push to all OCI WLS nodes
 ###         ./DataReplication.py tnsnames --push
 ###
+###     To replicate continuously, pulling and pushing only the data that changes:
+###         ./DataReplication.py lifecycle
+###
+###     To check how up to date the staging environment and the standby are:
+###         ./DataReplication.py status
+###
 
 __version__= "1.0"
 __author__ = "mibratu"
@@ -69,6 +93,37 @@ try:
     from Logger import Logger
     from Utils import Utils as UTILS
     from Utils import Constants as CONSTANTS
+    from TransferScheduler import TransferScheduler
+    from TransferHistory import TransferHistory
+    from TransferProgress import TransferProgress
+    from RunReport import RunReport
+    from RunReport import add_rsync_stats
+    from RunReport import parse_rsync_stats
+    from SupervisedTransferEngine import SupervisedTransferEngine
+    from Manifest import Manifest
+    from Manifest import HASHES_MARKER
+    from Manifest import ExcludeFilter
+    from Manifest import is_volatile
+    from StagingIndex import StagingIndex
+    from RunJournal import RunJournal
+    from SshMultiplexer import SshMultiplexer
+    from SessionPool import SessionPool
+    from LifecycleStatus import LifecycleStatus
+    from BandwidthGovernor import BandwidthGovernor
+    from CompressionSelector import CompressionSelector
+    from CompressionSelector import rsync_options as compression_rsync_options
+    from ChangeAgent import AGENT_SCRIPT
+    from ChangeAgent import ChangeSet
+    from ChangeAgent import agent_command
+    from ChangeAgent import expand_paths
+    from ChangeAgent import state_id as change_agent_state_id
+    from ChunkStore import ChunkIndex
+    from ChunkStore import STORE_MARKER
+    from ChunkStore import is_archive
+    from ChunkStore import store_command
+    from SourceSnapshot import snapshot_command
+    from SourceSnapshot import snapshot_name
+    from SourceSnapshot import snapshot_path
     from xml.etree import ElementTree as ET
     import errno
     import argparse
@@ -76,13 +131,19 @@ try:
     import warnings
     import subprocess
     import threading
+    import concurrent.futures
     import shlex
+    import signal
     import pathlib
-    import paramiko
     import datetime
     import shutil
     import time
     import io
+    import math
+    import random
+    import re
+    import json
+    import tarfile
 except ImportError as e:
     raise ImportError(f"Failed to import module:\n{str(e)} \
         \nMake sure all required modules are installed before running this script")
@@ -102,11 +163,51 @@ OPTIONS = CONSTANTS.OPTIONS_CFG_TAG
 TNS = CONSTANTS.TNS_TAG
 README_FILE = "README_FOR_MANUAL_COPY.txt"
 README_FILE_PATH = f"{BASEDIR}/lib/{README_FILE}"
+# persistent index of the staging contents - created under STAGE_GOLD_COPY_BASE
+STAGING_INDEX_FILE = "staging_index.db"
+# journal of completed transfer jobs used by --resume - created under STAGE_GOLD_COPY_BASE
+RUN_JOURNAL_FILE = "replication_journal.json"
+# replication lag per data type, written by the lifecycle mode after every cycle - created under STAGE_GOLD_COPY_BASE
+LIFECYCLE_STATUS_FILE = "lifecycle_status.json"
+# per host results of the compression codec calibration (compression = auto) - created under STAGE_GOLD_COPY_BASE
+COMPRESSION_CACHE_FILE = "compression_calibration.json"
+# bytes and times of the completed transfer jobs, used by plan to estimate durations - created under STAGE_GOLD_COPY_BASE
+TRANSFER_HISTORY_FILE = "transfer_history.json"
+# chunks of the staged archives and archives seeded in each standby chunk store (chunk_store = True) - created under STAGE_GOLD_COPY_BASE
+CHUNK_INDEX_FILE = "chunk_index.db"
+# audit manifests of the direct transfers (data copied from primary to standby without staging) - created under STAGE_GOLD_COPY_BASE
+DIRECT_MANIFEST_DIR = "direct_manifests"
+# rsync keeps partially transferred files here (relative to each destination directory) so that
+# an interrupted transfer continues from the data already received
+PARTIAL_DIR = ".hydr-partial"
+# number of peers each standby node relays to in relay push mode
+RELAY_FANOUT = 2
+# data types that can be verified by sampling (verify = sample:<fraction>) - configuration is always verified in full
+SAMPLED_DATA_TYPES = ['products', 'jdk']
+# rsync --out-format lines of the files whose data was transferred (sent, received, copied or hard linked)
+TRANSFERRED_FILE_PATTERN = re.compile(r"^[<>ch]f\S* (.+)$")
 
 CALLER = 'cli' if __name__ == '__main__' else 'import'
 
+# shared ssh master connections - opened by run() for pull and push
+ssh_multiplexer = None
+# paramiko sessions reused by all the sftp and remote command operations of a run
+session_pool = SessionPool()
+# processes started by each running transfer job (supervised engine only), so that a job can be stopped
+job_processes = {}
+job_processes_lock = threading.Lock()
+job_context = threading.local()
+# progress of the running rsync transfers - set by run_jobs() while transfer jobs run
+transfer_progress = None
+# report of the current run - set by run()
+run_report = None
+
 now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
 LOG_FILE = f"{BASEDIR}/log/replication_{now}.log"
+# progress of the running transfers, one JSON record per line
+PROGRESS_FILE = f"{BASEDIR}/log/replication_progress_{now}.jsonl"
+# result and rsync metrics of every transfer job of the run
+REPORT_FILE = f"{BASEDIR}/log/replication_report_{now}.json"
 
 #TODO: work out a way to check which is primary and which is standby, placeholder for now:
 if True:
@@ -122,7 +223,8 @@ def myexit(code):
         sys.exit(code)
     raise Exception(code)
 
-def animate(play, stop):
+def animate(play, stop, job_name=None):
+    # shows the rsync progress of the job while it is available, a spinner otherwise
     char_idx = 0
     animation_characters = ['|', '/', '-', '\\']
     while True:
@@ -130,7 +232,12 @@ def animate(play, stop):
             break
         should_play = play.is_set()
         if should_play:
-            print(f"This may take a while... {animation_characters[char_idx]}", end="\r")
+            job_progress = transfer_progress
+            progress = job_progress.status(job_name) if job_progress is not None and job_name else ""
+            if progress:
+                print(f"Transferring: {progress}".ljust(60), end="\r")
+            else:
+                print(f"This may take a while... {animation_characters[char_idx]}".ljust(60), end="\r")
             time.sleep(0.2)
             char_idx = (char_idx + 1) % len(animation_characters)
             sys.stdout.flush() 
@@ -185,6 +292,13 @@ def check_create_dir_structure(logger, config, wls_nodes, ohs_nodes, check_only)
                     logger.writelog("debug", str(e))
                     return False
                 logger.writelog("info", f"Created directory {wls_private_config_dir}")
+    # products1 and products2 can only share hard linked files if they are in the same file system
+    if config.getboolean(OPTIONS, 'dedup_products', fallback=False):
+        for products1, products2 in [('STAGE_WLS_PRODUCTS1', 'STAGE_WLS_PRODUCTS2'), ('STAGE_OHS_PRODUCTS1', 'STAGE_OHS_PRODUCTS2')]:
+            if os.path.isdir(config[DIRECTORIES][products1]) and os.path.isdir(config[DIRECTORIES][products2]) and \
+               os.stat(config[DIRECTORIES][products1]).st_dev != os.stat(config[DIRECTORIES][products2]).st_dev:
+                logger.writelog("warn", f"Directories {config[DIRECTORIES][products1]} and {config[DIRECTORIES][products2]} are in different "
+                                        "file systems - products will be staged without deduplication")
     if not os.path.isfile(README_FILE_PATH):
         logger.writelog("error", "README file missing - update and run again")
         myexit(1)
@@ -197,10 +311,10 @@ def check_connectivity(config_env):
     errors = []
     ohs_nodes = config_env['ohs_nodes'].split("\n") if config_env['ohs_nodes'] else []
     for ohs_node in ohs_nodes:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # the session is kept in the pool and reused by the rest of the run
         try:
-            ssh.connect(hostname=ohs_node, username=config_env['ohs_osuser'], key_filename=config_env['ohs_ssh_key'])
+            with session_pool.session(config_env['ohs_osuser'], ohs_node, config_env['ohs_ssh_key']):
+                pass
         except Exception as e:
             success = False
             errors.append("Failed connecting to host [{0}] using username [{1}] and key file [{2}]: {3}".format(
@@ -209,13 +323,12 @@ def check_connectivity(config_env):
                 config_env['ohs_ssh_key'],
                 str(e)
             ))
-        ssh.close()
     wls_nodes = config_env['wls_nodes'].split("\n")
     for wls_node in wls_nodes:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        # the session is kept in the pool and reused by the rest of the run
         try:
-            ssh.connect(hostname=wls_node, username=config_env['wls_osuser'], key_filename=config_env['wls_ssh_key'])
+            with session_pool.session(config_env['wls_osuser'], wls_node, config_env['wls_ssh_key']):
+                pass
         except Exception as e:
             success = False
             errors.append("Failed connecting to host [{0}] using username [{1}] and key file [{2}]: {3}".format(
@@ -224,23 +337,271 @@ def check_connectivity(config_env):
                 config_env['wls_ssh_key'],
                 str(e)
             ))
-        ssh.close()
     return success, errors
 
 
-def transfer_data(transfer_type, use_delete, username, host, key_path, origin_path, destination_path, logger, retries, exclude_list=[]):
+def ssh_options(username, host, key_path):
+    # ssh command used by rsync (-e) and for remote commands - goes through the master connection to the host if there is one
+    if ssh_multiplexer is not None:
+        return ssh_multiplexer.ssh_options(username, host, key_path)
+    return f"ssh -o StrictHostKeyChecking=no -i {key_path}"
+
+
+def start_ssh_multiplexer(logger, config, config_env):
+    # open one ssh master connection per node of the environment, reused by all transfers
+    global ssh_multiplexer
+    control_persist = config.getint(OPTIONS, 'ssh_control_persist', fallback=0)
+    if control_persist == 0:
+        return
+    if ssh_multiplexer is None:
+        ssh_multiplexer = SshMultiplexer(logger, control_persist)
+    endpoints = [(config_env['wls_osuser'], node, config_env['wls_ssh_key']) for node in config_env['wls_nodes'].split("\n")]
+    if config_env['ohs_nodes']:
+        endpoints += [(config_env['ohs_osuser'], node, config_env['ohs_ssh_key']) for node in config_env['ohs_nodes'].split("\n")]
+    logger.writelog("info", f"Opening shared ssh connections to {len(set(endpoints))} endpoints")
+    ssh_multiplexer.start_all(endpoints)
+
+
+def stop_ssh_multiplexer():
+    global ssh_multiplexer
+    if ssh_multiplexer is not None:
+        ssh_multiplexer.stop()
+        ssh_multiplexer = None
+
+
+def start_process(args, **kwargs):
+    # subprocess.Popen, registered with the transfer job running in the current thread (if any) so that
+    # the job can be stopped. Registered processes run in their own process group, killed as a whole
+    job_name = getattr(job_context, 'name', None)
+    if job_name is None:
+        return subprocess.Popen(args, **kwargs)
+    process = subprocess.Popen(args, start_new_session=True, **kwargs)
+    with job_processes_lock:
+        entry = job_processes.get(job_name)
+        if entry is not None:
+            entry['processes'].append(process)
+        # no entry: a helper thread that outlived its job - the job is over, the process is not needed
+        cancelled = entry is None or entry['cancelled']
+    if cancelled:
+        kill_process(process)
+    return process
+
+
+def kill_process(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def in_job_context(function):
+    # wrap a function that a transfer job runs in a helper thread (e.g. building a manifest while rsync copies),
+    # so that the processes it starts are registered with the job and stopped with it
+    job_name = getattr(job_context, 'name', None)
+
+    def run_in_job(*args, **kwargs):
+        job_context.name = job_name
+        try:
+            return function(*args, **kwargs)
+        finally:
+            job_context.name = None
+    return run_in_job
+
+
+def job_cancelled():
+    # True if the transfer job running in the current thread was cancelled or, for a helper thread, has ended
+    job_name = getattr(job_context, 'name', None)
+    if job_name is None:
+        return False
+    with job_processes_lock:
+        entry = job_processes.get(job_name)
+        return entry is None or entry['cancelled']
+
+
+def cancel_job_processes(job):
+    # stop a running transfer job: kill its processes and any process it starts from now on
+    with job_processes_lock:
+        entry = job_processes.get(job['name'])
+        if entry is None:
+            return
+        entry['cancelled'] = True
+        processes = list(entry['processes'])
+    for process in processes:
+        if process.poll() is None:
+            kill_process(process)
+
+
+def tracked_worker(worker):
+    # transfer job worker whose processes are registered under the job name while the job runs
+    def run_tracked(job):
+        job_context.name = job['name']
+        with job_processes_lock:
+            job_processes[job['name']] = {"cancelled": False, "processes": []}
+        try:
+            return worker(job)
+        finally:
+            job_context.name = None
+            # helper threads can outlive the job (a source manifest not needed after a failed copy)
+            cancel_job_processes(job)
+            with job_processes_lock:
+                job_processes.pop(job['name'], None)
+    return run_tracked
+
+
+def run_remote_command(username, host, key_path, command, input_data=None):
+    ssh_cmd = shlex.split(ssh_options(username, host, key_path)) + [f"{username}@{host}", command]
+    run = start_process(ssh_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = run.communicate(input_data.encode() if input_data is not None else None)
+    return run.returncode, stdout.decode(errors="replace"), stderr.decode(errors="replace")
+
+
+def run_rsync(rsync_cmd, logger, bandwidth_governor=None, job_name=None, transferred=None, metrics=None, host=None):
+    # run an rsync command with its output appended to the log file - returns the rsync return code.
+    # when a bandwidth governor is given, the command gets a --bwlimit share of the bandwidth budget.
+    # when a transferred list is given, the files reported with --out-format="%i %n%L" are added to it.
+    # when a metrics dict is given, the --stats counters and the rsync time are added to it.
+    # --info=progress2 lines update the transfer progress instead of being logged
+    rsync_args = shlex.split(rsync_cmd)
+    # run_jobs() clears the global when the run ends
+    progress = transfer_progress
+    bwlimit = bandwidth_governor.acquire(job_name, job_cancelled) if bandwidth_governor is not None else 0
+    if bwlimit:
+        rsync_args.insert(1, f"--bwlimit={bwlimit}")
+    start = time.time()
+    stats = {}
+    try:
+        with open(logger.log_file, "a+") as log:
+            run = start_process(rsync_args, stdout=subprocess.PIPE, stderr=log, universal_newlines=True, errors="replace")
+            for line in run.stdout:
+                if progress is not None and progress.update(job_name, host, line):
+                    continue
+                log.write(line)
+                stats.update(parse_rsync_stats(line))
+                if transferred is not None:
+                    match = TRANSFERRED_FILE_PATTERN.match(line.rstrip("\n"))
+                    if match:
+                        transferred.append(match.group(1))
+            run.wait()
+    finally:
+        if progress is not None:
+            progress.finish(job_name)
+        if bandwidth_governor is not None:
+            bandwidth_governor.release(job_name, stats.get('bytes_sent', 0) + stats.get('bytes_received', 0), time.time() - start)
+        if metrics is not None:
+            add_rsync_stats(metrics, stats)
+            metrics['transfer_seconds'] = round(metrics['transfer_seconds'] + time.time() - start, 3)
+    return run.returncode
+
+
+def destination_is_empty(transfer_type, username, host, key_path, destination_path):
+    # True if the destination directory does not exist or has no entries
+    if transfer_type == 'pull':
+        return not os.path.isdir(destination_path) or not any(os.scandir(destination_path))
+    returncode, output, error = run_remote_command(username, host, key_path, f"ls -A {shlex.quote(destination_path)} 2>/dev/null | head -1")
+    return returncode == 0 and not output.strip()
+
+
+def stream_copy(transfer_type, username, host, key_path, origin_path, destination_path, exclude_list, logger, compression="none"):
+    # copy a whole directory as one tar stream over a single ssh channel - much faster than rsync
+    # for the first copy of trees with many small files. rsync exclude patterns are translated to tar ones
+    tar_excludes = []
+    for item in exclude_list:
+        if not item:
+            continue
+        item = item.rstrip("/")
+        # rsync patterns starting with / are anchored to the transfer root, which is "." in the tar
+        tar_excludes.append(shlex.quote(f"--exclude=.{item}" if item.startswith("/") else f"--exclude={item}"))
+    compress, decompress = {
+        "none": ("cat", "cat"),
+        "gzip": ("gzip -c -1", "gzip -dc"),
+        "zstd": ("zstd -c -q -T0", "zstd -dc -q")
+    }[compression]
+    pack = f"tar -C {shlex.quote(origin_path)} {' '.join(tar_excludes)} -cf - . | {compress}"
+    unpack = f"mkdir -p {shlex.quote(destination_path)} && {{ {decompress} | tar -C {shlex.quote(destination_path)} -xpf - ; }}"
+    ssh_cmd = f"{ssh_options(username, host, key_path)} {username}@{host}"
+    if transfer_type == 'pull':
+        remote_cmd = shlex.quote(f"bash -c {shlex.quote('set -o pipefail; ' + pack)}")
+        pipeline = f"{ssh_cmd} {remote_cmd} | {{ {unpack} ; }}"
+    else:
+        remote_cmd = shlex.quote(f"bash -c {shlex.quote('set -o pipefail; ' + unpack)}")
+        pipeline = f"{pack} | {ssh_cmd} {remote_cmd}"
+    logger.writelog("debug", f"stream copy pipeline: {pipeline}")
+    with open(logger.log_file, "a+") as log:
+        try:
+            run = start_process(["bash", "-c", f"set -o pipefail; {pipeline}"], stdout=log, stderr=log)
+            run.wait()
+        except Exception as e:
+            return False, f"stream copy encountered exception: {str(e)}"
+    if run.returncode != 0:
+        return False, f"stream copy exited with return code {run.returncode}"
+    return True, ""
+
+
+def build_manifest(remote, username, host, key_path, root, exclude_list, workers, paths=None, known=None, hashes=True):
+    # manifest of a local directory or of a directory on a remote host - hashes are computed in parallel where the data is
+    if not remote:
+        return Manifest.from_local(root, exclude_list, workers, paths, known, hash_files=hashes)
+    if paths is None and hashes and exclude_list:
+        # the remote command cannot apply the rsync exclude rules: the tree is listed first (no file is read)
+        # and only the paths left after the excludes are hashed
+        paths = sorted(build_manifest(remote, username, host, key_path, root, exclude_list, workers, hashes=False).entries)
+    if paths is not None and len(paths) == 0:
+        return Manifest()
+    command = Manifest.remote_command(root, workers, partial=paths is not None, hashes=hashes)
+    returncode, output, error = run_remote_command(username, host, key_path, command,
+                                                   input_data="\n".join(paths) if paths is not None else None)
+    if HASHES_MARKER not in output:
+        raise Exception(f"Failed building manifest of [{root}] on host [{host}] - return code {returncode}: {error}")
+    return Manifest.from_remote_output(output, exclude_list)
+
+
+def source_fingerprint(job, workers, ignore_volatile=False, staging_index=None):
+    # fingerprint of the job source listing (no file is read) - used to decide if a job can be resumed
+    # and, ignoring the files expected to change while the domain runs, if a lifecycle cycle must transfer it.
+    # The staging tree pushed is not listed when the staging index knows when its contents last changed
+    if job['transfer_type'] == 'push' and staging_index is not None:
+        tree = staging_index.tree(os.path.normpath(job['origin_path']))
+        if tree is not None and tree['changed'] is not None:
+            return f"staging_index:{tree['changed']}"
+    manifest = build_manifest(job['transfer_type'] in ['pull', 'direct'], job['username'], job['host'], job['key_path'],
+                              job['origin_path'], [item for item in job['exclude_list'] if item], workers, hashes=False)
+    if ignore_volatile:
+        manifest = Manifest({path: entry for path, entry in manifest.entries.items() if not is_volatile(path)})
+    return manifest.fingerprint()
+
+
+def transfer_data(transfer_type, use_delete, username, host, key_path, origin_path, destination_path, logger, retries, exclude_list=[], 
+                  show_animation=True, verify_method="rsync", manifest_workers=4, staging_index=None, job=None, link_dest=None,
+                  bandwidth_governor=None, compression="-z", initial_copy_mode="rsync", stream_compression="none",
+                  changed_paths=None, verify="full"):
     # set up animation thread 
     animation_play = threading.Event()
     stop_animation = False
-    animation = threading.Thread(target=animate, args=(animation_play, lambda: stop_animation))
+    job_name = job['name'] if job is not None else host
+    animation = threading.Thread(target=animate, args=(animation_play, lambda: stop_animation, job_name))
     animation.daemon = True
-    # start displaying animation during rsync process
-    animation.start()
+    # start displaying animation during rsync process - not shown when transfers run concurrently
+    if show_animation:
+        animation.start()
     animation_play.set()
+    def newline():
+        if show_animation:
+            print("")
     delete = "--delete" if use_delete else ""
+    # files identical to the ones in link_dest are hard linked instead of transferred
+    link_dest = f"--link-dest={link_dest}" if link_dest else ""
+    manifest_excludes = [item for item in exclude_list if item] + [f"{PARTIAL_DIR}/"]
     exclude_list = " ".join([f'--exclude "{item}"' for item in exclude_list if item])
     username = username
     host = host
+    # the staging side of the transfer - its contents are tracked in the staging index
+    local_root = os.path.normpath(destination_path if transfer_type == 'pull' else origin_path)
+    known = None
+    if staging_index is not None:
+        try:
+            known = staging_index.known(local_root)
+        except Exception as e:
+            logger.writelog("warn", f"Could not read staging index for [{local_root}]: {str(e)}")
     if not origin_path.endswith("/"):
         origin_path += "/"
     if not destination_path.endswith("/"):
@@ -251,46 +612,175 @@ def transfer_data(transfer_type, use_delete, username, host, key_path, origin_pa
     else:
         origin = origin_path
         destination = f"{username}@{host}:{destination_path}"      
-    rsync_cmd = f'rsync -e "ssh -o StrictHostKeyChecking=no -i {key_path}" -avz {delete} --stats --modify-window=1 {exclude_list} {origin} {destination}'
+    # with a list of changed paths, only those paths are copied and verified instead of the whole tree
+    if changed_paths is not None:
+        now = time.strftime("%Y_%m_%d_%H_%M_%S")
+        changes_file = f"{BASEDIR}/log/replication_changes_{now}_{host}_{threading.get_ident()}.log"
+        with open(changes_file, "w") as f:
+            f.write("\n".join(changed_paths))
+    # sample verification compares the listings of both trees, but only checksums the files copied in this
+    # transfer and a seeded random sample of the rest. Transfers of changed paths are always verified in full
+    sample_fraction = float(verify.split(":", 1)[1]) if verify.startswith("sample:") and changed_paths is None else None
+    manifest_verify = verify_method == "manifest" or sample_fraction is not None
+    transferred = [] if sample_fraction is not None else None
+    out_format = '--out-format="%i %n%L"' if sample_fraction is not None else ""
+    if manifest_verify:
+        # listings (hashes=False) must not take digests from the staging index, the remote side has none
+        build_source_manifest = lambda paths=None, hashes=True: build_manifest(transfer_type == 'pull', username, host, key_path, origin_path,
+                                                                               manifest_excludes, manifest_workers, paths,
+                                                                               known if hashes else None, hashes)
+        build_target_manifest = lambda paths=None, hashes=True: build_manifest(transfer_type == 'push', username, host, key_path, destination_path,
+                                                                               manifest_excludes, manifest_workers, paths,
+                                                                               known if hashes else None, hashes)
+    # in manifest mode the source manifest is built once, while the data is being copied
+    if verify_method == "manifest" and sample_fraction is None:
+        manifest_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        if changed_paths is None:
+            source_manifest_future = manifest_executor.submit(in_job_context(build_source_manifest))
+        manifest_executor.shutdown(wait=False)
+    if changed_paths is None:
+        rsync_cmd = f'rsync -e "{ssh_options(username, host, key_path)}" -av {compression} {delete} --stats --info=progress2 {out_format} --modify-window=1 --partial-dir={PARTIAL_DIR} {link_dest} {exclude_list} {origin} {destination}'
+    else:
+        # -r must be explicit with --files-from - directories in the list are new and copied recursively.
+        # paths reported by the change agent can be deleted before rsync reads them - they are skipped
+        rsync_cmd = f'rsync -e "{ssh_options(username, host, key_path)}" -avr {compression} --stats --info=progress2 --modify-window=1 --partial-dir={PARTIAL_DIR} {link_dest} --ignore-missing-args --files-from={changes_file} {exclude_list} {origin} {destination}'
     logger.writelog("debug", f"rsync command: {rsync_cmd}")
     logger.writelog("debug", f"rsync subprocess cmd:\n{shlex.split(rsync_cmd)}")
-    with open(logger.log_file, "a+") as log:
+    # rsync --stats counters, rsync time and retries of the job, kept in the run report and the transfer history
+    metrics = {"transfer_seconds": 0, "retries": 0}
+    if job is not None:
+        job['metrics'] = metrics
+    # the first copy to an empty destination can be streamed - it is verified exactly like an rsync copy
+    streamed = False
+    if initial_copy_mode == "stream" and changed_paths is None:
+        if bandwidth_governor is not None and bandwidth_governor.budget():
+            logger.writelog("debug", "Bandwidth limit in effect - initial copy not streamed")
+        elif destination_is_empty(transfer_type, username, host, key_path, destination_path):
+            logger.writelog("info", "Destination is empty - streaming initial copy")
+            streamed, reason = stream_copy(transfer_type, username, host, key_path, origin_path, destination_path,
+                                           manifest_excludes[:-1], logger, stream_compression)
+            if not streamed:
+                logger.writelog("warn", f"Streaming initial copy failed - copying with rsync: {reason}")
+            # the stream has no transfer statistics - its time is not comparable with rsync
+            metrics['streamed'] = streamed
+    if changed_paths is not None and not changed_paths:
+        logger.writelog("info", "No changes to transfer")
+    elif not streamed:
         try:
-            run = subprocess.Popen(shlex.split(rsync_cmd), stdout=log, stderr=log)
-            run.communicate()
+            returncode = run_rsync(rsync_cmd, logger, bandwidth_governor, job_name, transferred, metrics, host=host)
         except Exception as e:
             return False, f"rsync command encountered exception: {str(e)}"
-    if run.returncode != 0:
-        return False, "rsync command exited with non-zero return code"
+        # with changed paths, return code 24 means some of them vanished during the copy - the verification decides
+        if returncode != 0 and not (changed_paths is not None and returncode == 24):
+            return False, "rsync command exited with non-zero return code"
     animation_play.clear()
-    print("")
+    newline()
     logger.writelog("info", "Data transferred - validating")
     animation_play.set()
-    rsync_diff_cmd = f'rsync -e "ssh -o StrictHostKeyChecking=no -i {key_path}" -niaHc --no-times {exclude_list} {origin} {destination} --modify-window=1'
-    logger.writelog("debug", f"rsync diff command: {rsync_diff_cmd}")
-    logger.writelog("debug", f"rsync diff subprocess cmd:\n{shlex.split(rsync_diff_cmd)}")
-    run = subprocess.Popen(shlex.split(rsync_diff_cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    pending_files, err = run.communicate()
-    if run.returncode != 0:
+    rsync_diff_cmd = f'rsync -e "{ssh_options(username, host, key_path)}" -niaHc --no-times {exclude_list} {origin} {destination} --modify-window=1'
+    if changed_paths is not None:
+        rsync_diff_cmd = f'rsync -e "{ssh_options(username, host, key_path)}" -niaHcr --no-times --ignore-missing-args --files-from={changes_file} {exclude_list} {origin} {destination} --modify-window=1'
+    if sample_fraction is not None:
+        try:
+            source_manifest = build_source_manifest(hashes=False)
+            target_manifest = build_target_manifest(hashes=False)
+            files = sorted(path for path, entry in source_manifest.entries.items() if entry[0] == "f" and not is_volatile(path))
+            # a streamed copy wrote every file
+            copied = set(files) if streamed else set(transferred) & set(files)
+            unchanged = [path for path in files if path not in copied]
+            seed = random.SystemRandom().randrange(2 ** 32)
+            sampled = random.Random(seed).sample(unchanged, math.ceil(len(unchanged) * sample_fraction))
+            verify_paths = sorted(copied | set(sampled))
+            source_manifest.update(build_source_manifest(verify_paths), verify_paths)
+            target_manifest.update(build_target_manifest(verify_paths), verify_paths)
+        except Exception as e:
+            stop_animation = True
+            return False, f"sample verification failed: {str(e)}"
+        verification = {
+            "mode": verify,
+            "seed": seed,
+            "files": len(files),
+            "copied": len(copied),
+            "sampled": len(sampled),
+            "checksummed": len(verify_paths),
+            "coverage": round(len(verify_paths) / len(files), 4) if files else 1.0
+        }
+        if job is not None:
+            job['verification'] = verification
+        logger.writelog("info", f"Sample verification: sizes and modification times of {len(files)} files compared, "
+                                f"{len(copied)} copied files and {len(sampled)} sampled files checksummed "
+                                f"(coverage {verification['coverage']:.1%}, seed {seed})")
+    elif verify_method == "manifest":
+        try:
+            if changed_paths is None:
+                source_manifest = source_manifest_future.result()
+                target_manifest = build_target_manifest()
+            else:
+                verify_paths = expand_paths(local_root, changed_paths, ExcludeFilter(manifest_excludes))
+                source_manifest = build_source_manifest(verify_paths)
+                target_manifest = build_target_manifest(verify_paths)
+        except Exception as e:
+            stop_animation = True
+            return False, f"manifest verification failed: {str(e)}"
+        logger.writelog("debug", f"Source manifest entries: {len(source_manifest)} - target manifest entries: {len(target_manifest)}")
+    else:
+        logger.writelog("debug", f"rsync diff command: {rsync_diff_cmd}")
+        logger.writelog("debug", f"rsync diff subprocess cmd:\n{shlex.split(rsync_diff_cmd)}")
+
+    def get_pending_files(paths=None):
+        # work out the list of files that differ between source and target
+        if manifest_verify:
+            # only the entries that were found different are hashed again on both sides
+            if paths is not None:
+                source_manifest.update(build_source_manifest(paths), paths)
+                target_manifest.update(build_target_manifest(paths), paths)
+            # when sampling, files not checksummed are only checked by size and modification time
+            return source_manifest.diff(target_manifest, ignore=is_volatile,
+                                        modify_window=1 if sample_fraction is not None else None)
+        run = start_process(shlex.split(rsync_diff_cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        pending_files, err = run.communicate()
+        if run.returncode != 0:
+            raise Exception(f"rsync diff command exited with non-zero return code: {err}")
+        pending_files = pending_files.decode().splitlines()
+        return [x.split()[1] for x in pending_files if x and not is_volatile(x.split()[1])]
+
+    def update_staging_index():
+        # record the staging side contents without walking it again: a push does not modify it, and a pull
+        # stores the manifest when one was built for the verification or else the rsync counters
+        if changed_paths is not None and os.path.exists(changes_file):
+            os.remove(changes_file)
+        if staging_index is None:
+            return
+        try:
+            if manifest_verify and changed_paths is None:
+                staging_index.update(local_root, target_manifest if transfer_type == 'pull' else source_manifest, job)
+            elif transfer_type == 'pull':
+                changed = streamed or bool(changed_paths) or metrics['retries'] > 0 or \
+                    any(metrics.get(name, 0) for name in ['files_transferred', 'created_files', 'deleted_files'])
+                staging_index.update_tree(local_root, job, changed, None if changed_paths else metrics.get('total_size'))
+            staging_index.record_transfer(local_root, job)
+        except Exception as e:
+            logger.writelog("warn", f"Could not update staging index for [{local_root}]: {str(e)}")
+
+    try:
+        pending_files = get_pending_files()
+    except Exception as e:
         stop_animation = True
-        return False, f"rsync diff command exited with non-zero return code: {err}"
-    
-    pending_files = pending_files.decode().splitlines()
-    pending_files = [x.split()[1] for x in pending_files if x and "log" not in x and "DAT" not in x]
+        return False, str(e)
     animation_play.clear()
-    print("")
+    newline()
     logger.writelog("info", f"Number of differences found: {len(pending_files)}")
     if pending_files:
         still_diff = True
         if int(retries) > 0:
             retry_count = 0
             animation_play.clear()
-            print("")
+            newline()
             logger.writelog("info", "Attempting to resync differences")
             animation_play.set()
             now = time.strftime("%Y_%m_%d_%H_%M_%S")
-            diff_file = f"{BASEDIR}/log/replication_diffs_{now}.log"
-            rsync_pending_cmd = f'rsync -e "ssh -o StrictHostKeyChecking=no -i {key_path}" --stats --modify-window=1 --files-from={diff_file} {origin} {destination}'
+            diff_file = f"{BASEDIR}/log/replication_diffs_{now}_{host}_{threading.get_ident()}.log"
+            rsync_pending_cmd = f'rsync -e "{ssh_options(username, host, key_path)}" -a {compression} --stats --info=progress2 --modify-window=1 --partial-dir={PARTIAL_DIR} {link_dest} --ignore-missing-args --files-from={diff_file} {origin} {destination}'
             logger.writelog("debug", f"rsync pending command: {rsync_pending_cmd}")
             logger.writelog("debug", f"rsync pending subprocess cmd:\n{shlex.split(rsync_pending_cmd)}")
             while still_diff:
@@ -300,33 +790,31 @@ def transfer_data(transfer_type, use_delete, username, host, key_path, origin_pa
                     return False, f"Max rsync retries [{retries}] exhausted and there are still differences between source and target\n" \
                                   f"List of differences can be found in {diff_file}"
                 animation_play.clear()
-                print("")
+                newline()
                 logger.writelog("info", f"Attempt #{retry_count}")
+                metrics['retries'] = retry_count
                 stop_animation = False
                 animation_play.set()
                 with open(diff_file, "w") as f:
                     f.write("\n".join(pending_files))
                 try:
-                    # run = subprocess.Popen(shlex.split(rsync_pending_cmd), stdout=logger.log_file, stderr=logger.log_file)
-                    run = subprocess.Popen(shlex.split(rsync_diff_cmd))
-                    run.communicate()
+                    returncode = run_rsync(rsync_pending_cmd, logger, bandwidth_governor, job_name, metrics=metrics, host=host)
                 except Exception as e:
                     stop_animation = True
                     return False, f"rsync pending command encountered exception: {str(e)}"
-                if run.returncode != 0:
+                # return code 24 means some source files vanished before they could be transferred
+                if returncode not in [0, 24]:
                     stop_animation = True
                     return False, f"rsync pending command exited with non-zero return code"
                 animation_play.clear()
-                print("")
+                newline()
                 logger.writelog("info", "Checking if pending items have been synced")
                 animation_play.set()
-                run = subprocess.Popen(shlex.split(rsync_diff_cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                pending_files, err = run.communicate()
-                if run.returncode != 0:
+                try:
+                    pending_files = get_pending_files(pending_files)
+                except Exception as e:
                     stop_animation = True
-                    return False, f"rsync diff command exited with non-zero return code: {err}"
-                pending_files = pending_files.decode().splitlines()
-                pending_files = [x.split()[1] for x in pending_files if x and "log" not in x and "DAT" not in x]
+                    return False, str(e)
                 if pending_files:
                     stop_animation = True
                     logger.writelog("warn", "Differences remain")
@@ -338,118 +826,780 @@ def transfer_data(transfer_type, use_delete, username, host, key_path, origin_pa
                     still_diff = False
         else:
             stop_animation = True
-            print("")
+            newline()
             return False, "There are differences between source and target"
     else:
         stop_animation = True
-        print("")
+        newline()
         logger.writelog("info", "Source and target directories are in sync")
+        update_staging_index()
         return True, ""
-    print("")
+    newline()
     stop_animation = True
+    update_staging_index()
     return True, ""
 
 
-def pull(logger, config, data, instance):
-    pull_successful = True
-    # pull wls data from primary
+def relay_transfer(logger, job, relay_key, manifest_workers, staging_index=None):
+    # copy the job destination from the relay node (already pushed to) to the job host, inside the standby network,
+    # and verify the result from the bastion against the staging copy
+    relay_excludes = " ".join([f"--exclude {shlex.quote(item)}" for item in job['exclude_list'] if item])
+    delete = "--delete" if job['use_delete'] else ""
+    destination_path = job['destination_path'].rstrip("/") + "/"
+    relay_ssh = shlex.quote(f"ssh -o StrictHostKeyChecking=no -i {relay_key}")
+    relay_target = shlex.quote(f"{job['username']}@{job['host']}:{destination_path}")
+    relay_cmd = f"rsync -e {relay_ssh} -a {delete} --stats --partial-dir={PARTIAL_DIR} {relay_excludes} " \
+                f"{shlex.quote(destination_path)} {relay_target}"
+    logger.writelog("debug", f"Relay command on host [{job['relay_from']}]: {relay_cmd}")
+    returncode, output, error = run_remote_command(job['username'], job['relay_from'], job['key_path'], relay_cmd)
+    with open(logger.log_file, "a+") as log:
+        log.write(output + error)
+    if returncode not in [0, 24]:
+        return False, f"relay rsync on host [{job['relay_from']}] exited with return code {returncode}: {error.strip()}"
+    logger.writelog("info", f"Relayed [{job['name']}] from host [{job['relay_from']}] - validating from staging copy")
+    manifest_excludes = [item for item in job['exclude_list'] if item] + [f"{PARTIAL_DIR}/"]
+    local_root = os.path.normpath(job['origin_path'])
+    try:
+        known = staging_index.known(local_root) if staging_index is not None else None
+        source_manifest = build_manifest(False, None, None, None, job['origin_path'], manifest_excludes, manifest_workers, known=known)
+        target_manifest = build_manifest(True, job['username'], job['host'], job['key_path'], job['destination_path'],
+                                         manifest_excludes, manifest_workers)
+    except Exception as e:
+        return False, f"relay verification failed: {str(e)}"
+    pending_files = source_manifest.diff(target_manifest, ignore=is_volatile)
+    if pending_files:
+        return False, f"{len(pending_files)} differences found between staging copy and relayed copy"
+    if staging_index is not None:
+        try:
+            staging_index.record_transfer(local_root, job)
+        except Exception as e:
+            logger.writelog("warn", f"Could not update staging index for [{local_root}]: {str(e)}")
+    return True, ""
+
+
+def chunk_workers(manifest_workers):
+    # processes that chunk archives in the bastion - chunking is CPU bound
+    return max(1, min(manifest_workers, os.cpu_count() or 1))
+
+
+def chunk_push(logger, job, chunk_index, manifest_workers, max_archive_size=0):
+    # send the archives of a push that are missing or different in the host as content-defined chunks: only the chunks
+    # that the chunk store of the host does not have are sent, and the archives are assembled in the host from its store,
+    # so that rsync then finds them up to date. Archives larger than max_archive_size (0 for no limit) are left to rsync.
+    # Returns the chunk transfer figures of the job
+    manifest_excludes = [item for item in job['exclude_list'] if item] + [f"{PARTIAL_DIR}/"]
+    source = Manifest.from_local(job['origin_path'], manifest_excludes, manifest_workers, hash_files=False)
+    target = build_manifest(True, job['username'], job['host'], job['key_path'], job['destination_path'],
+                            manifest_excludes, manifest_workers, hashes=False)
+    archives = [path for path in source.diff(target, modify_window=1) if source.entries[path][0] == "f" and is_archive(path)
+                and (not max_archive_size or source.entries[path][1] <= max_archive_size)]
+    figures = {"archives": len(archives), "assembled": 0, "chunks": 0, "chunks_sent": 0, "chunk_bytes_sent": 0}
+    if not archives:
+        return figures
+    chunked = chunk_index.recipes([os.path.join(job['origin_path'], path) for path in archives], chunk_workers(manifest_workers))
+    recipes = {path: chunked[os.path.join(job['origin_path'], path)] for path in archives}
+    digests = list(dict.fromkeys(digest for _, chunks in recipes.values() for digest, _, _ in chunks))
+    figures['chunks'] = len(digests)
+    returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'], store_command('missing'),
+                                                   input_data="\n".join(digests) + "\n")
+    if STORE_MARKER not in output:
+        raise Exception(f"could not read chunk store on host [{job['host']}] - return code {returncode}: {error.strip()}")
+    missing = set(output.partition(STORE_MARKER)[0].split())
+    logger.writelog("info", f"{len(archives)} archives of [{job['name']}] changed: {len(digests)} chunks, "
+                            f"{len(missing)} missing in host [{job['host']}]")
+    # the missing chunks go in a single tar stream, read from the staged archives
+    ssh_cmd = shlex.split(ssh_options(job['username'], job['host'], job['key_path'])) + [f"{job['username']}@{job['host']}", store_command('receive')]
+    with open(logger.log_file, "a+") as log:
+        run = start_process(ssh_cmd, stdin=subprocess.PIPE, stdout=log, stderr=log)
+        try:
+            with tarfile.open(fileobj=run.stdin, mode="w|") as tar:
+                for path, (_, chunks) in recipes.items():
+                    with open(os.path.join(job['origin_path'], path), "rb") as f:
+                        for digest, offset, length in chunks:
+                            if digest not in missing:
+                                continue
+                            missing.discard(digest)
+                            f.seek(offset)
+                            info = tarfile.TarInfo(f"{digest[:2]}/{digest}")
+                            info.size = length
+                            info.mtime = time.time()
+                            tar.addfile(info, io.BytesIO(f.read(length)))
+                            figures['chunks_sent'] += 1
+                            figures['chunk_bytes_sent'] += length
+        finally:
+            run.stdin.close()
+            run.wait()
+    if run.returncode != 0:
+        raise Exception(f"sending chunks to host [{job['host']}] exited with return code {run.returncode}")
+    lines = []
+    for path, (file_digest, chunks) in recipes.items():
+        stat = os.stat(os.path.join(job['origin_path'], path))
+        lines.append(f"{path}\t{stat.st_mode & 0o7777:o}\t{stat.st_mtime:.9f}\t{file_digest}\t{' '.join(digest for digest, _, _ in chunks)}")
+    returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'],
+                                                   store_command('assemble', job['destination_path']), input_data="\n".join(lines) + "\n")
+    assembled = [line[len("ASSEMBLED "):] for line in output.splitlines() if line.startswith("ASSEMBLED ")]
+    figures['assembled'] = len(assembled)
+    chunk_index.set_seeded(job['host'], {os.path.join(job['destination_path'], path): recipes[path][0] for path in assembled})
+    logger.writelog("info", f"Assembled {len(assembled)} of {len(archives)} archives of [{job['name']}] in host [{job['host']}] "
+                            f"from {figures['chunks_sent']} chunks sent ({figures['chunk_bytes_sent']} bytes)")
+    if returncode != 0:
+        logger.writelog("warn", f"{len(archives) - len(assembled)} archives of [{job['name']}] could not be assembled in host "
+                                f"[{job['host']}] - they are transferred with rsync: {error.strip()}")
+    return figures
+
+
+def chunk_seed(logger, job, chunk_index, manifest_workers, max_archive_size=0, seed_budget=0):
+    # after a push, store in the chunk store of the host the chunks of the archives it already has, cut from its own
+    # copy - no data is sent. The next time those archives change, only their new chunks are sent. Archives that are
+    # not chunked yet are chunked up to seed_budget bytes (0 for no limit) per call; the rest are seeded by later pushes
+    manifest_excludes = [item for item in job['exclude_list'] if item] + [f"{PARTIAL_DIR}/"]
+    source = Manifest.from_local(job['origin_path'], manifest_excludes, manifest_workers, hash_files=False)
+    seeded = chunk_index.seeded(job['host'])
+    paths = []
+    budget = seed_budget
+    deferred = 0
+    for path, entry in sorted(source.entries.items()):
+        if entry[0] != "f" or not is_archive(path) or (max_archive_size and entry[1] > max_archive_size):
+            continue
+        if chunk_index.cached(os.path.join(job['origin_path'], path)) is None and seed_budget:
+            if entry[1] > budget:
+                deferred += 1
+                continue
+            budget -= entry[1]
+        paths.append(path)
+    recipes = chunk_index.recipes([os.path.join(job['origin_path'], path) for path in paths], chunk_workers(manifest_workers))
+    files = {}
+    lines = []
+    for path in paths:
+        file_digest, chunks = recipes[os.path.join(job['origin_path'], path)]
+        destination = os.path.join(job['destination_path'], path)
+        if seeded.get(destination) == file_digest:
+            continue
+        files[destination] = file_digest
+        lines += [f"{path}\t{digest}\t{offset}\t{length}" for digest, offset, length in chunks]
+    if deferred:
+        logger.writelog("info", f"{deferred} archives of [{job['name']}] will be chunked and stored in host [{job['host']}] by the next pushes")
+    if not files:
+        return
+    start = time.time()
+    returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'],
+                                                   store_command('seed', job['destination_path']), input_data="\n".join(lines) + "\n")
+    if returncode != 0:
+        logger.writelog("warn", f"Could not store the chunks of all the archives of [{job['name']}] in host [{job['host']}]: {error.strip()}")
+        return
+    chunk_index.set_seeded(job['host'], files)
+    logger.writelog("info", f"Stored chunks of {len(files)} archives of [{job['name']}] in the chunk store of host [{job['host']}] "
+                            f"in {time.time() - start:.1f} seconds")
+
+
+def destination_endpoint(job):
+    # user, host and key (in the bastion) of the host that receives the data of a push or direct job
+    if job['transfer_type'] == 'direct':
+        return job['target_username'], job['target_host'], job['target_key_path']
+    return job['username'], job['host'], job['key_path']
+
+
+def run_direct_rsync(logger, job, rsync_cmd, metrics, bandwidth_governor=None, input_data=None):
+    # run an rsync command in the primary node of a direct job - returns (return code, error output)
+    bwlimit = bandwidth_governor.acquire(job['name'], job_cancelled) if bandwidth_governor is not None else 0
+    if bwlimit:
+        rsync_cmd = rsync_cmd.replace("rsync ", f"rsync --bwlimit={bwlimit} ", 1)
+    logger.writelog("debug", f"Direct command on host [{job['host']}]: {rsync_cmd}")
+    start = time.time()
+    stats = {}
+    try:
+        returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'], rsync_cmd, input_data=input_data)
+        with open(logger.log_file, "a+") as log:
+            log.write(output + error)
+        stats = parse_rsync_stats(output)
+    finally:
+        if bandwidth_governor is not None:
+            bandwidth_governor.release(job['name'], stats.get('bytes_sent', 0) + stats.get('bytes_received', 0), time.time() - start)
+        add_rsync_stats(metrics, stats)
+        metrics['transfer_seconds'] = round(metrics['transfer_seconds'] + time.time() - start, 3)
+    return returncode, error
+
+
+def direct_transfer(logger, job, direct_key, audit_dir, manifest_workers, compression="-z", bandwidth_governor=None, origin_path=None):
+    # copy the job source (or origin_path, a snapshot of it) from the primary node straight to the standby node: rsync runs
+    # in the primary node and the data does not go through the bastion. The result is verified from the bastion with manifests
+    # built in both nodes, the differences found are copied again, and the source manifest is kept in audit_dir as record
+    excludes = " ".join([f"--exclude {shlex.quote(item)}" for item in job['exclude_list'] if item])
+    delete = "--delete" if job['use_delete'] else ""
+    origin_path = (origin_path or job['origin_path']).rstrip("/") + "/"
+    destination_path = job['destination_path'].rstrip("/") + "/"
+    direct_ssh = shlex.quote(f"ssh -o StrictHostKeyChecking=no -i {direct_key}")
+    direct_target = shlex.quote(f"{job['target_username']}@{job['target_host']}:{destination_path}")
+    direct_cmd = f"rsync -e {direct_ssh} -a {delete} {compression} --stats --partial-dir={PARTIAL_DIR} {excludes} " \
+                 f"{shlex.quote(origin_path)} {direct_target}"
+    # rsync --stats counters, rsync time and retries of the job, kept in the run report and the transfer history
+    metrics = {"transfer_seconds": 0, "retries": 0}
+    job['metrics'] = metrics
+    try:
+        returncode, error = run_direct_rsync(logger, job, direct_cmd, metrics, bandwidth_governor)
+    except Exception as e:
+        return False, f"direct rsync on host [{job['host']}] encountered exception: {str(e)}"
+    # 24: some source files vanished during the copy - the verification decides
+    if returncode not in [0, 24]:
+        return False, f"direct rsync on host [{job['host']}] exited with return code {returncode}: {error.strip()}"
+    logger.writelog("info", f"Copied [{job['name']}] from host [{job['host']}] to host [{job['target_host']}] - validating")
+    manifest_excludes = [item for item in job['exclude_list'] if item] + [f"{PARTIAL_DIR}/"]
+    target_username, target_host, target_key_path = destination_endpoint(job)
+    build_source_manifest = lambda paths=None: build_manifest(True, job['username'], job['host'], job['key_path'], origin_path,
+                                                              manifest_excludes, manifest_workers, paths)
+    build_target_manifest = lambda paths=None: build_manifest(True, target_username, target_host, target_key_path, job['destination_path'],
+                                                              manifest_excludes, manifest_workers, paths)
+    try:
+        # both manifests are built at the same time, each one in its own host
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            source_future = executor.submit(in_job_context(build_source_manifest))
+            target_future = executor.submit(in_job_context(build_target_manifest))
+            source_manifest = source_future.result()
+            target_manifest = target_future.result()
+    except Exception as e:
+        return False, f"direct transfer verification failed: {str(e)}"
+    pending_files = source_manifest.diff(target_manifest, ignore=is_volatile)
+    retry_count = 0
+    while pending_files:
+        retry_count += 1
+        if retry_count > int(job['retries']):
+            return False, f"{len(pending_files)} differences found between primary and standby copies after {job['retries']} retries"
+        logger.writelog("info", f"{len(pending_files)} differences found - copying them again, attempt #{retry_count}")
+        metrics['retries'] = retry_count
+        # -c: the differences can be files with the same size and modification time
+        pending_cmd = f"rsync -e {direct_ssh} -ac {compression} --stats --partial-dir={PARTIAL_DIR} --ignore-missing-args --files-from=- " \
+                      f"{shlex.quote(origin_path)} {direct_target}"
+        try:
+            returncode, error = run_direct_rsync(logger, job, pending_cmd, metrics, bandwidth_governor, input_data="\n".join(pending_files))
+            if returncode not in [0, 24]:
+                return False, f"direct rsync on host [{job['host']}] exited with return code {returncode}: {error.strip()}"
+            source_manifest.update(build_source_manifest(pending_files), pending_files)
+            target_manifest.update(build_target_manifest(pending_files), pending_files)
+        except Exception as e:
+            return False, f"direct transfer verification failed: {str(e)}"
+        pending_files = source_manifest.diff(target_manifest, ignore=is_volatile)
+    # audit copy: what was transferred, from where and to where - the data itself is not staged
+    audit_path = f"{audit_dir}/{re.sub(r'[^A-Za-z0-9_.-]', '_', job['name'])}.json"
+    try:
+        os.makedirs(audit_dir, exist_ok=True)
+        with open(f"{audit_path}.tmp", "w") as f:
+            json.dump({"name": job['name'], "time": time.time(),
+                       "source": f"{job['username']}@{job['host']}:{job['origin_path']}",
+                       "target": f"{job['target_username']}@{job['target_host']}:{job['destination_path']}",
+                       "staging_path": job['staging_path'], "metrics": metrics,
+                       "manifest": source_manifest.entries}, f)
+        os.replace(f"{audit_path}.tmp", audit_path)
+    except Exception as e:
+        logger.writelog("warn", f"Could not write audit manifest [{audit_path}]: {str(e)}")
+    return True, ""
+
+
+def new_job(config, name, description, transfer_type, instance, data_type, username, host, key_path,
+            origin_path, destination_path, exclude_option=None, remote_dirs=None, link_dest=None, depends_on=None):
+    # a transfer job is a single rsync of one data type between the staging area and one node
+    return {
+        "name": name,
+        "description": description,
+        "transfer_type": transfer_type,
+        "instance": instance,
+        "data_type": data_type,
+        "username": username,
+        "host": host,
+        "key_path": key_path,
+        "origin_path": origin_path,
+        "destination_path": destination_path,
+        "use_delete": config.getboolean(OPTIONS, 'delete'),
+        "retries": config[OPTIONS]['rsync_retries'],
+        "exclude_list": config[OPTIONS][exclude_option].split("\n") if exclude_option else [],
+        "remote_dirs": remote_dirs if remote_dirs else [],
+        "link_dest": link_dest,
+        "depends_on": depends_on if depends_on else []
+    }
+
+
+def prepare_remote_dirs(logger, jobs, max_workers=8):
+    # create the destination directories of all the push and direct jobs before the transfers start: one remote
+    # command per host, run on all the hosts at the same time. Returns a report per user@host
+    hosts = {}
+    for job in jobs:
+        if job['transfer_type'] not in ['push', 'direct']:
+            continue
+        directories = hosts.setdefault(destination_endpoint(job), [])
+        for directory in job['remote_dirs'] + [job['destination_path']]:
+            if directory not in directories:
+                directories.append(directory)
+    # prints the directories created, fails with the ones that could not be created
+    prepare_cmd = 'rc=0; for dir in "$@"; do if [ ! -d "$dir" ]; then ' \
+                  'if mkdir -p "$dir"; then echo "CREATED $dir"; else echo "FAILED $dir"; rc=1; fi; fi; done; exit $rc'
+
+    def prepare(endpoint):
+        username, host, key_path = endpoint
+        directories = hosts[endpoint]
+        entry = {"username": username, "directories": directories, "created": [], "success": False, "error": "", "elapsed": 0}
+        logger.writelog("debug", f"Preparing {len(directories)} destination directories on host [{host}]: {', '.join(directories)}")
+        start = time.time()
+        try:
+            returncode, output, error = run_remote_command(username, host, key_path,
+                                                           f"bash -c {shlex.quote(prepare_cmd)} hydr " +
+                                                           " ".join(shlex.quote(directory) for directory in directories))
+        except Exception as e:
+            returncode, output, error = -1, "", str(e)
+        entry['elapsed'] = time.time() - start
+        entry['created'] = [line[len("CREATED "):] for line in output.splitlines() if line.startswith("CREATED ")]
+        failed = [line[len("FAILED "):] for line in output.splitlines() if line.startswith("FAILED ")]
+        if returncode == 0:
+            entry['success'] = True
+        elif failed:
+            entry['error'] = f"Failed creating remote destination directories on host [{host}]: {', '.join(failed)}: {error.strip()}"
+        else:
+            entry['error'] = f"Failed connecting to host [{host}] to prepare remote destination directories: {error.strip()}"
+        return f"{username}@{host}", entry
+
+    report = {}
+    if not hosts:
+        return report
+    start = time.time()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(hosts))) as executor:
+        for endpoint, entry in executor.map(prepare, hosts):
+            report[endpoint] = entry
+    created = sum(len(entry['created']) for entry in report.values())
+    logger.writelog("info", f"Prepared destination directories on {len(report)} hosts in {time.time() - start:.1f} seconds - "
+                            f"{created} directories created")
+    for entry in report.values():
+        if not entry['success']:
+            logger.writelog("error", entry['error'])
+    return report
+
+
+def open_run_journal(logger, config):
+    journal_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{RUN_JOURNAL_FILE}"
+    try:
+        return RunJournal(journal_path)
+    except Exception as e:
+        logger.writelog("warn", f"Could not open run journal [{journal_path}] - run cannot be resumed: {str(e)}")
+        return None
+
+
+def open_transfer_history(logger, config):
+    history_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{TRANSFER_HISTORY_FILE}"
+    try:
+        return TransferHistory(history_path)
+    except Exception as e:
+        logger.writelog("warn", f"Could not open transfer history [{history_path}] - this run will not be recorded: {str(e)}")
+        return None
+
+
+def open_run_files(logger, config):
+    # run journal, transfer history and bandwidth governor of a run. When push fans out to several targets,
+    # push() opens them once and all the targets use them: the files are written through a single object each
+    return {
+        "journal": open_run_journal(logger, config),
+        "history": open_transfer_history(logger, config),
+        "bandwidth_governor": open_bandwidth_governor(logger, config)
+    }
+
+
+def open_staging_index(logger, config):
+    index_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{STAGING_INDEX_FILE}"
+    try:
+        return StagingIndex(index_path)
+    except Exception as e:
+        logger.writelog("warn", f"Could not open staging index [{index_path}] - transfers will not be indexed: {str(e)}")
+        return None
+
+
+def detect_changes(logger, job, state):
+    # ask the change agent on the source host which paths changed since the last successful pull - None if unknown
+    returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'],
+                                                   agent_command('changes', state, job['origin_path']), input_data=AGENT_SCRIPT)
+    if returncode != 0:
+        logger.writelog("warn", f"Change agent failed on host [{job['host']}] - pulling [{job['name']}] in full: {error.strip()}")
+        return None
+    try:
+        return ChangeSet.from_output(output)
+    except Exception as e:
+        logger.writelog("warn", f"Change agent failed on host [{job['host']}] - pulling [{job['name']}] in full: {str(e)}")
+        return None
+
+
+def commit_changes(logger, job, state):
+    # move the change agent marker forward, after a successful pull
+    returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'],
+                                                   agent_command('commit', state), input_data=AGENT_SCRIPT)
+    if returncode != 0:
+        logger.writelog("warn", f"Could not update change agent marker on host [{job['host']}] - the next pull of "
+                                f"[{job['name']}] will transfer the same changes again: {error.strip()}")
+
+
+def create_snapshot(logger, job, mode, hook=""):
+    # point-in-time snapshot of the job source, in the source host - returns (name, path of the source in the snapshot)
+    # or (None, None) if it could not be created
+    name = snapshot_name(job['host'], job['origin_path'])
+    command, input_data = snapshot_command('create', mode, name, job['origin_path'], hook)
+    start = time.time()
+    try:
+        returncode, output, error = run_remote_command(job['username'], job['host'], job['key_path'], command, input_data=input_data)
+    except Exception as e:
+        returncode, output, error = -1, "", str(e)
+    path = snapshot_path(output) if returncode == 0 else None
+    if path is None:
+        logger.writelog("warn", f"Could not create {mode} snapshot of [{job['origin_path']}] on host [{job['host']}] - "
+                                f"reading [{job['name']}] from the live directory: {error.strip()}")
+        return None, None
+    logger.writelog("info", f"Created {mode} snapshot [{name}] of [{job['origin_path']}] on host [{job['host']}] in "
+                            f"{time.time() - start:.1f} seconds - reading [{job['name']}] from [{path}]")
+    return name, path
+
+
+def release_snapshot(logger, job, mode, name, path, hook=""):
+    command, input_data = snapshot_command('release', mode, name, job['origin_path'], hook, path)
+    try:
+        returncode, _, error = run_remote_command(job['username'], job['host'], job['key_path'], command, input_data=input_data)
+    except Exception as e:
+        returncode, error = -1, str(e)
+    if returncode != 0:
+        logger.writelog("warn", f"Could not release {mode} snapshot [{name}] on host [{job['host']}] - remove it manually: {error.strip()}")
+    else:
+        logger.writelog("debug", f"Released {mode} snapshot [{name}] on host [{job['host']}]")
+
+
+def open_chunk_index(logger, config):
+    index_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{CHUNK_INDEX_FILE}"
+    try:
+        return ChunkIndex(index_path, config.getboolean(OPTIONS, 'chunk_zip_entries', fallback=True))
+    except Exception as e:
+        logger.writelog("warn", f"Could not open chunk index [{index_path}] - archives will be transferred with rsync: {str(e)}")
+        return None
+
+
+def open_bandwidth_governor(logger, config):
+    # bandwidth governor shared by all the transfers of a run - None if no bandwidth limit is configured
+    limit = config.getint(OPTIONS, 'bandwidth_limit', fallback=0)
+    windows = config.get(OPTIONS, 'bandwidth_windows', fallback='')
+    if limit == 0 and not windows.strip():
+        return None
+    try:
+        return BandwidthGovernor(logger, limit, windows)
+    except ValueError as e:
+        logger.writelog("warn", f"Invalid bandwidth windows - transfers will not be bandwidth limited: {str(e)}")
+        return None
+
+
+def open_compression_selector(logger, config):
+    # compression codec selector for compression = auto - None if the calibration cache cannot be used
+    level = config.get(OPTIONS, 'compression_level', fallback='')
+    try:
+        return CompressionSelector(logger, f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{COMPRESSION_CACHE_FILE}",
+                                   int(level) if level else None, start_process)
+    except Exception as e:
+        logger.writelog("warn", f"Could not set up compression calibration - using default compression: {str(e)}")
+        return None
+
+
+def run_jobs(logger, config, jobs, resume=False, results=None, target=None, report=None, run_files=None):
+    global transfer_progress
+    max_parallel = config.getint(OPTIONS, 'max_parallel_transfers', fallback=1)
+    max_per_host = config.getint(OPTIONS, 'max_transfers_per_host', fallback=1)
+    # the env file of a standby target can set its own transfer limits
+    if target is not None:
+        max_parallel = config.getint(target, 'max_parallel_transfers', fallback=max_parallel)
+        max_per_host = config.getint(target, 'max_transfers_per_host', fallback=max_per_host)
+    # when push fans out to several targets, the progress of all of them is shown and written by push()
+    own_progress = transfer_progress is None
+    # the console animation can only be shown when transfers run one at a time
+    engine = config.get(OPTIONS, 'engine', fallback='threads')
+    job_timeout = config.getint(OPTIONS, 'job_timeout', fallback=0)
+    # the supervised engine renders the progress of all the jobs in a single line instead
+    show_animation = max_parallel == 1 and engine != 'supervised' and own_progress
+    verify_method = config.get(OPTIONS, 'verify_method', fallback='rsync')
+    verify = config.get(OPTIONS, 'verify', fallback='full')
+    manifest_workers = config.getint(OPTIONS, 'manifest_workers', fallback=4)
+    staging_index = open_staging_index(logger, config)
+    relay_key = config.get(OPTIONS, 'relay_ssh_key', fallback='')
+    direct_key = config.get(OPTIONS, 'direct_ssh_key', fallback='')
+    direct_audit_dir = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{DIRECT_MANIFEST_DIR}"
+    if run_files is None:
+        run_files = open_run_files(logger, config)
+    journal = run_files['journal']
+    bandwidth_governor = run_files['bandwidth_governor']
+    compression = config.get(OPTIONS, 'compression', fallback='default')
+    compression_level = config.get(OPTIONS, 'compression_level', fallback='')
+    compression_selector = open_compression_selector(logger, config) if compression == 'auto' else None
+    initial_copy_mode = config.get(OPTIONS, 'initial_copy_mode', fallback='rsync')
+    stream_compression = config.get(OPTIONS, 'stream_compression', fallback='none')
+    change_agent = config.getboolean(OPTIONS, 'change_agent', fallback=False)
+    source_snapshot = config.get(OPTIONS, 'source_snapshot', fallback='none')
+    snapshot_create_command = config.get(OPTIONS, 'snapshot_create_command', fallback='')
+    snapshot_release_command = config.get(OPTIONS, 'snapshot_release_command', fallback='')
+    chunk_index = open_chunk_index(logger, config) if config.getboolean(OPTIONS, 'chunk_store', fallback=False) else None
+    chunk_max_archive_size = config.getint(OPTIONS, 'chunk_max_archive_mb', fallback=512) * 1024 * 1024
+    chunk_seed_budget = config.getint(OPTIONS, 'chunk_seed_mb', fallback=2048) * 1024 * 1024
+    # chunk stores are updated in the background, one host at a time, while the other transfers run
+    chunk_seeder = concurrent.futures.ThreadPoolExecutor(max_workers=1) if chunk_index is not None else None
+    chunk_seeds = []
+    if journal is not None and not resume:
+        try:
+            journal.reset(jobs)
+        except Exception as e:
+            logger.writelog("warn", f"Could not reset run journal [{journal.journal_path}]: {str(e)}")
+    remote_dirs = prepare_remote_dirs(logger, jobs)
+
+    def worker(job):
+        fingerprint = None
+        # incremental pulls ask the change agent in the source host for the changed paths
+        agent_state = None
+        changed_paths = None
+        if change_agent and job['transfer_type'] == 'pull':
+            agent_state = change_agent_state_id(job['host'], job['origin_path'], job['destination_path'])
+            changes = detect_changes(logger, job, agent_state)
+            if changes is None:
+                agent_state = None
+            elif not changes.full and os.path.isdir(job['destination_path']) and any(os.scandir(job['destination_path'])):
+                exclude_filter = ExcludeFilter([item for item in job['exclude_list'] if item])
+                removed = changes.apply_deletes(job['destination_path'], exclude_filter, keep=[PARTIAL_DIR]) if job['use_delete'] else 0
+                changed_paths = changes.transfer_paths(job['destination_path'], exclude_filter)
+                logger.writelog("info", f"Change agent on host [{job['host']}] reported {len(changed_paths)} paths to transfer "
+                                        f"for [{job['name']}], {removed} paths removed")
+                if removed and staging_index is not None:
+                    try:
+                        staging_index.update_tree(os.path.normpath(job['destination_path']), job, True)
+                    except Exception as e:
+                        logger.writelog("warn", f"Could not update staging index for [{job['destination_path']}]: {str(e)}")
+        # the change agent already avoids walking the source tree - it is not fingerprinted for --resume
+        if journal is not None and agent_state is None:
+            try:
+                fingerprint = source_fingerprint(job, manifest_workers, staging_index=staging_index)
+            except Exception as e:
+                logger.writelog("warn", f"Could not fingerprint source of transfer job [{job['name']}] - it will not be journaled: {str(e)}")
+        if resume and fingerprint is not None and journal.completed(job, fingerprint):
+            logger.writelog("info", f"Transfer job [{job['name']}] already completed and its source is unchanged - skipping")
+            return True, ""
+        # destination directories were created for all the hosts before the transfers started
+        if job['transfer_type'] in ['push', 'direct']:
+            endpoint = "{}@{}".format(*destination_endpoint(job))
+            if not remote_dirs[endpoint]['success']:
+                return False, remote_dirs[endpoint]['error']
+        logger.writelog("info", job['description'])
+        # the source is read from a snapshot, so that it does not change while it is copied and verified
+        snapshot = None
+        origin_path = job['origin_path']
+        if source_snapshot != 'none' and job['transfer_type'] in ['pull', 'direct']:
+            snapshot, snapshot_origin = create_snapshot(logger, job, source_snapshot, snapshot_create_command)
+            if snapshot is not None:
+                origin_path = snapshot_origin
+        try:
+            success, reason = copy(job, origin_path, changed_paths)
+        finally:
+            if snapshot is not None:
+                release_snapshot(logger, job, source_snapshot, snapshot, origin_path, snapshot_release_command)
+        if success and fingerprint is not None:
+            # the data is already transferred - a journal that cannot be written only prevents skipping the job on resume
+            try:
+                journal.record(job, fingerprint)
+            except Exception as e:
+                logger.writelog("warn", f"Could not record transfer job [{job['name']}] in run journal [{journal.journal_path}]: {str(e)}")
+        if success and agent_state is not None:
+            commit_changes(logger, job, agent_state)
+        return success, reason
+
+    def copy(job, origin_path, changed_paths):
+        # transfer of a job, with its source read from origin_path
+        if job['transfer_type'] == 'direct':
+            # compression is calibrated for the links of the bastion, not for the link between primary and standby
+            return direct_transfer(logger, job, direct_key, direct_audit_dir, manifest_workers,
+                                   compression_rsync_options('default' if compression == 'auto' else compression,
+                                                             int(compression_level) if compression_level else None),
+                                   bandwidth_governor, origin_path)
+        if compression_selector is not None:
+            compression_options = compression_selector.options(job['username'], job['host'], job['key_path'],
+                                                               ssh_options(job['username'], job['host'], job['key_path']),
+                                                               job['transfer_type'])
+        else:
+            compression_options = compression_rsync_options('default' if compression == 'auto' else compression,
+                                                            int(compression_level) if compression_level else None)
+        if job.get('relay_from'):
+            if job.get('dependencies_ok', True):
+                success, reason = relay_transfer(logger, job, relay_key, manifest_workers, staging_index)
+                if success:
+                    return success, reason
+                logger.writelog("warn", f"Relay of [{job['name']}] from host [{job['relay_from']}] failed - pushing directly: {reason}")
+            else:
+                logger.writelog("warn", f"Relay source for [{job['name']}] was not pushed successfully - pushing directly")
+        # changed archives of the products are sent as the chunks that the host does not have, before rsync
+        chunked = chunk_index is not None and job['transfer_type'] == 'push' and job['data_type'] == 'products'
+        if chunked:
+            try:
+                job['chunks'] = chunk_push(logger, job, chunk_index, manifest_workers, chunk_max_archive_size)
+            except Exception as e:
+                logger.writelog("warn", f"Chunk transfer of the archives of [{job['name']}] failed - transferring them with rsync: {str(e)}")
+        success, reason = transfer_data(
+            transfer_type=job['transfer_type'],
+            use_delete=job['use_delete'],
+            username=job['username'],
+            host=job['host'],
+            key_path=job['key_path'],
+            origin_path=origin_path,
+            destination_path=job['destination_path'],
+            logger=logger,
+            retries=job['retries'],
+            exclude_list=job['exclude_list'],
+            show_animation=show_animation,
+            verify_method=verify_method,
+            manifest_workers=manifest_workers,
+            staging_index=staging_index,
+            job=job,
+            link_dest=job['link_dest'],
+            bandwidth_governor=bandwidth_governor,
+            compression=compression_options,
+            initial_copy_mode=initial_copy_mode,
+            stream_compression=stream_compression,
+            changed_paths=changed_paths,
+            verify=verify if job['data_type'] in SAMPLED_DATA_TYPES else "full"
+        )
+        if success and chunked:
+            chunk_seeds.append(chunk_seeder.submit(seed, job))
+        return success, reason
+
+    def seed(job):
+        try:
+            chunk_seed(logger, job, chunk_index, manifest_workers, chunk_max_archive_size, chunk_seed_budget)
+        except Exception as e:
+            logger.writelog("warn", f"Could not update the chunk store of host [{job['host']}]: {str(e)}")
+
+    def governed_worker(job):
+        # the bandwidth budget is split between the jobs running at the same time
+        bandwidth_governor.start_job(job['name'])
+        try:
+            return worker(job)
+        finally:
+            bandwidth_governor.finish_job(job['name'])
+
+    job_worker = governed_worker if bandwidth_governor is not None else worker
+
+    logger.writelog("info", f"Running {len(jobs)} transfer jobs" + (f" to standby target [{target}]" if target is not None else "") +
+                            f" - max parallel transfers: {max_parallel}, max transfers per host: {max_per_host}")
+    # rsync progress of the running jobs, shown in the console and written periodically to PROGRESS_FILE
+    if own_progress:
+        progress_interval = config.getint(OPTIONS, 'progress_interval', fallback=30)
+        transfer_progress = TransferProgress(PROGRESS_FILE, progress_interval)
+        transfer_progress.start()
+    try:
+        if engine == 'supervised':
+            scheduler = SupervisedTransferEngine(logger, max_parallel, max_per_host, job_timeout, cancel_job_processes,
+                                            show_progress=sys.stdout.isatty() and own_progress, progress=transfer_progress)
+            job_results = scheduler.run(jobs, tracked_worker(job_worker))
+        else:
+            scheduler = TransferScheduler(logger, max_parallel, max_per_host)
+            job_results = scheduler.run(jobs, job_worker)
+    finally:
+        if own_progress:
+            transfer_progress.stop()
+            transfer_progress = None
+        if chunk_seeder is not None:
+            # an interrupted run does not start the chunk store updates still queued
+            if sys.exc_info()[0] is not None:
+                for future in chunk_seeds:
+                    future.cancel()
+            pending_seeds = [future for future in chunk_seeds if not future.done()]
+            if pending_seeds:
+                logger.writelog("info", f"Waiting for {len(pending_seeds)} chunk store updates to finish")
+            chunk_seeder.shutdown(wait=True)
+    # callers that need to know which jobs failed get the results of every job
+    if results is not None:
+        results.extend(job_results)
+    if run_files['history'] is not None:
+        try:
+            run_files['history'].record(job_results)
+        except Exception as e:
+            logger.writelog("warn", f"Could not update transfer history [{run_files['history'].history_path}]: {str(e)}")
+    for job_report in [run_report, report]:
+        if job_report is not None:
+            try:
+                job_report.add_results(job_results)
+            except Exception as e:
+                logger.writelog("warn", f"Could not write run report [{job_report.report_path}]: {str(e)}")
+    all_successful = True
+    for result in job_results:
+        job = result['job']
+        if result['success']:
+            logger.writelog("info", f"Transfer job [{job['name']}] completed in {int(result['elapsed'])} seconds")
+        else:
+            logger.writelog("error", f"{job['transfer_type'].capitalize()} failed [{job['name']}]: {result['reason']}")
+            logger.writelog("error", f"Check log file {LOG_FILE} for further information")
+            all_successful = False
+    return all_successful
+
+
+def pull_jobs(logger, config, data, instance):
+    jobs = []
+    jobs_successful = True
     # parse config for nodes 
     primary_wls_nodes = config[PRIMARY]['wls_nodes'].split("\n")
     primary_ohs_nodes = config[PRIMARY]['ohs_nodes'].split("\n") if config[PRIMARY]['ohs_nodes'] else []
+    dedup_products = config.getboolean(OPTIONS, 'dedup_products', fallback=False)
     # pull wls if requested
     if any(ins in instance for ins in ['wls', 'all']):
+        wls_job = lambda **kwargs: new_job(config, transfer_type='pull', instance='wls',
+                                           username=config[PRIMARY]['wls_osuser'],
+                                           key_path=config[PRIMARY]["wls_ssh_key"], **kwargs)
         # pull wls products - 1 and 2 - if requested
         if any(dta in data for dta in ['products', 'all']):
-            logger.writelog("info", f"Pulling WLS products1 from primary [{PRIMARY}]")
-            pull_success, reason = transfer_data(
-                transfer_type='pull',
-                use_delete=config.getboolean(OPTIONS, 'delete'),
-                username=config[PRIMARY]['wls_osuser'],
+            jobs.append(wls_job(
+                name="wls_products1",
+                description=f"Pulling WLS products1 from primary [{PRIMARY}]",
+                data_type='products',
                 host=primary_wls_nodes[0],
-                key_path=config[PRIMARY]["wls_ssh_key"],
                 origin_path=config[DIRECTORIES]['WLS_PRODUCTS'],
                 destination_path=config[DIRECTORIES]['STAGE_WLS_PRODUCTS1'],
-                logger=logger,
-                retries=config[OPTIONS]['rsync_retries'],
-                exclude_list=config[OPTIONS]['exclude_wls_products'].split("\n")
-            )
-            if not pull_success:
-                logger.writelog("error", f"Pull failed: {reason}")
-                logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                pull_successful = False
+                exclude_option='exclude_wls_products'
+            ))
             if len(primary_wls_nodes) > 1:
-                logger.writelog("info", f"Pulling WLS products2 from primary [{PRIMARY}]")
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['wls_osuser'],
+                # in dedup mode products2 is pulled after products1 and files identical in both are hard linked
+                jobs.append(wls_job(
+                    name="wls_products2",
+                    description=f"Pulling WLS products2 from primary [{PRIMARY}]",
+                    data_type='products',
                     host=primary_wls_nodes[1],
-                    key_path=config[PRIMARY]["wls_ssh_key"],
                     origin_path=config[DIRECTORIES]['WLS_PRODUCTS'],
                     destination_path=config[DIRECTORIES]['STAGE_WLS_PRODUCTS2'],
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_products'].split("\n")
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
+                    exclude_option='exclude_wls_products',
+                    link_dest=config[DIRECTORIES]['STAGE_WLS_PRODUCTS1'] if dedup_products else None,
+                    depends_on=["wls_products1"] if dedup_products else None
+                ))
             # also pull jdk with products if path supplied in config
             if not config[DIRECTORIES]['WLS_JDK_DIR']:
                 logger.writelog("info", "WLS_JDK_DIR not supplied in replication.properties - assumed it is under products and will not pull")
             else:
-                logger.writelog("info", f"Pulling WLS jdk from primary [{PRIMARY}]")
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['wls_osuser'],
+                jobs.append(wls_job(
+                    name="wls_jdk",
+                    description=f"Pulling WLS jdk from primary [{PRIMARY}]",
+                    data_type='jdk',
                     host=primary_wls_nodes[0],
-                    key_path=config[PRIMARY]["wls_ssh_key"],
                     origin_path=config[DIRECTORIES]['WLS_JDK_DIR'],
-                    destination_path=config[DIRECTORIES]['STAGE_WLS_JDK_DIR'],
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries']
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
+                    destination_path=config[DIRECTORIES]['STAGE_WLS_JDK_DIR']
+                ))
         # pull wls private config from primary - if requested
         if any(dta in data for dta in ['private_config', 'all']):
             for index in range(len(primary_wls_nodes)):
-                logger.writelog("info", f"Pulling WLS node {index + 1} private config from primary [{PRIMARY}]")
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['wls_osuser'],
+                jobs.append(wls_job(
+                    name=f"wls_node{index + 1}_private_config",
+                    description=f"Pulling WLS node {index + 1} private config from primary [{PRIMARY}]",
+                    data_type='private_config',
                     host=primary_wls_nodes[index],
-                    key_path=config[PRIMARY]["wls_ssh_key"],
                     origin_path=config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR'],
                     destination_path=f"{config[DIRECTORIES]['STAGE_WLS_PRIVATE_CONFIG_DIR']}/wlsnode{index + 1}_private_config",
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_private_config'].split("\n")
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
+                    exclude_option='exclude_wls_private_config'
+                ))
         # pull wls shared config - if requested and if WLS_SHARED_CONFIG_DIR supplied in replication.properties 
         if any(dta in data for dta in ['shared_config', 'all']):
             if not config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR']:
                 logger.writelog("info", "WLS_SHARED_CONFIG_DIR not supplied in replication.properties - shared config not used, will not pull")
             else:
                 logger.writelog("info", f"Reading remote config.xml file [{config[DIRECTORIES]['WLS_CONFIG_PATH']}]")
-                ssh_client = paramiko.SSHClient()
-                ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh_client.connect(username=config[PRIMARY]['wls_osuser'], hostname=primary_wls_nodes[0], key_filename=config[PRIMARY]["wls_ssh_key"])
-                sftp_client = ssh_client.open_sftp()
                 cfg_file = io.BytesIO()
-                sftp_client.getfo(config[DIRECTORIES]['WLS_CONFIG_PATH'], cfg_file)
+                with session_pool.session(config[PRIMARY]['wls_osuser'], primary_wls_nodes[0], config[PRIMARY]["wls_ssh_key"]) as session:
+                    session.sftp().getfo(config[DIRECTORIES]['WLS_CONFIG_PATH'], cfg_file)
                 cfg_file.seek(0)
-                sftp_client.close()
-                ssh_client.close()
                 cfg_xml = ET.parse(cfg_file)
                 root = cfg_xml.getroot()
                 namespaces = {"xmlns" : "http://xmlns.oracle.com/weblogic/domain"}
@@ -466,67 +1616,39 @@ def pull(logger, config, data, instance):
                 logger.writelog("debug", f"Deployment plan directory origin path: {origin_dp_path}")
                 destination_dp_path = origin_dp_path.replace(config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR'], config[DIRECTORIES]['STAGE_WLS_SHARED_CONFIG_DIR'])
                 logger.writelog("debug", f"Deployment plan directory destination path: {destination_dp_path}")
-                logger.writelog("info", f"Pulling WLS application from primary [{PRIMARY}]")
-                if not os.path.isdir(destination_apps_path):
-                    os.makedirs(destination_apps_path)
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['wls_osuser'],
+                for destination in [destination_apps_path, destination_domain_path, destination_dp_path]:
+                    if not os.path.isdir(destination):
+                        os.makedirs(destination)
+                jobs.append(wls_job(
+                    name="wls_shared_applications",
+                    description=f"Pulling WLS application from primary [{PRIMARY}]",
+                    data_type='shared_config',
                     host=primary_wls_nodes[0],
-                    key_path=config[PRIMARY]["wls_ssh_key"],
                     origin_path=origin_apps_path,
                     destination_path=destination_apps_path,
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
-                logger.writelog("info", f"Pulling WLS domain from primary [{PRIMARY}]")
-                if not os.path.isdir(destination_domain_path):
-                    os.makedirs(destination_domain_path)
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['wls_osuser'],
+                    exclude_option='exclude_wls_shared_config'
+                ))
+                jobs.append(wls_job(
+                    name="wls_shared_domain",
+                    description=f"Pulling WLS domain from primary [{PRIMARY}]",
+                    data_type='shared_config',
                     host=primary_wls_nodes[0],
-                    key_path=config[PRIMARY]["wls_ssh_key"],
                     origin_path=origin_domain_path,
                     destination_path=destination_domain_path,
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
-                logger.writelog("info", f"Pulling WLS deployment plan directory from primary [{PRIMARY}]")
-                if not os.path.isdir(destination_dp_path):
-                    os.makedirs(destination_dp_path)
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['wls_osuser'],
+                    exclude_option='exclude_wls_shared_config'
+                ))
+                jobs.append(wls_job(
+                    name="wls_shared_deployment_plans",
+                    description=f"Pulling WLS deployment plan directory from primary [{PRIMARY}]",
+                    data_type='shared_config',
                     host=primary_wls_nodes[0],
-                    key_path=config[PRIMARY]["wls_ssh_key"],
                     origin_path=origin_dp_path,
                     destination_path=destination_dp_path,
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
+                    exclude_option='exclude_wls_shared_config'
+                ))
                 # pull additional directories (if any)
                 additional_dirs = [ x.strip() for x in config[DIRECTORIES]['WLS_ADDITIONAL_SHARED_DIRS'].split("\n") if x]
                 for dir in additional_dirs:
-                    logger.writelog("info", f"Pulling additional WLS shared directory [{dir}]")
                     # create staging destination directory
                     stage_destination = f"{config[DIRECTORIES]['STAGE_WLS_SHARED_ADDITIONAL']}/{dir}"
                     if not os.path.isdir(stage_destination):
@@ -536,242 +1658,144 @@ def pull(logger, config, data, instance):
                         except Exception as e:
                             logger.writelog("error", f"Failed creating directory {stage_destination}")
                             logger.writelog("debug", str(e))
-                            pull_successful = False
+                            jobs_successful = False
                             continue
                         logger.writelog("info", f"Created directory {stage_destination}")
-                    pull_success, reason = transfer_data(
-                        transfer_type='pull',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[PRIMARY]['wls_osuser'],
+                    jobs.append(wls_job(
+                        name=f"wls_shared_additional:{dir}",
+                        description=f"Pulling additional WLS shared directory [{dir}]",
+                        data_type='shared_config',
                         host=primary_wls_nodes[0],
-                        key_path=config[PRIMARY]["wls_ssh_key"],
                         origin_path=dir,
                         destination_path=stage_destination,
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries'],
-                        exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                    )
-                    if not pull_success:
-                        logger.writelog("error", f"Pull failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        pull_successful = False
+                        exclude_option='exclude_wls_shared_config'
+                    ))
 
     # pull ohs products - if requested and if OHS is used
     if any(ins in instance for ins in ['ohs', 'all']):
         if len(primary_ohs_nodes) == 0:
             logger.writelog("info", "OHS not used - will not attempt any OHS related pull")
         else:
+            ohs_job = lambda **kwargs: new_job(config, transfer_type='pull', instance='ohs',
+                                               username=config[PRIMARY]['ohs_osuser'],
+                                               key_path=config[PRIMARY]["ohs_ssh_key"], **kwargs)
             # pull ohs products
             if any(dta in data for dta in ['products', 'all']):
-                logger.writelog("info", f"Pulling OHS products1 from primary [{PRIMARY}]")
-                pull_success, reason = transfer_data(
-                    transfer_type='pull',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[PRIMARY]['ohs_osuser'],
+                jobs.append(ohs_job(
+                    name="ohs_products1",
+                    description=f"Pulling OHS products1 from primary [{PRIMARY}]",
+                    data_type='products',
                     host=primary_ohs_nodes[0],
-                    key_path=config[PRIMARY]["ohs_ssh_key"],
                     origin_path=config[DIRECTORIES]['OHS_PRODUCTS'],
                     destination_path=config[DIRECTORIES]['STAGE_OHS_PRODUCTS1'],
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_ohs_products'].split("\n")
-                )
-                if not pull_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    pull_successful = False
+                    exclude_option='exclude_ohs_products'
+                ))
                 if len(primary_ohs_nodes) > 1:
-                    logger.writelog("info", f"Pulling OHS products2 from primary [{PRIMARY}]")
-                    pull_success, reason = transfer_data(
-                        transfer_type='pull',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[PRIMARY]['ohs_osuser'],
+                    jobs.append(ohs_job(
+                        name="ohs_products2",
+                        description=f"Pulling OHS products2 from primary [{PRIMARY}]",
+                        data_type='products',
                         host=primary_ohs_nodes[1],
-                        key_path=config[PRIMARY]["ohs_ssh_key"],
                         origin_path=config[DIRECTORIES]['OHS_PRODUCTS'],
                         destination_path=config[DIRECTORIES]['STAGE_OHS_PRODUCTS2'],
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries'],
-                        exclude_list=config[OPTIONS]['exclude_ohs_products'].split("\n")
-                    )
-                    if not pull_success:
-                        logger.writelog("error", f"Pull failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        pull_successful = False
+                        exclude_option='exclude_ohs_products',
+                        link_dest=config[DIRECTORIES]['STAGE_OHS_PRODUCTS1'] if dedup_products else None,
+                        depends_on=["ohs_products1"] if dedup_products else None
+                    ))
                 # also pull jdk with products if jdk path supplied in config
                 if not config[DIRECTORIES]['OHS_JDK_DIR']:
                     logger.writelog("info", "OHS_JDK_DIR not supplied in replication.properties - assumed it is under products and will not pull")
                 else:
-                    logger.writelog("info", f"Pulling OHS jdk from primary [{PRIMARY}]")
-                    pull_success, reason = transfer_data(
-                        transfer_type='pull',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[PRIMARY]['ohs_osuser'],
+                    jobs.append(ohs_job(
+                        name="ohs_jdk",
+                        description=f"Pulling OHS jdk from primary [{PRIMARY}]",
+                        data_type='jdk',
                         host=primary_ohs_nodes[0],
-                        key_path=config[PRIMARY]["ohs_ssh_key"],
                         origin_path=config[DIRECTORIES]['OHS_JDK_DIR'],
-                        destination_path=config[DIRECTORIES]['STAGE_OHS_JDK_DIR'],
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries']
-                    )
-                    if not pull_success:
-                        logger.writelog("error", f"Pull failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        pull_successful = False
+                        destination_path=config[DIRECTORIES]['STAGE_OHS_JDK_DIR']
+                    ))
             # pull ohs private config - if requested
             if any(dta in data for dta in ['private_config', 'all']):
                 for index in range(len(primary_ohs_nodes)):
-                    logger.writelog("info", f"Pulling OHS node {index + 1} private config from primary [{PRIMARY}]")
-                    pull_success, reason = transfer_data(
-                        transfer_type='pull',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[PRIMARY]['ohs_osuser'],
+                    jobs.append(ohs_job(
+                        name=f"ohs_node{index + 1}_private_config",
+                        description=f"Pulling OHS node {index + 1} private config from primary [{PRIMARY}]",
+                        data_type='private_config',
                         host=primary_ohs_nodes[index],
-                        key_path=config[PRIMARY]["ohs_ssh_key"],
                         origin_path=config[DIRECTORIES]['OHS_PRIVATE_CONFIG_DIR'],
                         destination_path=f"{config[DIRECTORIES]['STAGE_OHS_PRIVATE_CONFIG_DIR']}/ohsnode{index + 1}_private_config",
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries'],
-                        exclude_list=config[OPTIONS]['exclude_ohs_private_config'].split("\n")
-                    )
-                    if not pull_success:
-                        logger.writelog("error", f"Pull failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        pull_successful = False
+                        exclude_option='exclude_ohs_private_config'
+                    ))
+    return jobs, jobs_successful
+
+
+def pull(logger, config, data, instance, resume=False):
+    jobs, pull_successful = pull_jobs(logger, config, data, instance)
+    if not run_jobs(logger, config, jobs, resume):
+        pull_successful = False
     return pull_successful
 
 
-def push(logger, config, data, instance):
-    push_successful = True
-    # push wls data from primary
+def push_jobs(logger, config, data, instance, standby=STANDBY):
+    jobs = []
+    jobs_successful = True
     # parse config for nodes 
-    standby_wls_nodes = config[STANDBY]['wls_nodes'].split("\n")
-    standby_ohs_nodes = config[STANDBY]['ohs_nodes'].split("\n") if config[STANDBY]['ohs_nodes'] else []
+    standby_wls_nodes = config[standby]['wls_nodes'].split("\n")
+    standby_ohs_nodes = config[standby]['ohs_nodes'].split("\n") if config[standby]['ohs_nodes'] else []
     # push wls if requested
     if any(ins in instance for ins in ['wls', 'all']):
+        wls_job = lambda **kwargs: new_job(config, transfer_type='push', instance='wls',
+                                           username=config[standby]['wls_osuser'],
+                                           key_path=config[standby]["wls_ssh_key"], **kwargs)
         # push wls products - 1 and 2 - if requested
         if any(dta in data for dta in ['products', 'all']):
-            logger.writelog("info", f"Pushing wls products1 to standby [{STANDBY}]")
-            push_success, reason = transfer_data(
-                transfer_type='push',
-                use_delete=config.getboolean(OPTIONS, 'delete'),
-                username=config[STANDBY]['wls_osuser'],
+            jobs.append(wls_job(
+                name="wls_products1",
+                description=f"Pushing wls products1 to standby [{standby}]",
+                data_type='products',
                 host=standby_wls_nodes[0],
-                key_path=config[STANDBY]["wls_ssh_key"],
                 origin_path=config[DIRECTORIES]['STAGE_WLS_PRODUCTS1'],
                 destination_path=config[DIRECTORIES]['WLS_PRODUCTS'],
-                logger=logger,
-                retries=config[OPTIONS]['rsync_retries'],
-                exclude_list=config[OPTIONS]['exclude_wls_products'].split("\n")
-            )
-            if not push_success:
-                logger.writelog("error", f"Push failed: {reason}")
-                logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                push_successful = False
+                exclude_option='exclude_wls_products'
+            ))
             if len(standby_wls_nodes) > 1:
-                logger.writelog("info", f"Pushing wls products2 to standby [{STANDBY}]")
-                push_success, reason = transfer_data(
-                    transfer_type='push',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[STANDBY]['wls_osuser'],
+                jobs.append(wls_job(
+                    name="wls_products2",
+                    description=f"Pushing wls products2 to standby [{standby}]",
+                    data_type='products',
                     host=standby_wls_nodes[1],
-                    key_path=config[STANDBY]["wls_ssh_key"],
                     origin_path=config[DIRECTORIES]['STAGE_WLS_PRODUCTS2'],
                     destination_path=config[DIRECTORIES]['WLS_PRODUCTS'],
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_products'].split("\n")
-                )
-                if not push_success:
-                    logger.writelog("error", f"Pull failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    push_successful = False
+                    exclude_option='exclude_wls_products'
+                ))
             # also push jdk to all wls nodes if path supplied in config
             if not config[DIRECTORIES]['WLS_JDK_DIR']:
                 logger.writelog("info", "WLS_JDK_DIR not supplied in replication.properties - assumed it is under products and will not push")
             else:
-                logger.writelog("info", "Pushing JDK to all WLS nodes")
                 for index in range(len(standby_wls_nodes)):
-                    ssh_client = paramiko.SSHClient()
-                    ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                    ssh_client.connect(username=config[STANDBY]['wls_osuser'], hostname=standby_wls_nodes[index], key_filename=config[STANDBY]["wls_ssh_key"])
-                    sftp_client = ssh_client.open_sftp()
-                    logger.writelog("debug", f"Checking destination directory exists on WLS node {index + 1}: {config[DIRECTORIES]['WLS_JDK_DIR']}")
-                    try:
-                        sftp_client.stat(config[DIRECTORIES]['WLS_JDK_DIR'])
-                    except IOError as e:
-                        if e.errno == errno.ENOENT:
-                            logger.writelog("debug", "Destination directory does not exist - attempting to create")
-                            stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {config[DIRECTORIES]['WLS_JDK_DIR']}")
-                            error = stderr.read().decode()
-                            if error:
-                                logger.writelog("error", f"Failed creating remote destination directory: {error}")
-                                push_successful = False
-                                continue
-                        else:
-                            logger.writelog("error", f"Cannot check remote destination directory exists: {str(e)}")
-                            push_successful = False
-                            continue
-                    sftp_client.close()
-                    ssh_client.close()
-                    logger.writelog("info", f"Pushing JDK to WLS node {index + 1}")
-                    push_success, reason = transfer_data(
-                        transfer_type='push',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[STANDBY]['wls_osuser'],
+                    jobs.append(wls_job(
+                        name=f"wls_node{index + 1}_jdk",
+                        description=f"Pushing JDK to WLS node {index + 1}",
+                        data_type='jdk',
                         host=standby_wls_nodes[index],
-                        key_path=config[STANDBY]["wls_ssh_key"],
                         origin_path=config[DIRECTORIES]['STAGE_WLS_JDK_DIR'],
                         destination_path=config[DIRECTORIES]['WLS_JDK_DIR'],
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries']
-                    )
-                    if not push_success:
-                        logger.writelog("error", f"Push failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        push_successful = False
+                        remote_dirs=[config[DIRECTORIES]['WLS_JDK_DIR']]
+                    ))
 
         # push wls private config to standby - if requested
         if any(dta in data for dta in ['private_config', 'all']):
             for index in range(len(standby_wls_nodes)):
-                ssh_client = paramiko.SSHClient()
-                ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh_client.connect(username=config[STANDBY]['wls_osuser'], hostname=standby_wls_nodes[index], key_filename=config[STANDBY]["wls_ssh_key"])
-                sftp_client = ssh_client.open_sftp()
-                logger.writelog("debug", f"Checking destination directory exists: {config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR']}")
-                try:
-                    sftp_client.stat(config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR'])
-                except IOError as e:
-                    if e.errno == errno.ENOENT:
-                        stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR']}")
-                        error = stderr.read().decode()
-                        if error:
-                            logger.writelog("error", f"Failed creating remote destination directory: {error}")
-                            push_successful = False
-                            continue
-                    else:
-                        logger.writelog("error", f"Cannot check remote destination directory exists: {str(e)}")
-                        push_successful = False
-                        continue
-                sftp_client.close()
-                ssh_client.close()
-                logger.writelog("info", f"Pushing WLS node {index + 1} private config")
-                push_success, reason = transfer_data(
-                    transfer_type='push',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[STANDBY]['wls_osuser'],
+                jobs.append(wls_job(
+                    name=f"wls_node{index + 1}_private_config",
+                    description=f"Pushing WLS node {index + 1} private config",
+                    data_type='private_config',
                     host=standby_wls_nodes[index],
-                    key_path=config[STANDBY]["wls_ssh_key"],
                     origin_path=f"{config[DIRECTORIES]['STAGE_WLS_PRIVATE_CONFIG_DIR']}/wlsnode{index + 1}_private_config",
                     destination_path=config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR'],
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_private_config'].split("\n")
-                )
-                if not push_success:
-                    logger.writelog("error", f"Push failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    push_successful = False
+                    exclude_option='exclude_wls_private_config',
+                    remote_dirs=[config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR']]
+                ))
         # push wls shared config - if requested and if WLS_SHARED_CONFIG_DIR supplied in replication.properties 
         if any(dta in data for dta in ['shared_config', 'all']):
             if not config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR']:
@@ -796,218 +1820,445 @@ def push(logger, config, data, instance):
                 logger.writelog("debug", f"Deployment plan directory origin path: {origin_dp_path}")
                 logger.writelog("debug", f"Deployment plan directory destination path: {destination_dp_path}")
                 # transfer applications, domain and dp but make sure destination dirs exist first
-                ssh_client = paramiko.SSHClient()
-                ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh_client.connect(username=config[STANDBY]['wls_osuser'], hostname=standby_wls_nodes[0], key_filename=config[STANDBY]["wls_ssh_key"])
-                sftp_client = ssh_client.open_sftp()
-                for destination in [destination_apps_path, destination_domain_path, destination_dp_path]:
-                    logger.writelog("debug", f"Checking destination directory exists: {destination}")
-                    try:
-                        sftp_client.stat(destination)
-                    except IOError as e:
-                        if e.errno == errno.ENOENT:
-                            stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {destination}")
-                            error = stderr.read().decode()
-                            if error:
-                                logger.writelog("error", f"Failed creating remote destination directory: {error}")
-                                push_successful = False
-                        else:
-                            logger.writelog("error", f"Cannot check remote destination directory exists: {str(e)}")
-                            push_successful = False
-                sftp_client.close()
-                ssh_client.close()
-                logger.writelog("info", "Pushing WLS application to standby")
-                push_success, reason = transfer_data(
-                    transfer_type='push',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[STANDBY]['wls_osuser'],
+                jobs.append(wls_job(
+                    name="wls_shared_applications",
+                    description="Pushing WLS application to standby",
+                    data_type='shared_config',
                     host=standby_wls_nodes[0],
-                    key_path=config[STANDBY]["wls_ssh_key"],
                     origin_path=origin_apps_path,
                     destination_path=destination_apps_path,
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                )
-                if not push_success:
-                    logger.writelog("error", f"Push failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    push_successful = False
-                logger.writelog("info", "Pushing WLS domain to standby")
-                push_success, reason = transfer_data(
-                    transfer_type='push',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[STANDBY]['wls_osuser'],
+                    exclude_option='exclude_wls_shared_config',
+                    remote_dirs=[destination_apps_path]
+                ))
+                jobs.append(wls_job(
+                    name="wls_shared_domain",
+                    description="Pushing WLS domain to standby",
+                    data_type='shared_config',
                     host=standby_wls_nodes[0],
-                    key_path=config[STANDBY]["wls_ssh_key"],
                     origin_path=origin_domain_path,
                     destination_path=destination_domain_path,
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                )
-                if not push_success:
-                    logger.writelog("error", f"Push failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    push_successful = False
-                logger.writelog("info", "Pushing WLS deployment plan directory to standby")
-                push_success, reason = transfer_data(
-                    transfer_type='push',
-                    use_delete=config.getboolean(OPTIONS, 'delete'),
-                    username=config[STANDBY]['wls_osuser'],
+                    exclude_option='exclude_wls_shared_config',
+                    remote_dirs=[destination_domain_path]
+                ))
+                jobs.append(wls_job(
+                    name="wls_shared_deployment_plans",
+                    description="Pushing WLS deployment plan directory to standby",
+                    data_type='shared_config',
                     host=standby_wls_nodes[0],
-                    key_path=config[STANDBY]["wls_ssh_key"],
                     origin_path=origin_dp_path,
                     destination_path=destination_dp_path,
-                    logger=logger,
-                    retries=config[OPTIONS]['rsync_retries'],
-                    exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                )
-                if not push_success:
-                    logger.writelog("error", f"Push failed: {reason}")
-                    logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                    push_successful = False
+                    exclude_option='exclude_wls_shared_config',
+                    remote_dirs=[destination_dp_path]
+                ))
                 # push additional dirs (if any)
-                # open ssh and sftp conection to check destination directory exists
-                ssh_client = paramiko.SSHClient()
-                ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh_client.connect(username=config[STANDBY]['wls_osuser'], hostname=standby_wls_nodes[0], key_filename=config[STANDBY]["wls_ssh_key"])
-                sftp_client = ssh_client.open_sftp()
                 additional_dirs = [ x.strip() for x in config[DIRECTORIES]['WLS_ADDITIONAL_SHARED_DIRS'].split("\n") if x]
                 for dir in additional_dirs:
-                    logger.writelog("info", f"Pushing additional WLS shared directory [{dir}]")
                     # check if directory exists in staging environment
                     stage_dir = f"{config[DIRECTORIES]['STAGE_WLS_SHARED_ADDITIONAL']}/{dir}"
                     if not os.path.isdir(stage_dir):
                         logger.writelog("error", f"Additional WLS shared directory [{stage_dir}] missing from staging environment - consider re-running pull")
-                        push_successful = False
+                        jobs_successful = False
                         continue
-                    # make sure destination directory exists
-                    logger.writelog("debug", f"Checking destination directory exists: {dir}")
-                    try:
-                        sftp_client.stat(dir)
-                    except IOError as e:
-                        if e.errno == errno.ENOENT:
-                            stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {dir}")
-                            error = stderr.read().decode()
-                            if error:
-                                logger.writelog("error", f"Failed creating remote destination directory: {error}")
-                                push_successful = False
-                                continue
-                        else:
-                            logger.writelog("error", f"Cannot check remote destination directory exists: {str(e)}")
-                            push_successful = False
-                            continue
-                    push_success, reason = transfer_data(
-                        transfer_type='push',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[STANDBY]['wls_osuser'],
+                    jobs.append(wls_job(
+                        name=f"wls_shared_additional:{dir}",
+                        description=f"Pushing additional WLS shared directory [{dir}]",
+                        data_type='shared_config',
                         host=standby_wls_nodes[0],
-                        key_path=config[STANDBY]["wls_ssh_key"],
                         origin_path=stage_dir,
                         destination_path=dir,
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries'],
-                        exclude_list=config[OPTIONS]['exclude_wls_shared_config'].split("\n")
-                    )
-                    if not push_success:
-                        logger.writelog("error", f"Push failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        push_successful = False
-                sftp_client.close()
-                ssh_client.close()
+                        exclude_option='exclude_wls_shared_config',
+                        remote_dirs=[dir]
+                    ))
 
     # push ohs products - if requested and if OHS used
     if any(ins in instance for ins in ['ohs', 'all']):
         if len(standby_ohs_nodes) == 0:
             logger.writelog("info", "OHS not used - will not attempt any OHS related push")
         else:
+            ohs_job = lambda **kwargs: new_job(config, transfer_type='push', instance='ohs',
+                                               username=config[standby]['ohs_osuser'],
+                                               key_path=config[standby]["ohs_ssh_key"], **kwargs)
             if any(dta in data for dta in ['products', 'all']):
-                logger.writelog("info", "Pushing ohs products to standby")
                 for index in range(len(standby_ohs_nodes)):
-                    logger.writelog("info", f"Pushing OHS node {index + 1} products")
-                    push_success, reason = transfer_data(
-                        transfer_type='push',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[STANDBY]['ohs_osuser'],
+                    jobs.append(ohs_job(
+                        name=f"ohs_node{index + 1}_products",
+                        description=f"Pushing OHS node {index + 1} products",
+                        data_type='products',
                         host=standby_ohs_nodes[index],
-                        key_path=config[STANDBY]["ohs_ssh_key"],
                         origin_path=config[DIRECTORIES][f'STAGE_OHS_PRODUCTS{index % 2 + 1}'],
                         destination_path=config[DIRECTORIES]['OHS_PRODUCTS'],
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries'],
-                        exclude_list=config[OPTIONS]['exclude_ohs_products'].split("\n")
-                    )
-                    if not push_success:
-                        logger.writelog("error", f"Push failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        push_successful = False
-                    # also push jdk with products if path supplied in config
-                    if not config[DIRECTORIES]['OHS_JDK_DIR']:
-                        logger.writelog("info", "OHS_JDK_DIR not supplied in replication.properties - assumed it is under products and will not push")
-                    else:
-                        logger.writelog("info", f"Attempting to push OHS node {index + 1} JDK")
-                        ssh_client = paramiko.SSHClient()
-                        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                        ssh_client.connect(username=config[STANDBY]['ohs_osuser'], hostname=standby_ohs_nodes[index], key_filename=config[STANDBY]["ohs_ssh_key"])
-                        sftp_client = ssh_client.open_sftp()
-                        logger.writelog("debug", f"Checking destination directory exists on OHS node {index + 1}: {config[DIRECTORIES]['OHS_JDK_DIR']}")
-                        try:
-                            sftp_client.stat(config[DIRECTORIES]['OHS_JDK_DIR'])
-                        except IOError as e:
-                            if e.errno == errno.ENOENT:
-                                logger.writelog("debug", "Destination directory does not exist - attempting to create")
-                                stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {config[DIRECTORIES]['OHS_JDK_DIR']}")
-                                error = stderr.read().decode()
-                                if error:
-                                    logger.writelog("error", f"Failed creating remote destination directory: {error}")
-                                    push_successful = False
-                                    continue
-                            else:
-                                logger.writelog("error", f"Cannot check remote destination directory exists: {str(e)}")
-                                push_successful = False
-                                continue
-                        sftp_client.close()
-                        ssh_client.close()
-                        logger.writelog("info", f"Pushing JDK to OHS node {index + 1}")
-                        push_success, reason = transfer_data(
-                            transfer_type='push',
-                            use_delete=config.getboolean(OPTIONS, 'delete'),
-                            username=config[STANDBY]['ohs_osuser'],
+                        exclude_option='exclude_ohs_products'
+                    ))
+                # also push jdk with products if path supplied in config
+                if not config[DIRECTORIES]['OHS_JDK_DIR']:
+                    logger.writelog("info", "OHS_JDK_DIR not supplied in replication.properties - assumed it is under products and will not push")
+                else:
+                    for index in range(len(standby_ohs_nodes)):
+                        jobs.append(ohs_job(
+                            name=f"ohs_node{index + 1}_jdk",
+                            description=f"Pushing JDK to OHS node {index + 1}",
+                            data_type='jdk',
                             host=standby_ohs_nodes[index],
-                            key_path=config[STANDBY]["ohs_ssh_key"],
                             origin_path=config[DIRECTORIES]['STAGE_OHS_JDK_DIR'],
                             destination_path=config[DIRECTORIES]['OHS_JDK_DIR'],
-                            logger=logger,
-                            retries=config[OPTIONS]['rsync_retries']
-                        )
-                        if not push_success:
-                            logger.writelog("error", f"Push failed: {reason}")
-                            logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                            push_successful = False
+                            remote_dirs=[config[DIRECTORIES]['OHS_JDK_DIR']]
+                        ))
 
             # push ohs private config - if requested
             if any(dta in data for dta in ['private_config', 'all']):
                 for index in range(len(standby_ohs_nodes)):
-                    logger.writelog("info", f"Pushing OHS node {index + 1} private config")
-                    push_success, reason = transfer_data(
-                        transfer_type='push',
-                        use_delete=config.getboolean(OPTIONS, 'delete'),
-                        username=config[STANDBY]['ohs_osuser'],
+                    jobs.append(ohs_job(
+                        name=f"ohs_node{index + 1}_private_config",
+                        description=f"Pushing OHS node {index + 1} private config",
+                        data_type='private_config',
                         host=standby_ohs_nodes[index],
-                        key_path=config[STANDBY]["ohs_ssh_key"],
                         origin_path=f"{config[DIRECTORIES]['STAGE_OHS_PRIVATE_CONFIG_DIR']}/ohsnode{index + 1}_private_config",
                         destination_path=config[DIRECTORIES]['OHS_PRIVATE_CONFIG_DIR'],
-                        logger=logger,
-                        retries=config[OPTIONS]['rsync_retries'],
-                        exclude_list=config[OPTIONS]['exclude_ohs_private_config'].split("\n")
-                    )
-                    if not push_success:
-                        logger.writelog("error", f"Pull failed: {reason}")
-                        logger.writelog("error", f"Check log file {LOG_FILE} for further information")
-                        push_successful = False
+                        exclude_option='exclude_ohs_private_config'
+                    ))
+    # jobs of the other standby targets run at the same time as the ones of STANDBY - their names tell them apart
+    for job in jobs:
+        job['target'] = standby
+        if standby != STANDBY:
+            job['name'] = f"{job['name']}@{standby}"
+    return jobs, jobs_successful
+
+
+def plan_relay(logger, config, jobs):
+    # jobs pushing the same staged directory to several nodes are chained: the bastion pushes to the first node
+    # and each pushed node relays to up to RELAY_FANOUT peers over the standby network
+    relay_data_types = [item.strip() for item in config.get(OPTIONS, 'relay_data_types', fallback='').replace(",", " ").split() if item.strip()]
+    if not relay_data_types:
+        return jobs
+    if not config.get(OPTIONS, 'relay_ssh_key', fallback=''):
+        logger.writelog("warn", "RELAY_SSH_KEY not supplied in replication.properties - relay push disabled, pushing directly to all nodes")
+        return jobs
+    groups = {}
+    for job in jobs:
+        # node specific data always goes direct
+        if job['data_type'] not in relay_data_types or job['data_type'] in ['private_config', 'shared_config']:
+            continue
+        groups.setdefault((job['instance'], job['data_type'], job['origin_path'], job['destination_path']), []).append(job)
+    for group in groups.values():
+        if len(group) < 2:
+            continue
+        for idx in range(1, len(group)):
+            parent = group[(idx - 1) // RELAY_FANOUT]
+            group[idx]['relay_from'] = parent['host']
+            group[idx]['depends_on'] = [parent['name']]
+            group[idx]['description'] = f"{group[idx]['description']} (relayed from {parent['host']})"
+        logger.writelog("info", f"Relay push of [{group[0]['origin_path']}]: bastion -> {group[0]['host']}, then " +
+                                ", ".join([f"{job['relay_from']} -> {job['host']}" for job in group[1:]]))
+    return jobs
+
+
+def standby_targets(config):
+    # standby environments that push fans out to - the env files named in STANDBY_TARGETS, or STANDBY alone
+    names = config.get(OPTIONS, 'standby_targets', fallback='').replace(",", " ").split()
+    if not names:
+        return [STANDBY]
+    return list(dict.fromkeys(UTILS.target_env(name)[1] for name in names))
+
+
+def push_target(logger, config, data, instance, target, resume=False, report=None, run_files=None):
+    jobs, push_successful = push_jobs(logger, config, data, instance, target)
+    jobs = plan_relay(logger, config, jobs)
+    if not run_jobs(logger, config, jobs, resume, target=target, report=report, run_files=run_files):
+        push_successful = False
     return push_successful
 
+
+def push(logger, config, data, instance, resume=False):
+    global transfer_progress
+    targets = standby_targets(config)
+    if len(targets) == 1:
+        return push_target(logger, config, data, instance, targets[0], resume)
+    # all the targets are pushed at the same time from the same staging copy, each one with its own transfer
+    # limits and report. The progress of the transfers of all the targets is shown and written together
+    logger.writelog("info", f"Pushing to {len(targets)} standby targets: {', '.join(targets)}")
+    reports = {target: RunReport(REPORT_FILE.replace(".json", f"_{target}.json"), "push") for target in targets}
+    # one journal, history and bandwidth budget for all the targets
+    run_files = open_run_files(logger, config)
+    target_results = {}
+    transfer_progress = TransferProgress(PROGRESS_FILE, config.getint(OPTIONS, 'progress_interval', fallback=30))
+    transfer_progress.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = {target: executor.submit(push_target, logger, config, data, instance, target, resume, reports[target], run_files)
+                       for target in targets}
+            for target, future in futures.items():
+                try:
+                    target_results[target] = future.result()
+                except Exception as e:
+                    logger.writelog("error", f"Push to standby target [{target}] failed: {str(e)}")
+                    target_results[target] = False
+    finally:
+        transfer_progress.stop()
+        transfer_progress = None
+    for target in targets:
+        try:
+            reports[target].finish(target_results[target])
+        except Exception as e:
+            logger.writelog("warn", f"Could not write run report [{reports[target].report_path}]: {str(e)}")
+        if target_results[target]:
+            logger.writelog("info", f"Push to standby target [{target}] completed successfully - report written to {reports[target].report_path}")
+        else:
+            logger.writelog("error", f"Push to standby target [{target}] completed with failures - report written to {reports[target].report_path}")
+    return all(target_results.values())
+
+
+def stage_config_xml(logger, config):
+    # push_jobs() reads the standby shared config paths from the staged config.xml. In direct mode it is the only
+    # shared config file copied to the staging folder
+    primary_wls_nodes = config[PRIMARY]['wls_nodes'].split("\n")
+    local_cfg = config[DIRECTORIES]['WLS_CONFIG_PATH'].replace(config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR'], config[DIRECTORIES]['STAGE_WLS_SHARED_CONFIG_DIR'])
+    logger.writelog("info", f"Copying config.xml file [{config[DIRECTORIES]['WLS_CONFIG_PATH']}] to staging folder")
+    try:
+        os.makedirs(os.path.dirname(local_cfg), exist_ok=True)
+        with session_pool.session(config[PRIMARY]['wls_osuser'], primary_wls_nodes[0], config[PRIMARY]["wls_ssh_key"]) as session:
+            session.sftp().get(remotepath=config[DIRECTORIES]['WLS_CONFIG_PATH'], localpath=local_cfg)
+    except Exception as e:
+        logger.writelog("error", f"Failed copying config.xml file to [{local_cfg}]: {str(e)}")
+        return False
+    return True
+
+
+def direct_jobs(logger, config, data, instance):
+    # a direct job copies the data of a push job from the primary node that the matching pull job reads it from.
+    # Pull and push jobs are paired through the staging directory that one writes and the other reads, so direct
+    # jobs use the same primary and standby paths and excludes as a pull followed by a push
+    jobs = []
+    if any(ins in instance for ins in ['wls', 'all']) and any(dta in data for dta in ['shared_config', 'all']) \
+            and config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR']:
+        if not stage_config_xml(logger, config):
+            return jobs, False
+    pulls, pulls_successful = pull_jobs(logger, config, data, instance)
+    pushes, pushes_successful = push_jobs(logger, config, data, instance)
+    jobs_successful = pulls_successful and pushes_successful
+    sources = {os.path.normpath(job['destination_path']): job for job in pulls}
+    for push_job in pushes:
+        pull_job = sources.get(os.path.normpath(push_job['origin_path']))
+        if pull_job is None:
+            logger.writelog("error", f"No primary source found for [{push_job['name']}] (staging folder {push_job['origin_path']})")
+            jobs_successful = False
+            continue
+        job = dict(pull_job)
+        job.update({
+            "name": push_job['name'],
+            "description": f"Copying [{push_job['name']}] from primary [{PRIMARY}] host [{pull_job['host']}] "
+                           f"to standby [{STANDBY}] host [{push_job['host']}]",
+            "transfer_type": "direct",
+            "destination_path": push_job['destination_path'],
+            "remote_dirs": push_job['remote_dirs'],
+            "link_dest": None,
+            "depends_on": [],
+            "staging_path": push_job['origin_path'],
+            "target_username": push_job['username'],
+            "target_host": push_job['host'],
+            "target_key_path": push_job['key_path']
+        })
+        jobs.append(job)
+    return jobs, jobs_successful
+
+
+def direct(logger, config, data, instance, resume=False):
+    jobs, direct_successful = direct_jobs(logger, config, data, instance)
+    if not run_jobs(logger, config, jobs, resume):
+        direct_successful = False
+    return direct_successful
+
+
+def dry_run_job(job, staging_index=None):
+    # files and bytes a transfer job would send - returns (files, bytes, source of the figures).
+    # Pushes of staging trees that did not change since their last push to the host are not compared
+    tree = None
+    if job['transfer_type'] == 'push' and staging_index is not None:
+        tree = staging_index.tree(os.path.normpath(job['origin_path']), job['host'])
+        if tree is not None and tree['changed'] is not None and tree['pushed'] is not None and tree['pushed'] >= tree['changed']:
+            return 0, 0, "staging index, unchanged since last push"
+    delete = "--delete" if job['use_delete'] else ""
+    link_dest = f"--link-dest={job['link_dest']}" if job['link_dest'] else ""
+    exclude_list = " ".join([f'--exclude "{item}"' for item in job['exclude_list'] if item])
+    origin_path = job['origin_path'].rstrip("/") + "/"
+    destination_path = job['destination_path'].rstrip("/") + "/"
+    if job['transfer_type'] == 'pull':
+        origin = f"{job['username']}@{job['host']}:{origin_path}"
+        destination = destination_path
+    else:
+        origin = origin_path
+        destination = f"{job['username']}@{job['host']}:{destination_path}"
+    rsync_cmd = f'rsync -e "{ssh_options(job["username"], job["host"], job["key_path"])}" -a {delete} --dry-run --stats ' \
+                f'--modify-window=1 {link_dest} {exclude_list} {origin} {destination}'
+    run = start_process(shlex.split(rsync_cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, errors="replace")
+    output, error = run.communicate()
+    stats = parse_rsync_stats(output)
+    if run.returncode == 0 and 'files_transferred' in stats and 'file_bytes' in stats:
+        return stats['files_transferred'], stats['file_bytes'], "rsync dry run"
+    if tree is not None and tree['files'] is not None and tree['bytes'] is not None:
+        # the destination cannot be compared (typically, its parent directory does not exist yet): all the staged data is sent
+        return tree['files'], tree['bytes'], "staging index"
+    if job['transfer_type'] == 'push' and os.path.isdir(origin_path):
+        manifest = Manifest.from_local(origin_path, [item for item in job['exclude_list'] if item] + [f"{PARTIAL_DIR}/"], hash_files=False)
+        entries = [entry for entry in manifest.entries.values() if entry[0] == "f"]
+        return len(entries), sum(entry[1] for entry in entries), "staging contents"
+    raise Exception(f"rsync dry run exited with return code {run.returncode}: {error.strip()}")
+
+
+def plan(logger, config, data, instance, plan_action):
+    # dry run of a pull or push: files and bytes to send per job, durations estimated from the throughput
+    # measured in previous runs and the jobs that determine the total time with the configured parallelism
+    if plan_action == 'pull':
+        jobs, plan_successful = pull_jobs(logger, config, data, instance)
+    else:
+        jobs, plan_successful = push_jobs(logger, config, data, instance)
+        jobs = plan_relay(logger, config, jobs)
+    max_parallel = config.getint(OPTIONS, 'max_parallel_transfers', fallback=1)
+    max_per_host = config.getint(OPTIONS, 'max_transfers_per_host', fallback=1)
+    history_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{TRANSFER_HISTORY_FILE}"
+    try:
+        history = TransferHistory(history_path)
+    except Exception as e:
+        logger.writelog("warn", f"Could not read transfer history [{history_path}] - durations will not be estimated: {str(e)}")
+        history = None
+    # pushes are planned from the staging index - a plan does not create it
+    index_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{STAGING_INDEX_FILE}"
+    staging_index = open_staging_index(logger, config) if plan_action == 'push' and os.path.isfile(index_path) else None
+
+    def dry_run(job):
+        try:
+            return dry_run_job(job, staging_index), ""
+        except Exception as e:
+            return None, str(e)
+
+    logger.writelog("info", f"Running dry run of {len(jobs)} transfer jobs")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        dry_runs = list(executor.map(dry_run, jobs))
+    duration = lambda seconds: str(datetime.timedelta(seconds=int(seconds)))
+    durations = {}
+    total_files = 0
+    total_bytes = 0
+    unknown = []
+    for job, (figures, error) in zip(jobs, dry_runs):
+        if figures is None:
+            logger.writelog("error", f"[{job['name']}] {job['host']}: dry run failed: {error}")
+            plan_successful = False
+            unknown.append(job['name'])
+            continue
+        files, size, source = figures
+        total_files += files
+        total_bytes += size
+        rate = None
+        if history is not None:
+            rate = history.throughput(job['transfer_type'], job['host']) or history.throughput(job['transfer_type'])
+        if rate is None:
+            logger.writelog("info", f"[{job['name']}] {job['host']}: {files} files, {size} bytes to send ({source}) - "
+                                    f"no throughput measured yet, duration not estimated")
+            unknown.append(job['name'])
+            continue
+        durations[job['name']] = history.overhead(job['name'], job['host']) + size / rate
+        logger.writelog("info", f"[{job['name']}] {job['host']}: {files} files, {size} bytes to send ({source}) - "
+                                f"estimated {duration(durations[job['name']])} at {int(rate / 1024)} KiB/s")
+    schedule = TransferScheduler(logger, max_parallel, max_per_host).simulate(jobs, durations)
+    critical_path = TransferScheduler.critical_path(schedule)
+    logger.writelog("info", f"Total: {len(jobs)} transfer jobs, {total_files} files, {total_bytes} bytes to send")
+    logger.writelog("info", f"Estimated duration: {duration(max([entry['end'] for entry in schedule.values()] + [0]))} "
+                            f"with max_parallel_transfers = {max_parallel} and max_transfers_per_host = {max_per_host}")
+    if critical_path and durations:
+        logger.writelog("info", "Critical path: " + " -> ".join(f"{name} ({duration(durations.get(name, 0))})" for name in critical_path))
+    if unknown:
+        logger.writelog("warn", f"Durations not included in the estimate: {', '.join(unknown)}")
+    return plan_successful
+
+
+def lifecycle(logger, config, data, instance, cycles=0):
+    # continuous replication: every interval, check which pull jobs have a changed source (listing only,
+    # no file read), pull them and push their data types. The replication lag of each data type is
+    # written to the lifecycle status file after every cycle
+    interval = config.getint(OPTIONS, 'lifecycle_interval', fallback=300)
+    manifest_workers = config.getint(OPTIONS, 'manifest_workers', fallback=4)
+    status_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{LIFECYCLE_STATUS_FILE}"
+    lifecycle_status = LifecycleStatus(status_path, interval)
+    data_type_name = lambda job: f"{job['instance']}/{job['data_type']}"
+    job_key = lambda job: RunJournal.job_key(job)
+    # stop after the current cycle on SIGTERM or SIGINT
+    stop = threading.Event()
+    def request_stop(signum, frame):
+        logger.writelog("info", "Stop requested - finishing current cycle")
+        stop.set()
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    logger.writelog("info", f"Lifecycle replication started - interval {interval} seconds, status file {status_path}")
+    cycle = 0
+    all_successful = True
+    while not stop.is_set():
+        cycle += 1
+        check_time = time.time()
+        logger.writelog("info", f"Lifecycle cycle #{cycle}")
+        if ssh_multiplexer is not None:
+            ssh_multiplexer.refresh()
+        jobs, cycle_successful = pull_jobs(logger, config, data, instance)
+        # cheap change check: compare the source listing with the one of the last successful pull
+        fingerprints = {}
+        changed_jobs = []
+        for job in jobs:
+            try:
+                fingerprints[job_key(job)] = source_fingerprint(job, manifest_workers, ignore_volatile=True)
+            except Exception as e:
+                logger.writelog("warn", f"Could not check source of [{job['name']}] for changes: {str(e)}")
+                fingerprints[job_key(job)] = None
+            if fingerprints[job_key(job)] is None or fingerprints[job_key(job)] != lifecycle_status.fingerprint(job_key(job)):
+                changed_jobs.append(job)
+        data_types = set(data_type_name(job) for job in jobs)
+        changed_types = set(data_type_name(job) for job in changed_jobs)
+        for data_type in data_types:
+            lifecycle_status.checked(data_type, check_time, data_type in changed_types)
+        if changed_jobs:
+            logger.writelog("info", f"Changes found in: {', '.join(sorted(changed_types))} - pulling")
+            results = []
+            run_jobs(logger, config, changed_jobs, results=results)
+            failed_types = set()
+            for result in results:
+                if result['success']:
+                    lifecycle_status.set_fingerprint(job_key(result['job']), fingerprints[job_key(result['job'])])
+                else:
+                    failed_types.add(data_type_name(result['job']))
+                    lifecycle_status.failed(data_type_name(result['job']), f"pull of [{result['job']['name']}] failed: {result['reason']}")
+            for data_type in changed_types - failed_types:
+                lifecycle_status.pulled(data_type, check_time)
+            if failed_types:
+                cycle_successful = False
+        # push every data type pulled in this or in a previous cycle and not pushed yet
+        pending = lifecycle_status.pending_push()
+        if pending:
+            logger.writelog("info", f"Pushing: {', '.join(sorted(pending))}")
+            push_job_list, push_successful = push_jobs(logger, config, data, instance)
+            push_job_list = plan_relay(logger, config, [job for job in push_job_list if data_type_name(job) in pending])
+            results = []
+            run_jobs(logger, config, push_job_list, results=results)
+            failed_types = set()
+            for result in results:
+                if not result['success']:
+                    failed_types.add(data_type_name(result['job']))
+                    lifecycle_status.failed(data_type_name(result['job']), f"push of [{result['job']['name']}] failed: {result['reason']}")
+            for data_type in set(pending) - failed_types:
+                lifecycle_status.synced(data_type, pending[data_type], pushed=True)
+            if failed_types or not push_successful:
+                cycle_successful = False
+        # data types without changes or pending pushes have the current source state in the standby
+        for data_type in data_types - changed_types - set(pending):
+            lifecycle_status.synced(data_type, check_time)
+        try:
+            lifecycle_status.save(cycle)
+        except Exception as e:
+            logger.writelog("warn", f"Could not write lifecycle status file {status_path}: {str(e)}")
+        all_successful = all_successful and cycle_successful
+        if cycles and cycle >= cycles:
+            break
+        stop.wait(max(0, interval - (time.time() - check_time)))
+    logger.writelog("info", f"Lifecycle replication stopped after {cycle} cycles")
+    return all_successful
+
+
 def tnsnames(logger, config, tnsnames_action="all"):
     prem_wls_nodes = config[PREM]['wls_nodes'].split("\n")
     oci_wls_nodes = config[OCI]['wls_nodes'].split("\n")
@@ -1017,18 +2268,13 @@ def tnsnames(logger, config, tnsnames_action="all"):
     if tnsnames_action in ["pull", "all"]:
         logger.writelog("info", f"Retrieving tnsnames file from on-prem WLS node 1 [{config[TNS]['TNSNAMES_PATH']}]")
         # we're always pulling the file from on-prem wls node 1
-        ssh_client = paramiko.SSHClient()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh_client.connect(username=config[PREM]['wls_osuser'], hostname=prem_wls_nodes[0], key_filename=config[PREM]["wls_ssh_key"])
-        sftp_client = ssh_client.open_sftp()
         # get the file from on-prem
         try:
-            sftp_client.get(remotepath=config[TNS]['TNSNAMES_PATH'], localpath=tns_file_stage_path)
+            with session_pool.session(config[PREM]['wls_osuser'], prem_wls_nodes[0], config[PREM]["wls_ssh_key"]) as session:
+                session.sftp().get(remotepath=config[TNS]['TNSNAMES_PATH'], localpath=tns_file_stage_path)
         except Exception as e:
             logger.writelog("error", f"Failed retrieving tnsnames file [{config[TNS]['TNSNAMES_PATH']}] from on-prem WLS node 1: {repr(e)}")
             return False
-        sftp_client.close()
-        ssh_client.close()
         logger.writelog("info", f"Successfully retrieved tnsnames file [{config[TNS]['TNSNAMES_PATH']}] from on-prem WLS node 1")
     if tnsnames_action in ["push", "all"]:
         # check that tnsnames file exists in staging env
@@ -1048,36 +2294,71 @@ def tnsnames(logger, config, tnsnames_action="all"):
         # now push the file to all oci wls nodes
         for idx in range(len(oci_wls_nodes)):
             logger.writelog("info", f"Pushing updated tns file to OCI WLS node {idx +1}")
-            ssh_client = paramiko.SSHClient()
-            ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh_client.connect(username=config[OCI]['wls_osuser'], hostname=oci_wls_nodes[idx], key_filename=config[OCI]["wls_ssh_key"])
-            sftp_client = ssh_client.open_sftp()
-            # make sure the destination directory exist - create if not
-            logger.writelog("info", f"Checking tns destination directory exists: {config[TNS]['TNSNAMES_PATH']}")
+            # the session is discarded if the connection or the copy fail
             try:
-                sftp_client.stat(config[TNS]['TNSNAMES_PATH'])
-            except IOError as e:
-                if e.errno == errno.ENOENT:
-                    stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {tns_file_dir}")
-                    error = stderr.read().decode()
-                    if error:
-                        logger.writelog("error", f"Failed creating tns directory on OCI WLS node {idx + 1}: {error}")
-                        return False
-                else:
-                    logger.writelog("error", f"Cannot check if tns directory exists on OCI WLS node {idx +1}: {str(e)}")
-                    return False
-            # push updated tns file
-            try:
-                sftp_client.put(localpath=tns_file_stage_path, remotepath=config[TNS]['TNSNAMES_PATH'])
+                with session_pool.session(config[OCI]['wls_osuser'], oci_wls_nodes[idx], config[OCI]["wls_ssh_key"]) as session:
+                    ssh_client = session.client
+                    sftp_client = session.sftp()
+                    # make sure the destination directory exist - create if not
+                    logger.writelog("info", f"Checking tns destination directory exists: {config[TNS]['TNSNAMES_PATH']}")
+                    try:
+                        sftp_client.stat(config[TNS]['TNSNAMES_PATH'])
+                    except IOError as e:
+                        if e.errno == errno.ENOENT:
+                            stdin, stdout, stderr = ssh_client.exec_command(f"mkdir -p {tns_file_dir}")
+                            error = stderr.read().decode()
+                            if error:
+                                logger.writelog("error", f"Failed creating tns directory on OCI WLS node {idx + 1}: {error}")
+                                return False
+                        else:
+                            logger.writelog("error", f"Cannot check if tns directory exists on OCI WLS node {idx +1}: {str(e)}")
+                            return False
+                    # push updated tns file
+                    sftp_client.put(localpath=tns_file_stage_path, remotepath=config[TNS]['TNSNAMES_PATH'])
             except Exception as e:
-                logger.writelog("error", f"Failed pushing tsn file to OCI WLS node {idx +1}: {str(e)}")
+                logger.writelog("error", f"Failed pushing tns file to OCI WLS node {idx +1}: {str(e)}")
                 return False
-            sftp_client.close()
-            ssh_client.close()
             logger.writelog("info", f"Pushed updated tns file to OCI WLS node {idx +1}")
     return True
 
+def status(logger, config):
+    index_path = f"{config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']}/{STAGING_INDEX_FILE}"
+    if not os.path.isfile(index_path):
+        logger.writelog("error", f"Staging index [{index_path}] not found - run a pull first")
+        return False
+    try:
+        trees = StagingIndex(index_path).status()
+    except Exception as e:
+        logger.writelog("error", f"Could not read staging index [{index_path}]: {str(e)}")
+        return False
+    if not trees:
+        logger.writelog("info", "Staging index is empty - run a pull first")
+        return True
+    timestamp = lambda value: datetime.datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S") if value else "never"
+    age = lambda value: f"{datetime.timedelta(seconds=int(time.time() - value))} ago" if value else ""
+    base = config[DIRECTORIES]['STAGE_GOLD_COPY_BASE']
+    for tree in trees:
+        logger.writelog("info", f"[{tree['instance']}/{tree['data_type']}] {tree['root'].replace(base, '.', 1)}")
+        files = "unknown number of" if tree['files'] is None else tree['files']
+        size = "unknown size" if tree['bytes'] is None else f"{tree['bytes']} bytes"
+        logger.writelog("info", f"    Contents:       {files} files, {size}")
+        if tree['linked_bytes']:
+            logger.writelog("info", f"    Hard linked:    {tree['linked_bytes']} bytes shared with other staging directories")
+        logger.writelog("info", f"    Last pull:      {timestamp(tree['pulled'])} {age(tree['pulled'])}"
+                                f"{' from ' + tree['pulled_from'] if tree['pulled_from'] else ''}")
+        logger.writelog("info", f"    Last change:    {timestamp(tree['changed'])} {age(tree['changed'])}")
+        if not tree['pushes']:
+            logger.writelog("warn", "    Last push:      never")
+        for host, pushed in sorted(tree['pushes'].items()):
+            if tree['changed'] and pushed < tree['changed']:
+                logger.writelog("warn", f"    Last push:      {timestamp(pushed)} {age(pushed)} to {host} - staging has changed since, push pending")
+            else:
+                logger.writelog("info", f"    Last push:      {timestamp(pushed)} {age(pushed)} to {host} - up to date")
+    return True
+
+
 def run(debug, action, data=None, instance=None, wls_nodes=None, ohs_nodes=None, **kwargs):
+    global run_report
     if debug:
         log_level = 'DEBUG'
     else:
@@ -1085,6 +2366,7 @@ def run(debug, action, data=None, instance=None, wls_nodes=None, ohs_nodes=None,
         warnings.filterwarnings("ignore")
     logger = Logger(__file__, LOG_FILE, log_level)
     logger.writelog("info", f"Data replication started - action set to {action}")
+    run_report = RunReport(REPORT_FILE, action)
     logger.writelog("info", f"Primary environment set to {PRIMARY}")
     logger.writelog("info", "Reading configuration files")
     # check vars - defaults are 'all'
@@ -1108,9 +2390,29 @@ def run(debug, action, data=None, instance=None, wls_nodes=None, ohs_nodes=None,
         except Exception as e:
             logger.writelog("error", f"Could not read configuration file [{config_file}]: {str(e)}")
             myexit(1)
+    # env files of the standby targets that push fans out to
+    for name in config.get(OPTIONS, 'standby_targets', fallback='').replace(",", " ").split():
+        env_file, section = UTILS.target_env(name)
+        if config.has_section(section) or section == PRIMARY:
+            continue
+        try:
+            tmp_cfg = configparser.RawConfigParser()
+            with open(env_file, "r") as f:
+                tmp_cfg.read_file(f)
+                config = UTILS.update_config(config, tmp_cfg)
+        except Exception as e:
+            logger.writelog("error", f"Could not read configuration file [{env_file}]: {str(e)}")
+            myexit(1)
 
     logger.writelog("info", "Validating configuration file")
-    valid_config, errors = UTILS.validate_config(config, action, PRIMARY, STANDBY)
+    # plan validates the configuration of the action it plans
+    valid_config, errors = UTILS.validate_config(config, kwargs['plan_action'] if action == 'plan' else action, PRIMARY, STANDBY)
+    if valid_config and action == 'push':
+        for target in standby_targets(config):
+            if target != STANDBY:
+                target_valid, target_errors = UTILS.validate_config(config, action, PRIMARY, target)
+                valid_config = valid_config and target_valid
+                errors += target_errors
     if not valid_config:
         logger.writelog("error", "Errors found in configuration file:")
         for error in errors:
@@ -1145,23 +2447,49 @@ def run(debug, action, data=None, instance=None, wls_nodes=None, ohs_nodes=None,
             for error in errors:
                 logger.writelog("error", error)
             myexit(1)
-        action_successfull = pull(logger, config, data, instance)
+        start_ssh_multiplexer(logger, config, config[PRIMARY])
+        action_successfull = pull(logger, config, data, instance, kwargs.get('resume', False))
 
     elif action == 'push':
         logger.writelog("info", "Checking that all staging directories exist - exiting if not")
-        ohs_nodes = len(config[STANDBY]['ohs_nodes'].split("\n")) if config[STANDBY]['ohs_nodes'] else 0
-        wls_nodes = len(config[STANDBY]['wls_nodes'].split("\n"))
+        targets = standby_targets(config)
+        # the staging copy has to hold the data of the largest of the standby targets
+        ohs_nodes = max(len(config[target]['ohs_nodes'].split("\n")) if config[target]['ohs_nodes'] else 0 for target in targets)
+        wls_nodes = max(len(config[target]['wls_nodes'].split("\n")) for target in targets)
         if not check_create_dir_structure(logger, config, wls_nodes, ohs_nodes, check_only=True):
             logger.writelog("error", "Some or all staging directories missing - exiting")
             myexit(1)
-        logger.writelog("info", f"Checking connectivity to standby environment [{STANDBY}]")
-        conn_success, errors = check_connectivity(config[STANDBY])
-        if not conn_success:
-            logger.writelog("error", f"Errors encountered while checking connectivity to standby [{STANDBY}]:")
-            for error in errors:
-                logger.writelog("error", error)
+        for target in targets:
+            logger.writelog("info", f"Checking connectivity to standby environment [{target}]")
+            conn_success, errors = check_connectivity(config[target])
+            if not conn_success:
+                logger.writelog("error", f"Errors encountered while checking connectivity to standby [{target}]:")
+                for error in errors:
+                    logger.writelog("error", error)
+                myexit(1)
+        for target in targets:
+            start_ssh_multiplexer(logger, config, config[target])
+        action_successfull = push(logger, config, data, instance, kwargs.get('resume', False))
+
+    elif action == 'direct':
+        # the staging folder only keeps config.xml and the audit manifests, but the directory structure is still used
+        logger.writelog("info", "Checking that all staging directories exist - creating if not")
+        ohs_nodes = len(config[PRIMARY]['ohs_nodes'].split("\n")) if config[PRIMARY]['ohs_nodes'] else 0
+        wls_nodes = len(config[PRIMARY]['wls_nodes'].split("\n"))
+        if not check_create_dir_structure(logger, config, wls_nodes, ohs_nodes, check_only=False):
+            logger.writelog("error", "Errors encountered checking/creating directories - exiting")
             myexit(1)
-        action_successfull = push(logger, config, data, instance)
+        for env in [PRIMARY, STANDBY]:
+            logger.writelog("info", f"Checking connectivity to environment [{env}]")
+            conn_success, errors = check_connectivity(config[env])
+            if not conn_success:
+                logger.writelog("error", f"Errors encountered while checking connectivity to [{env}]:")
+                for error in errors:
+                    logger.writelog("error", error)
+                myexit(1)
+        start_ssh_multiplexer(logger, config, config[PRIMARY])
+        start_ssh_multiplexer(logger, config, config[STANDBY])
+        action_successfull = direct(logger, config, data, instance, kwargs.get('resume', False))
 
     elif action == "tnsnames":
         tnsnames_action = "all"
@@ -1198,13 +2526,58 @@ def run(debug, action, data=None, instance=None, wls_nodes=None, ohs_nodes=None,
                     logger.writelog("error", error)
                 myexit(1)
         action_successfull = tnsnames(logger, config, tnsnames_action)
+    elif action == 'status':
+        action_successfull = status(logger, config)
+    elif action == 'plan':
+        plan_action = kwargs['plan_action']
+        if plan_action == 'push':
+            logger.writelog("info", "Checking that all staging directories exist - exiting if not")
+            ohs_nodes = len(config[STANDBY]['ohs_nodes'].split("\n")) if config[STANDBY]['ohs_nodes'] else 0
+            wls_nodes = len(config[STANDBY]['wls_nodes'].split("\n"))
+            if not check_create_dir_structure(logger, config, wls_nodes, ohs_nodes, check_only=True):
+                logger.writelog("error", "Some or all staging directories missing - exiting")
+                myexit(1)
+        env = PRIMARY if plan_action == 'pull' else STANDBY
+        logger.writelog("info", f"Checking connectivity to environment [{env}]")
+        conn_success, errors = check_connectivity(config[env])
+        if not conn_success:
+            logger.writelog("error", f"Errors encountered while checking connectivity to [{env}]:")
+            for error in errors:
+                logger.writelog("error", error)
+            myexit(1)
+        start_ssh_multiplexer(logger, config, config[env])
+        action_successfull = plan(logger, config, data, instance, plan_action)
     elif action == 'lifecycle':
-        logger.writelog("info", "Feature not yet implemented")
+        logger.writelog("info", "Checking that all staging directories exist - creating if not")
+        ohs_nodes = len(config[PRIMARY]['ohs_nodes'].split("\n")) if config[PRIMARY]['ohs_nodes'] else 0
+        wls_nodes = len(config[PRIMARY]['wls_nodes'].split("\n"))
+        if not check_create_dir_structure(logger, config, wls_nodes, ohs_nodes, check_only=False):
+            logger.writelog("error", "Errors encountered checking/creating directories - exiting")
+            myexit(1)
+        for env in [PRIMARY, STANDBY]:
+            logger.writelog("info", f"Checking connectivity to environment [{env}]")
+            conn_success, errors = check_connectivity(config[env])
+            if not conn_success:
+                logger.writelog("error", f"Errors encountered while checking connectivity to [{env}]:")
+                for error in errors:
+                    logger.writelog("error", error)
+                myexit(1)
+        # connections to both environments are kept open for the whole run
+        start_ssh_multiplexer(logger, config, config[PRIMARY])
+        start_ssh_multiplexer(logger, config, config[STANDBY])
+        action_successfull = lifecycle(logger, config, data, instance, kwargs.get('cycles', 0) or 0)
 
     else:
         logger.writelog("error", f"Action [{action}] does not exist")
         myexit(1)
 
+    stop_ssh_multiplexer()
+    session_pool.close_all()
+    try:
+        run_report.finish(action_successfull)
+        logger.writelog("info", f"Run report written to {REPORT_FILE}")
+    except Exception as e:
+        logger.writelog("warn", f"Could not write run report [{REPORT_FILE}]: {str(e)}")
     if action_successfull:
         logger.writelog("info", f"Action [{action}] completed successfully")
     else:
@@ -1233,15 +2606,16 @@ Get action help by running the following:\n \
                             dest="debug",
                             help="set logging to debug")
     arg_parser.add_argument("-v", "--version", action='version', version=__version__)
-    push_pull_parser = argparse.ArgumentParser(add_help=False)
-    push_pull_parser.add_argument("-i", "--instance", choices=["ohs", "wls"],
+    # instance and data selection, shared by push, pull and lifecycle
+    data_parser = argparse.ArgumentParser(add_help=False)
+    data_parser.add_argument("-i", "--instance", choices=["ohs", "wls"],
                                 metavar="INSTANCE",
                                 action="append",
                                 type=lambda val: val.lower(),
                                 help="Select what instance to replicate:\nINSTANCE:\n \
 OHS - replicate only OHS data\n \
 WLS - replicate only WLS data\n")
-    push_pull_parser.add_argument("-d", "--data", choices=["products", "shared_config", "private_config"],
+    data_parser.add_argument("-d", "--data", choices=["products", "shared_config", "private_config"],
                             metavar="DATA",
                             action="append",
                             type=lambda val: val.lower(),
@@ -1249,6 +2623,10 @@ WLS - replicate only WLS data\n")
 products       - replicate products data\n \
 private_config - replicate private config data\n \
 shared_config  - replicate shared config data - only applies to WLS")
+    push_pull_parser = argparse.ArgumentParser(add_help=False, parents=[data_parser])
+    push_pull_parser.add_argument("--resume", action="store_true",
+                                  help="Resume an interrupted run: skip transfer jobs already completed\n \
+whose source has not changed since")
     push_pull_parser.set_defaults(func=run)
     subparsers = arg_parser.add_subparsers(help="Action to execute",metavar="ACTION", dest='action')
     subparsers.required = True
@@ -1278,9 +2656,44 @@ shared_config  - replicate shared config data - only applies to WLS")
                                         epilog="NOTE:\n \
 - If no INSTANCE is supplied, push will be executed on all INSTANCEs\n \
 - If no DATA is supplied, all DATA will be pushed")
-    
-    lcycle_parser = subparsers.add_parser('lifecycle', help="Lifecycle operations")
+
+    direct_parser = subparsers.add_parser('direct',
+                                          description="Copy data from primary straight to secondary: rsync runs in each primary node "
+                                                      "and sends the data to the matching secondary node",
+                                          help="Copy data from primary to secondary without staging it",
+                                          parents=[push_pull_parser],
+                                          formatter_class=argparse.RawTextHelpFormatter,
+                                          epilog="NOTE:\n \
+- DIRECT_SSH_KEY must be set in replication.properties\n \
+- Only config.xml and an audit manifest of each transfer are kept in the staging folder")
+
+    lcycle_parser = subparsers.add_parser('lifecycle',
+                                          description="Continuous replication: pull the data that changed in primary and push it to secondary, "
+                                                      "every LIFECYCLE_INTERVAL seconds",
+                                          help="Lifecycle operations",
+                                          parents=[data_parser],
+                                          formatter_class=argparse.RawTextHelpFormatter,
+                                          epilog="NOTE:\n \
+- Runs until stopped with SIGTERM or Ctrl+C, unless --cycles is supplied\n \
+- The replication lag of each data type is written to lifecycle_status.json in the staging folder")
+    lcycle_parser.add_argument("--cycles", type=int, default=0, metavar="N",
+                               help="Stop after N cycles (for example, to run a single cycle from cron)")
     lcycle_parser.set_defaults(func=run)
+    status_parser = subparsers.add_parser('status',
+                                          description="Report when each staging directory was last pulled, changed and pushed",
+                                          help="Report staging environment status")
+    status_parser.set_defaults(func=run)
+    plan_parser = subparsers.add_parser('plan',
+                                        description="Dry run of a pull or push: files and bytes to send and estimated duration",
+                                        help="Estimate a pull or push without transferring any data",
+                                        parents=[data_parser],
+                                        formatter_class=argparse.RawTextHelpFormatter,
+                                        epilog="NOTE:\n \
+- Durations are estimated from the throughput of previous runs (transfer_history.json in the staging folder)\n \
+- The critical path is the chain of jobs that determines the total time with the configured parallelism")
+    plan_parser.add_argument("plan_action", choices=["pull", "push"], metavar="PLAN_ACTION",
+                             help="Action to plan: pull or push")
+    plan_parser.set_defaults(func=run)
     tnsnames_parser = subparsers.add_parser('tnsnames', 
                                             help="Retrieve tnsnames file from on-prem, update values with OCI details and push to all OCI WLS nodes",
                                             epilog="NOTE:\n \
@@ -88,17 +88,22 @@ try:
     import warnings
     import datetime
     import argparse
-    import paramiko
     import pathlib
     import shutil
     import glob
     import sys
     import re
     import os
+    import concurrent.futures
     sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}"))
     from Logger import Logger
     from Utils import Utils as UTILS
     from Utils import Constants as CONSTANTS
+    from SessionPool import SessionPool
+    from HostFacts import facts_command
+    from HostFacts import parse_facts
+    from HostFacts import node_differences
+    from HostFacts import memory_gb
 except ImportError as e:
     raise ImportError(f"Failed to import module:\n{str(e)} \
         \nMake sure all required modules are installed before running this script")
@@ -200,23 +205,32 @@ def prompt_user_selection(options_list, prompt="Please select a value:", help=""
         valid_option = True
     return options_list[opt]
 
-def run_remote_command(ssh_client, command):
-    """Run a command on a remote host via paramiko
+def collect_facts(username, host, key_path, group, paths=[], addresses=[]):
+    """Collect the facts of a host with a single remote command
 
     Args:
-        ssh_client (paramiko.SSHClient): Paramiko SSClient object with connection to remote host
-        command (str): Command to run.
+        username (str): OS user
+        host (str): Host IP address
+        key_path (str): Path to the ssh private key
+        group (str): OS group whose ID is collected
+        paths (list[str], optional): Paths whose mount point is collected. Defaults to [].
+        addresses (list[str], optional): Host names resolved in the host. Defaults to [].
 
     Returns:
-        str: Command output
+        dict: Facts of the host, empty if they could not be collected
     """
-    stdin, stdout, stderr = ssh_client.exec_command(command)
-    error = stderr.read().decode()
+    try:
+        with session_pool.session(username, host, key_path) as session:
+            _, stdout, stderr = session.client.exec_command(facts_command(group, paths, addresses))
+            output = stdout.read().decode()
+            error = stderr.read().decode()
+        facts = parse_facts(output)
+    except Exception as e:
+        logger.writelog("error", f"Failed collecting facts of host [{host}]: {str(e)}")
+        return {}
     if error:
-        logger.writelog("error", f"Failed running command [{command}]")
-        logger.writelog("error", error)
-        return ""
-    return stdout.read().decode().strip()
+        logger.writelog("debug", f"Errors collecting facts of host [{host}]: {error.strip()}")
+    return facts
 
 def clean_sysinfo(sysinfo):
     """Traverse discovery results dict and prompts user to select correct value where required
@@ -335,35 +349,31 @@ if not config[PREM]['ohs_nodes']:
     OHS_USED = False
 if OHS_USED:
     ohs_nodes_ips = config[PREM]['ohs_nodes'].splitlines()
+# ssh sessions to on-prem hosts - opened once and reused by all the discovery commands
+session_pool = SessionPool()
 # if we have connectivity to on prem check that it works
 if not NO_CONNECTIVITY:
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     # check that we have ssh connectivity to prem ohs hosts if OHS is used
     if OHS_USED:
         logger.writelog("debug", "Testing ssh connectivity to on-prem OHS node 1")
         try:
-            ssh.connect(hostname=ohs_nodes_ips[0],
-                        username=config[PREM]['ohs_osuser'],
-                        key_filename=config[PREM]['ohs_ssh_key'])
+            with session_pool.session(config[PREM]['ohs_osuser'], ohs_nodes_ips[0], config[PREM]['ohs_ssh_key']):
+                pass
         except Exception as e:
             logger.writelog("error", "Cannot connect to on-prem OHS node 1")
             logger.writelog("error", str(e))
             myexit(1)
-        ssh.close()
 
     # check that we have ssh connectivity to prem wls nodes
     
     logger.writelog("debug", "Testing ssh connectivity to on-prem WLS node 1")
     try:
-        ssh.connect(hostname=wls_nodes_ips[0],
-                    username=config[PREM]['wls_osuser'],
-                    key_filename=config[PREM]['wls_ssh_key'])
+        with session_pool.session(config[PREM]['wls_osuser'], wls_nodes_ips[0], config[PREM]['wls_ssh_key']):
+            pass
     except Exception as e:
         logger.writelog("error", "Cannot connect to on-prem WLS node 1")
         logger.writelog("error", str(e))
         myexit(1)
-    ssh.close()
 
 # work out config.xml path from properties file (shared or private depending on info supplied)
 # on-prem path
@@ -466,6 +476,42 @@ coherence_unicast_ports = [str(x) for x in coherence_unicast_ports]
 logger.writelog("debug", f"Coherence unicast ports: {coherence_unicast_ports}")
 add_info("coherence_unicast_ports", "oci-network-ports-coherence_unicast/opt", "Coherence unicast ports", coherence_unicast_ports, True)
 
+# wls listen addresses
+# first get admin server name 
+adm_server_name = root.find("xmlns:admin-server-name", namespaces).text
+# get all server names so we'll be able to filter out the admin server
+all_server_names = [x.text for x in root.findall("xmlns:server/xmlns:name", namespaces)]
+# get all listen addresses from config.xml that are not the admin server
+# the loop is a workaround because the != operator in etree xpath support was added in python 3.10
+# so it is not currently available in the oci version of python 
+wls_listen_addresses = []
+for name in all_server_names:
+    if name != adm_server_name:
+        wls_listen_addresses.append(root.find(f"xmlns:server/[xmlns:name='{name}']/xmlns:listen-address", namespaces).text)
+# remove duplicates 
+wls_listen_addresses = list(set(wls_listen_addresses))
+
+# facts of all the WLS and OHS nodes - one remote command per node, run in all the nodes at the same time
+if not NO_CONNECTIVITY:
+    wls_paths = [config[DIRECTORIES][item] for item in ['WLS_SHARED_RUNTIME_DIR', 'WLS_SHARED_CONFIG_DIR', 'WLS_PRODUCTS', 'WLS_PRIVATE_CONFIG_DIR'] 
+                 if config[DIRECTORIES][item]]
+    facts_requests = {("WLS", ip): (config[PREM]['wls_osuser'], ip, config[PREM]['wls_ssh_key'], config[PREM]['wls_osgroup'], wls_paths, wls_listen_addresses)
+                      for ip in wls_nodes_ips}
+    if OHS_USED:
+        facts_requests.update({("OHS", ip): (config[PREM]['ohs_osuser'], ip, config[PREM]['ohs_ssh_key'], config[PREM]['ohs_osgroup'])
+                               for ip in ohs_nodes_ips})
+    logger.writelog("info", f"Collecting facts of {len(facts_requests)} on-prem nodes")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(facts_requests)) as executor:
+        facts_futures = {node: executor.submit(collect_facts, *request) for node, request in facts_requests.items()}
+    node_facts = {node: future.result() for node, future in facts_futures.items()}
+    wls_facts = [node_facts[("WLS", ip)] for ip in wls_nodes_ips]
+    ohs_facts = [node_facts[("OHS", ip)] for ip in ohs_nodes_ips] if OHS_USED else []
+    # OCI instances are created from the values of node 1 - nodes that differ from it are reported
+    for tier, tier_facts in [("WLS", wls_facts), ("OHS", ohs_facts)]:
+        for fact, values in node_differences(tier_facts):
+            logger.writelog("warn", f"{tier} nodes have different {fact}: " +
+                                    ", ".join([f"node {idx + 1} [{value}]" for idx, value in enumerate(values) if value is not None]))
+
 # WLS info
 # number of wls nodes
 logger.writelog("debug", f"Number of WLS nodes: {len(wls_nodes_ips)}")
@@ -549,39 +595,32 @@ if NO_CONNECTIVITY:
     add_info("wls_private_config_mount", "prem-wls-mountpoints-private/path", "Weblogic private config mountpoint", wls_private_config_mount, False)
 
 else:
-    # connect to on prem wls and get information if we have connectivity 
-    # open ssh connection to WLS node 1 to run remote discovery commands 
-    wls_host = wls_nodes_ips[0]
-    wls_username = config[PREM]['wls_osuser']
-    wls_key = config[PREM]['wls_ssh_key']
-    ssh_wls_client = paramiko.SSHClient()
-    ssh_wls_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    ssh_wls_client.connect(hostname=wls_host, username=wls_username, key_filename=wls_key)
+    # use the facts collected from WLS node 1 if we have connectivity 
+    wls_node1_facts = wls_facts[0]
+    wls_mounts = wls_node1_facts.get('mounts', {})
     # get os versino
-    wls_os_version = run_remote_command(ssh_wls_client, "grep ^VERSION= /etc/os-release")
+    wls_os_version = wls_node1_facts.get('os_version', '')
     if wls_os_version: 
-        wls_os_version = wls_os_version.split('=')[1].strip('"')
         logger.writelog("debug", f"WLS OS version to be used in OCI: OL {wls_os_version}")
         add_info("wls_os_version", "oci-wls-os_version/opt", "Weblogic OS version to be used in OCI (Oracle Linux)", wls_os_version, False)
     else:
         logger.writelog("warn", "Failed checking OS version on WLS node 1")
     # get CPU count
-    wls_cpu_count = run_remote_command(ssh_wls_client, 'grep -c processor /proc/cpuinfo')
+    wls_cpu_count = wls_node1_facts.get('cpu_count', '')
     if wls_cpu_count:
         logger.writelog("debug", f"WLS CPU count to be used in OCI: {wls_cpu_count}")
         add_info("wls_cpu_count", "oci-wls-ocpu/int", "Weblogic CPU count", wls_cpu_count, False)
     else:
         logger.writelog("warn", "Failed getting CPU count from wls node 1")
     # get wls host memory
-    wls_memory = run_remote_command(ssh_wls_client, 'grep MemTotal /proc/meminfo')
-    if wls_memory:
-        wls_memory = int(re.search(r"MemTotal:\s*(\d*)", wls_memory)[1]) // 1000 // 1000
+    wls_memory = memory_gb(wls_node1_facts)
+    if wls_memory is not None:
         logger.writelog("debug", f"WLS memory to be used in OCI: {wls_memory}")
         add_info("wls_memory", "oci-wls-memory/int", "Weblogic node memory", wls_memory, False)
     else:
         logger.writelog("warn", "Failed getting memory info from wls node 1")
     # wls owner OS  user id
-    wls_user_uid = run_remote_command(ssh_wls_client, 'id -u')
+    wls_user_uid = wls_node1_facts.get('uid', '')
     if wls_user_uid:
         logger.writelog("debug", f"Weblogic {config[PREM]['wls_osuser']} user ID: {wls_user_uid}")
         add_info("wls_user_name", "prem-wls-user_name/name", f"Weblogic owner OS user name", config[PREM]['wls_osuser'], False)
@@ -589,7 +628,7 @@ else:
     else:
         logger.writelog("warn", f"Failed getting {config[PREM]['wls_osuser']} user ID from wls node 1")
     # wls owner OS group id
-    wls_group_gid = run_remote_command(ssh_wls_client, f"getent group {config[PREM]['wls_osgroup']} | cut -d: -f3")
+    wls_group_gid = wls_node1_facts.get('gid', '')
     if wls_group_gid:
         logger.writelog("debug", f"Weblogic {config[PREM]['wls_osgroup']} group ID: {wls_group_gid}")
         add_info("wls_group_name", "prem-wls-group_name/name", f"Weblogic owner OS group name", config[PREM]['wls_osgroup'], False)
@@ -599,7 +638,7 @@ else:
 
     # wls shared runtime mountpoint
     if config[DIRECTORIES]['WLS_SHARED_RUNTIME_DIR']: 
-        wls_shared_runtime_mount = run_remote_command(ssh_wls_client, f"df --output=target {config[DIRECTORIES]['WLS_SHARED_RUNTIME_DIR']} | tail -1")
+        wls_shared_runtime_mount = wls_mounts.get(config[DIRECTORIES]['WLS_SHARED_RUNTIME_DIR'], '')
         if wls_shared_runtime_mount:
             logger.writelog("debug", f"Weblogic shared runtime mountpoint: {wls_shared_runtime_mount}")
             add_info("wls_shared_runtime_mount", "prem-wls-mountpoints-runtime/opt", "Weblogic shared runtime mountpoint", wls_shared_runtime_mount, False)
@@ -610,7 +649,7 @@ else:
         add_info("wls_shared_runtime_mount", "prem-wls-mountpoints-runtime/opt", "", "", False)
     # wls shared config mountpoint - only if shared config supplied otherwise empty value
     if config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR']:
-        wls_shared_config_mount = run_remote_command(ssh_wls_client, f"df --output=target {config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR']} | tail -1")
+        wls_shared_config_mount = wls_mounts.get(config[DIRECTORIES]['WLS_SHARED_CONFIG_DIR'], '')
         if not wls_shared_config_mount:
             logger.writelog("warn", "Failed getting weblogic shared config mountpoint from wls node 1")
     else:
@@ -618,7 +657,7 @@ else:
         add_info("wls_shared_config_mount", "prem-wls-mountpoints-config/opt", "", "", False)
         
     # wls products mountpoint
-    wls_products_mountpoint = run_remote_command(ssh_wls_client, f"df --output=target {config[DIRECTORIES]['WLS_PRODUCTS']} | tail -1")
+    wls_products_mountpoint = wls_mounts.get(config[DIRECTORIES]['WLS_PRODUCTS'], '')
     if wls_products_mountpoint:
         if wls_products_mountpoint == "/":
             logger.writelog("debug", f"WLS products mounted on root (/) - will use {config[DIRECTORIES]['WLS_PRODUCTS']} for OCI input")
@@ -626,7 +665,7 @@ else:
     else:
         logger.writelog("warn", f"Failed getting weblogic products mountpoint from wls node 1")
     # wls private config mountpoint
-    wls_private_config_mount = run_remote_command(ssh_wls_client, f"df --output=target {config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR']} | tail -1")
+    wls_private_config_mount = wls_mounts.get(config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR'], '')
     if wls_private_config_mount:
         if wls_private_config_mount == "/":
             logger.writelog("debug", f"WLS private config mounted on root (/) - will use {config[DIRECTORIES]['WLS_PRIVATE_CONFIG_DIR']} for OCI input")
@@ -655,23 +694,6 @@ else:
     logger.writelog("debug", f"Weblogic private config mountpoint: {wls_private_config_mount}")
     add_info("wls_private_config_mount", "prem-wls-mountpoints-private/path", "Weblogic private config mountpoint", wls_private_config_mount, False)
 
-    ssh_wls_client.close()
-
-
-# wls listen addresses
-# first get admin server name 
-adm_server_name = root.find("xmlns:admin-server-name", namespaces).text
-# get all server names so we'll be able to filter out the admin server
-all_server_names = [x.text for x in root.findall("xmlns:server/xmlns:name", namespaces)]
-# get all listen addresses from config.xml that are not the admin server
-# the loop is a workaround because the != operator in etree xpath support was added in python 3.10
-# so it is not currently available in the oci version of python 
-wls_listen_addresses = []
-for name in all_server_names:
-    if name != adm_server_name:
-        wls_listen_addresses.append(root.find(f"xmlns:server/[xmlns:name='{name}']/xmlns:listen-address", namespaces).text)
-# remove duplicates 
-wls_listen_addresses = list(set(wls_listen_addresses))
 
 if NO_CONNECTIVITY:
     # request wls fwdn listen addresses from user if there's no connectivity to on prem
@@ -679,38 +701,27 @@ if NO_CONNECTIVITY:
         address = UTILS.get_user_input(f"Please enter Weblogic node {node_idx + 1} FQDN listen address", value_type="fqdn")
         add_info(f"wls_node_{node_idx + 1}_listen_address", "", f"Weblogic node {node_idx + 1} listen address", address, False)
 else:
-    # else connect to on prem and work out the fwdn listen addresses
+    # else work out the fwdn listen addresses from the facts collected from each node
     for node_idx in range(0, len(wls_nodes_ips)):
-        # connect to node
-        node_ssh = paramiko.SSHClient()
-        node_ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        node_ssh.connect(hostname=wls_nodes_ips[node_idx], username=wls_username, key_filename=wls_key)
-        # get all IP addresses of node
-        all_ips_cmd = "hostname --all-ip-addresses"
-        _, node_ips, stderr = node_ssh.exec_command(all_ips_cmd)
-        node_ips = node_ips.read().decode().strip()
+        # all IP addresses of node
+        node_ips = wls_facts[node_idx].get('ips', [])
         if not node_ips:
-            logger.writelog("warn", f"Failed getting IP addresses of WLS node {node_idx} [IP: {wls_nodes_ips[node_idx]}] using command '{all_ips_cmd}'")
-        else:
-            node_ips = [x for x in node_ips.split(" ") if x]
-        # get domain from node
-        dom_cmd = "hostname --fqdn"
-        _, domain, stderr = node_ssh.exec_command(dom_cmd)
-        domain = domain.read().decode().strip()
+            logger.writelog("warn", f"Failed getting IP addresses of WLS node {node_idx + 1} [IP: {wls_nodes_ips[node_idx]}] using command 'hostname --all-ip-addresses'")
+        # domain of node
+        domain = wls_facts[node_idx].get('fqdn', '')
         if not domain:
-            logger.writelog("warn", f"Executing command '{dom_cmd}' resulted in blank output - cannot determine domain")
+            logger.writelog("warn", f"Executing command 'hostname --fqdn' on WLS node {node_idx + 1} resulted in blank output - cannot determine domain")
         else:
-            domain = re.match(r".*?(\..*)$", domain)[1]
-        # get IP of all listen addresses and match with node IPs
+            domain_match = re.match(r".*?(\..*)$", domain)
+            domain = domain_match[1] if domain_match else ""
+        # IPs of all listen addresses, resolved in the node, matched with node IPs
         for address in wls_listen_addresses:
-            _, stdout, stderr = node_ssh.exec_command(f"getent hosts {address} | cut -d' ' -f1")
-            address_ip = stdout.read().decode().strip()
-            if address_ip in node_ips:
+            address_ips = wls_facts[node_idx].get('hosts', {}).get(address, [])
+            if any(address_ip in node_ips for address_ip in address_ips):
                 if "." not in address:
                     address += domain
                 logger.writelog("debug", f"WLS node {node_idx + 1} listen address: {address}")
                 add_info(f"wls_node_{node_idx + 1}_listen_address", "", f"Weblogic node {node_idx + 1} listen address", address, False)
-        node_ssh.close()
 
 # WLS jdk path 
 add_info("wls_jdk_path", "prem-wls-jdk_path/opt", "", config[DIRECTORIES]['WLS_JDK_DIR'], False)
@@ -751,41 +762,32 @@ if OHS_USED:
         add_info("ohs_group_name", "prem-ohs-group_name/opt", f"OHS owner OS group name", config[PREM]['ohs_osgroup'], False)
         add_info("ohs_group_gid", "prem-ohs-group_gid/opt", f"OHS {config[PREM]['ohs_osgroup']} group ID", ohs_group_gid, False)
     else:
-        # open ssh connection to OHS node 1 to run remote discovery commands 
-        ohs_host = ohs_nodes_ips[0]
-        ohs_username = config[PREM]['ohs_osuser']
-        ohs_key = config[PREM]['ohs_ssh_key']
-        ssh_ohs_client = paramiko.SSHClient()
-        ssh_ohs_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh_ohs_client.connect(hostname=ohs_host, username=ohs_username, key_filename=ohs_key)
+        # use the facts collected from OHS node 1
+        ohs_node1_facts = ohs_facts[0]
         # ohs os version
-        ohs_os_version = run_remote_command(ssh_ohs_client, "grep ^VERSION= /etc/os-release")
+        ohs_os_version = ohs_node1_facts.get('os_version', '')
         if ohs_os_version: 
-            ohs_os_version = ohs_os_version.split('=')[1]
-            if '"' in ohs_os_version:
-                ohs_os_version = ohs_os_version.strip('"')
             logger.writelog("debug", f"OHS OS version to be used in OCI: OL {ohs_os_version}")
             add_info("ohs_os_version", "oci-ohs-os_version/opt", "OHS OS version to be used in OCI (Oracle Linux)", ohs_os_version, False)
         else:
             logger.writelog("warn", "Failed checking OS version on OHS node 1")
         # cpu count 
 
-        ohs_cpu_count = run_remote_command(ssh_ohs_client, 'grep -c processor /proc/cpuinfo')
+        ohs_cpu_count = ohs_node1_facts.get('cpu_count', '')
         if ohs_cpu_count:
             logger.writelog("debug", f"OHS CPU count to be used in OCI: {ohs_cpu_count}")
             add_info("ohs_cpu_count", "oci-ohs-ocpu/opt", "OHS CPU count", ohs_cpu_count, False)
         else:
             logger.writelog("warn", "Failed getting CPU count from ohs node 1")
         # ohs memory
-        ohs_memory = run_remote_command(ssh_ohs_client, 'grep MemTotal /proc/meminfo')
-        if ohs_memory:
-            ohs_memory = int(re.search(r"MemTotal:\s*(\d*)", ohs_memory)[1]) // 1000 // 1000
+        ohs_memory = memory_gb(ohs_node1_facts)
+        if ohs_memory is not None:
             logger.writelog("debug", f"OHS memory to be used in OCI: {ohs_memory}")
             add_info("ohs_memory", "oci-ohs-memory/opt", "OHS node memory", ohs_memory, False)
         else:
             logger.writelog("warn", "Failed getting memory info from osh node 1")
         # ohs owner OS user id
-        ohs_user_uid = run_remote_command(ssh_ohs_client, 'id -u')
+        ohs_user_uid = ohs_node1_facts.get('uid', '')
         if ohs_user_uid:
             logger.writelog("debug", f"OHS {config[PREM]['ohs_osuser']} user ID: {ohs_user_uid}")
             add_info("ohs_user_name", "prem-ohs-user_name/opt", f"OHS owner OS user name", config[PREM]['ohs_osuser'], False)
@@ -793,14 +795,13 @@ if OHS_USED:
         else:
             logger.writelog("warn", f"Failed getting {config[PREM]['ohs_osuser']} user ID from ohs node 1")
         # ohs owner OS group id
-        ohs_group_gid = run_remote_command(ssh_ohs_client, f"getent group {config[PREM]['ohs_osgroup']} | cut -d: -f3")
+        ohs_group_gid = ohs_node1_facts.get('gid', '')
         if ohs_group_gid:
             logger.writelog("debug", f"OHS {config[PREM]['ohs_osgroup']} group ID: {ohs_group_gid}")
             add_info("ohs_group_name", "prem-ohs-group_name/opt", f"OHS owner OS group name", config[PREM]['ohs_osgroup'], False)
             add_info("ohs_group_gid", "prem-ohs-group_gid/opt", f"OHS {config[PREM]['ohs_osgroup']} group ID", ohs_group_gid, False)
         else:
             logger.writelog("warn", f"Failed getting {config[PREM]['ohs_osgroup']} group ID from ohs node 1")
-        ssh_ohs_client.close()
 
     # get list of moduleconf files
     ohs_config = config[DIRECTORIES]['STAGE_OHS_PRIVATE_CONFIG_DIR']
@@ -942,6 +943,8 @@ if OHS_USED:
         ohs_addr_arr.append(discovery_sysinfo[f"ohs_node_{i}_listen_address"]["value"])
     add_info("ohs_addr_arr", "prem-ohs-listen_addresses/opt", "", ohs_addr_arr, True)
 
+session_pool.close_all()
+
 # write results to file
 write_results(discovery_sysinfo)
 
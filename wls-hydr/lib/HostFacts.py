@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+
+## HostFacts.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Facts of the on-prem hosts used by Discovery.py (OS version, CPUs, memory, user and group IDs, mount points,
+### addresses), collected as JSON with a single remote command per host
+
+import json
+import shlex
+
+# run with: GROUP NUMBER_OF_PATHS PATH... ADDRESS...
+# prints one JSON object with the facts of the host. Facts that cannot be read are empty strings
+FACTS_SCRIPT = r"""
+group="$1"; npaths="$2"; shift 2
+paths=("${@:1:$npaths}"); shift "$npaths"
+esc() {
+    local s="$1"
+    s="${s//\\/\\\\}"; s="${s//\"/\\\"}"; s="${s//$'\t'/ }"; s="${s//$'\r'/}"; s="${s//$'\n'/ }"
+    printf '"%s"' "$s"
+}
+printf '{"os_version":%s' "$(esc "$(sed -n 's/^VERSION=//p' /etc/os-release 2>/dev/null | tr -d '"')")"
+printf ',"cpu_count":%s' "$(esc "$(grep -c processor /proc/cpuinfo 2>/dev/null)")"
+printf ',"mem_total_kb":%s' "$(esc "$(awk '/^MemTotal:/ {print $2}' /proc/meminfo 2>/dev/null)")"
+printf ',"uid":%s' "$(esc "$(id -u)")"
+printf ',"gid":%s' "$(esc "$(getent group "$group" | cut -d: -f3)")"
+printf ',"fqdn":%s' "$(esc "$(hostname --fqdn 2>/dev/null)")"
+printf ',"ips":%s' "$(esc "$(hostname --all-ip-addresses 2>/dev/null)")"
+printf ',"mounts":{'
+sep=""
+for path in "${paths[@]}"; do
+    printf '%s%s:%s' "$sep" "$(esc "$path")" "$(esc "$(df --output=target -- "$path" 2>/dev/null | tail -n +2 | tail -1)")"
+    sep=","
+done
+printf '},"hosts":{'
+sep=""
+for address in "$@"; do
+    printf '%s%s:%s' "$sep" "$(esc "$address")" "$(esc "$(getent hosts "$address" | awk '{print $1}')")"
+    sep=","
+done
+printf '}}\n'
+"""
+# facts that are expected to be the same in all the nodes of a tier
+COMPARED_FACTS = ["os_version", "cpu_count", "mem_total_kb", "uid", "gid"]
+
+
+def facts_command(group, paths=[], addresses=[]):
+    """Command that prints the facts of a host
+
+    Args:
+        group (str): OS group whose ID is collected
+        paths (list[str], optional): Paths whose mount point is collected. Defaults to [].
+        addresses (list[str], optional): Host names resolved in the host. Defaults to [].
+
+    Returns:
+        str: Command to be run on the remote host
+    """
+    arguments = " ".join([shlex.quote(item) for item in [group, str(len(paths))] + list(paths) + list(addresses)])
+    return f"bash -c {shlex.quote(FACTS_SCRIPT)} hydr {arguments}"
+
+
+def parse_facts(output):
+    """Parse the output of the facts command
+
+    Args:
+        output (str): Command output
+
+    Raises:
+        ValueError: If the output has no facts
+
+    Returns:
+        dict: Facts - ips is the list of addresses of the host and hosts maps each host name to the
+            list of addresses it resolves to
+    """
+    lines = [line for line in output.splitlines() if line.startswith("{")]
+    if not lines:
+        raise ValueError("no facts in command output")
+    facts = json.loads(lines[-1])
+    facts['ips'] = facts['ips'].split()
+    facts['hosts'] = {name: value.split() for name, value in facts['hosts'].items()}
+    return facts
+
+
+def node_differences(nodes_facts):
+    """Facts that differ between the nodes of a tier. Nodes whose facts could not be collected are not compared
+
+    Args:
+        nodes_facts (list[dict]): Facts of each node
+
+    Returns:
+        list[tuple]: (fact, list of the values in each node) for every fact that differs. Mount points are
+            reported as 'mount point of PATH'
+    """
+    differences = []
+    collected = [facts for facts in nodes_facts if facts]
+    if len(collected) < 2:
+        return differences
+    names = [(name, lambda facts, name=name: facts.get(name, "")) for name in COMPARED_FACTS]
+    for path in collected[0].get('mounts', {}):
+        names.append((f"mount point of {path}", lambda facts, path=path: facts.get('mounts', {}).get(path, "")))
+    for name, value in names:
+        values = [value(facts) if facts else None for facts in nodes_facts]
+        if len(set([item for item in values if item is not None])) > 1:
+            differences.append((name, values))
+    return differences
+
+
+def memory_gb(facts):
+    """Memory of a host in GB, as used for the OCI shapes
+
+    Returns:
+        int: Memory in GB, None if it could not be collected
+    """
+    return int(facts['mem_total_kb']) // 1000 // 1000 if facts.get('mem_total_kb', '').isdigit() else None
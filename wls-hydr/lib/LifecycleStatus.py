@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+## LifecycleStatus.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Status file of the DataReplication.py lifecycle mode: replication lag (RPO) per data type
+
+import json
+import os
+import time
+
+
+class LifecycleStatus:
+    """JSON status file written by the lifecycle mode after every cycle. For each data type
+    (instance/data_type) it keeps the last change check, pull and push, and the time of the source
+    state known to be replicated in the standby ('synced'), from which the replication lag (RPO)
+    is computed. It also keeps the source fingerprint of each pull job, so that a restarted daemon
+    does not transfer unchanged data again.
+    """
+    def __init__(self, status_path, interval):
+        """Constructor. Loads the status file if it exists.
+
+        Args:
+            status_path (str): Path to the status file
+            interval (int): Seconds between cycles, reported in the status file
+        """
+        self.status_path = status_path
+        self.status = {"data_types": {}, "fingerprints": {}}
+        if os.path.isfile(status_path):
+            try:
+                with open(status_path, "r") as f:
+                    self.status.update(json.load(f))
+            except ValueError:
+                pass
+        self.status['interval'] = interval
+        self.status['started'] = time.time()
+        self.status['cycle'] = 0
+
+    def _data_type(self, data_type):
+        return self.status['data_types'].setdefault(data_type, {
+            "state": "unknown",
+            "last_check": None,
+            "last_change": None,
+            "last_pull": None,
+            "last_push": None,
+            "synced": None,
+            "staged_source": None,
+            "rpo_seconds": None,
+            "last_error": ""
+        })
+
+    def fingerprint(self, job_key):
+        return self.status['fingerprints'].get(job_key)
+
+    def set_fingerprint(self, job_key, fingerprint):
+        self.status['fingerprints'][job_key] = fingerprint
+
+    def pending_push(self):
+        """Data types pulled that have not been pushed yet
+
+        Returns:
+            dict: Data type mapped to the time of the change check of its last pull
+        """
+        return {name: entry['staged_source'] for name, entry in self.status['data_types'].items()
+                if entry.get('staged_source') is not None}
+
+    def checked(self, data_type, check_time, changed):
+        entry = self._data_type(data_type)
+        entry['last_check'] = check_time
+        if changed:
+            entry['last_change'] = check_time
+
+    def pulled(self, data_type, check_time):
+        entry = self._data_type(data_type)
+        entry['last_pull'] = time.time()
+        entry['state'] = "pending_push"
+        # the staging folder now has the source state of this check, not yet in the standby
+        entry['staged_source'] = check_time
+        entry['last_error'] = ""
+
+    def synced(self, data_type, source_time, pushed=False):
+        """Record that the standby has the source state of a point in time
+
+        Args:
+            data_type (str): Data type
+            source_time (float): Time of the change check that saw the source state now in the standby
+            pushed (bool, optional): True if a push was done. Defaults to False.
+        """
+        entry = self._data_type(data_type)
+        if pushed:
+            entry['last_push'] = time.time()
+            entry['staged_source'] = None
+        entry['state'] = "in_sync"
+        entry['synced'] = source_time
+        entry['last_error'] = ""
+
+    def failed(self, data_type, reason):
+        entry = self._data_type(data_type)
+        entry['state'] = "failed"
+        entry['last_error'] = reason
+
+    def save(self, cycle):
+        """Update the replication lags and write the status file
+
+        Args:
+            cycle (int): Number of the cycle just completed
+        """
+        now = time.time()
+        self.status['cycle'] = cycle
+        self.status['updated'] = now
+        for entry in self.status['data_types'].values():
+            entry['rpo_seconds'] = int(now - entry['synced']) if entry['synced'] is not None else None
+        tmp_path = f"{self.status_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.status, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.status_path)
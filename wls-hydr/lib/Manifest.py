@@ -0,0 +1,339 @@
+#!/usr/bin/python3
+
+## Manifest.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Content manifests (path, size, mtime, hash) used by DataReplication.py to verify transfers
+
+import concurrent.futures
+import hashlib
+import os
+import re
+import shlex
+
+# marker line separating the file listing from the hashes in the remote manifest output
+HASHES_MARKER = "==HYDR_MANIFEST_HASHES=="
+# find printf format: type, size, mtime, link target, path
+FIND_FORMAT = r"%y\t%s\t%T@\t%l\t%p\n"
+HASH_BLOCK_SIZE = 1024 * 1024
+# files expected to change while the domain is running: anything under a logs directory, log files
+# (also rotated ones, like AdminServer.log00001) and persistent store files
+VOLATILE_DIRECTORIES = ["logs"]
+VOLATILE_FILE_PATTERN = re.compile(r".*\.(log[0-9]*(\.[0-9]+)?|DAT)$")
+
+
+def is_volatile(path):
+    """Check if a path is expected to change while the domain is running. Differences in these paths are
+    not reported and do not make a lifecycle cycle transfer the data
+
+    Args:
+        path (str): Relative path
+
+    Returns:
+        bool: True if the path is volatile
+    """
+    parts = path.strip("/").split("/")
+    return any(part in VOLATILE_DIRECTORIES for part in parts[:-1]) or VOLATILE_FILE_PATTERN.match(parts[-1]) is not None
+
+
+class ExcludeFilter:
+    """Approximation of the rsync exclude rules used in replication.properties
+    """
+    def __init__(self, exclude_list):
+        """Constructor
+
+        Args:
+            exclude_list (list[str]): List of rsync exclude patterns
+        """
+        self.patterns = []
+        for item in exclude_list:
+            item = item.strip()
+            if not item:
+                continue
+            dir_only = item.endswith("/")
+            item = item.rstrip("/")
+            anchored = item.startswith("/")
+            item = item.lstrip("/")
+            self.patterns.append({
+                "regex": re.compile(self._translate(item)),
+                "dir_only": dir_only,
+                "anchored": anchored,
+                "has_slash": "/" in item
+            })
+
+    @staticmethod
+    def _translate(pattern):
+        regex = ""
+        idx = 0
+        while idx < len(pattern):
+            char = pattern[idx]
+            if pattern.startswith("**", idx):
+                regex += ".*"
+                idx += 2
+                continue
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            else:
+                regex += re.escape(char)
+            idx += 1
+        return f"^{regex}$"
+
+    def _matches(self, parts, is_dir):
+        for pattern in self.patterns:
+            if pattern['dir_only'] and not is_dir:
+                continue
+            if pattern['anchored']:
+                candidates = ["/".join(parts)]
+            elif pattern['has_slash']:
+                candidates = ["/".join(parts[idx:]) for idx in range(len(parts))]
+            else:
+                candidates = [parts[-1]]
+            if any(pattern['regex'].match(candidate) for candidate in candidates):
+                return True
+        return False
+
+    def excluded(self, rel_path, is_dir=False):
+        """Check if a path is excluded, either directly or because one of its parent directories is
+
+        Args:
+            rel_path (str): Path relative to the transfer root
+            is_dir (bool, optional): Whether the path is a directory. Defaults to False.
+
+        Returns:
+            bool: True if excluded
+        """
+        if not self.patterns:
+            return False
+        parts = rel_path.split("/")
+        for idx in range(len(parts)):
+            if self._matches(parts[:idx + 1], is_dir or idx < len(parts) - 1):
+                return True
+        return False
+
+
+class Manifest:
+    """Content manifest of a directory tree. Maps relative paths to (type, size, mtime, digest)
+    tuples, where type is 'f' for regular files and 'l' for symbolic links. The digest is the
+    sha256 of the file contents or the link target for symbolic links.
+    """
+    def __init__(self, entries=None, inodes=None):
+        self.entries = entries if entries else {}
+        # inode numbers of the entries, only available for local manifests
+        self.inodes = inodes if inodes else {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def from_local(root, exclude_list=[], workers=4, paths=None, known=None, hash_files=True):
+        """Build the manifest of a local directory, hashing files in parallel.
+        Files whose size, mtime and inode match an entry in known are not read again.
+
+        Args:
+            root (str): Directory to build the manifest for
+            exclude_list (list[str], optional): rsync exclude patterns. Defaults to [].
+            workers (int, optional): Number of parallel hashing threads. Defaults to 4.
+            paths (list[str], optional): Only include these relative paths instead
+                of walking the whole tree. Defaults to None.
+            known (dict, optional): Previously computed values, mapping relative paths to
+                (size, mtime, inode, digest) tuples. Defaults to None.
+            hash_files (bool, optional): If False, files not found in known are listed
+                without a digest. Defaults to True.
+
+        Returns:
+            Manifest: Manifest of the directory
+        """
+        exclude_filter = ExcludeFilter(exclude_list)
+        known = known if known else {}
+        entries = {}
+        inodes = {}
+        to_hash = []
+
+        def add(rel_path):
+            full_path = os.path.join(root, rel_path)
+            try:
+                stat = os.lstat(full_path)
+            except FileNotFoundError:
+                return
+            if os.path.islink(full_path):
+                entries[rel_path] = ("l", stat.st_size, stat.st_mtime, os.readlink(full_path))
+            elif os.path.isfile(full_path):
+                previous = known.get(rel_path)
+                if previous and previous[3] and previous[:3] == (stat.st_size, stat.st_mtime, stat.st_ino):
+                    entries[rel_path] = ("f", stat.st_size, stat.st_mtime, previous[3])
+                else:
+                    entries[rel_path] = ("f", stat.st_size, stat.st_mtime, None)
+                    if hash_files:
+                        to_hash.append(rel_path)
+            else:
+                return
+            inodes[rel_path] = stat.st_ino
+
+        if paths is not None:
+            for rel_path in paths:
+                add(rel_path)
+        else:
+            for dirpath, dirnames, filenames in os.walk(root):
+                rel_dir = os.path.relpath(dirpath, root)
+                rel_dir = "" if rel_dir == "." else f"{rel_dir}/"
+                kept_dirs = []
+                for dirname in dirnames:
+                    if exclude_filter.excluded(f"{rel_dir}{dirname}", is_dir=True):
+                        continue
+                    if os.path.islink(os.path.join(dirpath, dirname)):
+                        # symbolic links to directories are transferred as links
+                        add(f"{rel_dir}{dirname}")
+                        continue
+                    kept_dirs.append(dirname)
+                dirnames[:] = kept_dirs
+                for filename in filenames:
+                    if not exclude_filter.excluded(f"{rel_dir}{filename}"):
+                        add(f"{rel_dir}{filename}")
+
+        def hash_entry(rel_path):
+            try:
+                return rel_path, Manifest.hash_file(os.path.join(root, rel_path))
+            except OSError:
+                return rel_path, None
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            for rel_path, digest in executor.map(hash_entry, to_hash):
+                if digest is None:
+                    entries.pop(rel_path, None)
+                    inodes.pop(rel_path, None)
+                else:
+                    kind, size, mtime, _ = entries[rel_path]
+                    entries[rel_path] = (kind, size, mtime, digest)
+        return Manifest(entries, inodes)
+
+    @staticmethod
+    def remote_command(root, workers=4, partial=False, hashes=True):
+        """Shell command that builds the manifest of a directory on a remote host.
+        File hashes are computed in parallel on the remote host with xargs. Excludes are
+        only applied by from_remote_output(): to avoid hashing excluded files, list the
+        tree with hashes=False first and hash the paths kept in partial mode.
+
+        Args:
+            root (str): Remote directory to build the manifest for
+            workers (int, optional): Number of parallel hashing processes. Defaults to 4.
+            partial (bool, optional): If True the command reads the relative paths to include
+                from its standard input (one per line) instead of walking the whole tree. The paths
+                are passed to find in batches, as many as fit in a command line. Defaults to False.
+            hashes (bool, optional): If False, only the file listing is returned and no file
+                is read. Defaults to True.
+
+        Returns:
+            str: Command to be run on the remote host
+        """
+        root = shlex.quote(root)
+        workers = max(1, int(workers))
+        if not hashes:
+            return f"cd {root} && find . \\( -type f -o -type l \\) -printf '{FIND_FORMAT}' && echo '{HASHES_MARKER}'"
+        if not partial:
+            return f"cd {root} && {{ find . \\( -type f -o -type l \\) -printf '{FIND_FORMAT}'; " \
+                   f"echo '{HASHES_MARKER}'; " \
+                   f"find . -type f -print0 | xargs -0 -r -P {workers} -n 64 sha256sum; }}"
+        # find takes the paths before its expression, so xargs runs it through sh
+        list_paths = shlex.quote(f"find \"$@\" -maxdepth 0 \\( -type f -o -type l \\) -printf '{FIND_FORMAT}'")
+        return f"cd {root} && tmp_list=$(mktemp) && sed 's|^|./|' > $tmp_list && " \
+               f"xargs -d '\\n' -r sh -c {list_paths} find < $tmp_list 2>/dev/null; " \
+               f"echo '{HASHES_MARKER}'; " \
+               f"xargs -d '\\n' -r -P {workers} -n 64 sha256sum < $tmp_list 2>/dev/null; " \
+               f"rm -f $tmp_list"
+
+    @staticmethod
+    def from_remote_output(output, exclude_list=[]):
+        """Build a manifest from the output of the command returned by remote_command()
+
+        Args:
+            output (str): Remote command output
+            exclude_list (list[str], optional): rsync exclude patterns. Defaults to [].
+
+        Returns:
+            Manifest: Manifest of the remote directory
+        """
+        exclude_filter = ExcludeFilter(exclude_list)
+        entries = {}
+        listing, _, hashes = output.partition(f"{HASHES_MARKER}\n")
+        for line in listing.splitlines():
+            fields = line.split("\t", 4)
+            if len(fields) != 5:
+                continue
+            kind, size, mtime, target, path = fields
+            path = path[2:] if path.startswith("./") else path
+            if exclude_filter.excluded(path):
+                continue
+            entries[path] = (kind, int(size), float(mtime), target if kind == "l" else None)
+        for line in hashes.splitlines():
+            digest, _, path = line.partition("  ")
+            path = path[2:] if path.startswith("./") else path
+            if path in entries and entries[path][0] == "f":
+                kind, size, mtime, _ = entries[path]
+                entries[path] = (kind, size, mtime, digest)
+        return Manifest(entries)
+
+    def fingerprint(self):
+        """Fingerprint of the manifest listing: paths, types, sizes, mtimes (in seconds) and link targets.
+        File digests are not included, so the fingerprint can be computed without reading any file.
+
+        Returns:
+            str: sha256 of the listing
+        """
+        digest = hashlib.sha256()
+        for path in sorted(self.entries.keys()):
+            kind, size, mtime, target = self.entries[path]
+            digest.update(f"{path}\t{kind}\t{size}\t{int(mtime)}\t{target if kind == 'l' else ''}\n".encode())
+        return digest.hexdigest()
+
+    def diff(self, target, ignore=None, modify_window=None):
+        """List the entries of this (source) manifest that are missing or different in the target
+
+        Args:
+            target (Manifest): Target manifest
+            ignore (callable, optional): Function called with a relative path, returning True
+                if differences in that path must be ignored. Defaults to None.
+            modify_window (float, optional): If set, files whose modification times differ by more
+                than this number of seconds are also different. Defaults to None.
+
+        Returns:
+            list[str]: Sorted list of relative paths that differ
+        """
+        pending = []
+        for path, (kind, size, mtime, digest) in self.entries.items():
+            if ignore and ignore(path):
+                continue
+            other = target.entries.get(path)
+            if other is None or other[0] != kind or other[1] != size or other[3] != digest:
+                pending.append(path)
+            elif modify_window is not None and kind == "f" and abs(other[2] - mtime) > modify_window:
+                pending.append(path)
+        return sorted(pending)
+
+    def update(self, other, paths):
+        """Replace the given paths with their values in another manifest. Paths not present in
+        the other manifest are removed.
+
+        Args:
+            other (Manifest): Manifest with the refreshed values
+            paths (list[str]): Relative paths to refresh
+        """
+        for path in paths:
+            if path in other.entries:
+                self.entries[path] = other.entries[path]
+                if path in other.inodes:
+                    self.inodes[path] = other.inodes[path]
+            else:
+                self.entries.pop(path, None)
+                self.inodes.pop(path, None)
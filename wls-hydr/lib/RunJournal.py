@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+
+## RunJournal.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Journal of completed transfer jobs, used by DataReplication.py to resume interrupted runs
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class RunJournal:
+    """JSON journal of the transfer jobs completed and verified in the current (or last interrupted) run.
+    Each job is recorded with the fingerprint its source had when the job started.
+    """
+    def __init__(self, journal_path):
+        """Constructor. Loads the journal file if it exists.
+
+        Args:
+            journal_path (str): Path to the journal file
+        """
+        self.journal_path = journal_path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.isfile(journal_path):
+            with open(journal_path, "r") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def job_key(job):
+        return f"{job['transfer_type']}:{job['name']}:{job['host']}"
+
+    def _save(self):
+        # write to a temporary file first so that an interrupted write does not corrupt the journal. Each write
+        # uses its own temporary file, so that writers in other processes do not replace it
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.journal_path)),
+                                        prefix=f".{os.path.basename(self.journal_path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.journal_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def reset(self, jobs):
+        """Forget the given jobs, at the start of a run that is not resumed
+
+        Args:
+            jobs (list[dict]): Transfer jobs
+        """
+        with self.lock:
+            for job in jobs:
+                self.entries.pop(self.job_key(job), None)
+            self._save()
+
+    def completed(self, job, fingerprint):
+        """Check if a job was completed with a source identical to the current one
+
+        Args:
+            job (dict): Transfer job
+            fingerprint (str): Current fingerprint of the job source
+
+        Returns:
+            bool: True if the job can be skipped
+        """
+        with self.lock:
+            entry = self.entries.get(self.job_key(job))
+        return entry is not None and \
+            entry['fingerprint'] == fingerprint and \
+            entry['origin_path'] == job['origin_path'] and \
+            entry['destination_path'] == job['destination_path']
+
+    def record(self, job, fingerprint):
+        """Record a job that was transferred and verified
+
+        Args:
+            job (dict): Transfer job
+            fingerprint (str): Fingerprint of the job source when the job started
+        """
+        with self.lock:
+            self.entries[self.job_key(job)] = {
+                "fingerprint": fingerprint,
+                "origin_path": job['origin_path'],
+                "destination_path": job['destination_path'],
+                "completed": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self._save()
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+
+## RunReport.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### rsync --stats parsing and JSON report of each DataReplication.py run
+
+import json
+import os
+import re
+import threading
+import time
+
+# rsync --stats counters and the metric each one is stored as
+STATS_METRICS = {
+    "Number of files": "files",
+    "Number of created files": "created_files",
+    "Number of deleted files": "deleted_files",
+    "Number of regular files transferred": "files_transferred",
+    "Total file size": "total_size",
+    "Total transferred file size": "file_bytes",
+    "Literal data": "literal_bytes",
+    "Matched data": "matched_bytes",
+    "Total bytes sent": "bytes_sent",
+    "Total bytes received": "bytes_received"
+}
+STATS_REGEX = re.compile(r"^(" + "|".join(STATS_METRICS) + r"): ([0-9,]+)", re.MULTILINE)
+# metrics that describe the whole tree - taken from the first rsync run of a job, the rest are added up
+TREE_METRICS = ["files", "total_size"]
+
+
+def parse_rsync_stats(output):
+    """Parse the output of rsync --stats
+
+    Args:
+        output (str): rsync output
+
+    Returns:
+        dict: Metric names (values of STATS_METRICS) mapped to their values. Counters not found are not included.
+    """
+    return {STATS_METRICS[name]: int(value.replace(",", "")) for name, value in STATS_REGEX.findall(output)}
+
+
+def add_rsync_stats(metrics, stats):
+    """Add the metrics of an rsync run to the metrics of a transfer job
+
+    Args:
+        metrics (dict): Metrics of the job, updated
+        stats (dict): Metrics of the rsync run, as returned by parse_rsync_stats()
+    """
+    for name, value in stats.items():
+        if name in TREE_METRICS:
+            metrics.setdefault(name, value)
+        else:
+            metrics[name] = metrics.get(name, 0) + value
+    metrics['bytes'] = metrics.get('bytes_sent', 0) + metrics.get('bytes_received', 0)
+
+
+def speedup(total_size, network_bytes):
+    # as reported by rsync: size of the tree divided by the bytes that went over the network
+    return round(total_size / network_bytes, 2) if network_bytes else None
+
+
+class RunReport:
+    """JSON report of one run of an action: start and end time, result and, for every transfer job,
+    its result, the metrics of its rsync runs (files considered and transferred, literal and
+    matched data, bytes sent and received, speedup, time and retries) and of its chunk transfers.
+    The report is written again every time jobs are added, so that it is available while long
+    runs are still going.
+    """
+    def __init__(self, report_path, action):
+        """Constructor
+
+        Args:
+            report_path (str): Path to the report file
+            action (str): Action run
+        """
+        self.report_path = report_path
+        self.lock = threading.Lock()
+        self.report = {"action": action, "started": time.time(), "ended": None, "elapsed": None,
+                       "success": None, "jobs": [], "totals": {}}
+
+    def _save(self):
+        # must be called with the lock held
+        totals = {}
+        for job in self.report['jobs']:
+            for name in list(STATS_METRICS.values()) + ["bytes", "retries", "rsync_seconds"]:
+                totals[name] = totals.get(name, 0) + (job.get(name) or 0)
+        totals['jobs'] = len(self.report['jobs'])
+        totals['failed_jobs'] = len([job for job in self.report['jobs'] if not job['success']])
+        totals['speedup'] = speedup(totals['total_size'], totals['bytes']) if self.report['jobs'] else None
+        self.report['totals'] = totals
+        tmp_path = f"{self.report_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.report, f, indent=2)
+        os.replace(tmp_path, self.report_path)
+
+    def add_results(self, results):
+        """Add the results of transfer jobs to the report
+
+        Args:
+            results (list[dict]): Job results, as returned by TransferScheduler.run()
+        """
+        with self.lock:
+            for result in results:
+                job = result['job']
+                metrics = dict(job.get('metrics', {}))
+                entry = {
+                    "name": job['name'],
+                    "transfer_type": job['transfer_type'],
+                    "instance": job['instance'],
+                    "data_type": job['data_type'],
+                    "host": job['host'],
+                    "target": job.get('target'),
+                    "success": result['success'],
+                    "reason": result['reason'],
+                    "elapsed": round(result['elapsed'], 3),
+                    "rsync_seconds": metrics.pop('transfer_seconds', None),
+                    "retries": metrics.pop('retries', 0),
+                    "speedup": speedup(metrics.get('total_size', 0), metrics.get('bytes', 0)),
+                    "verification": job.get('verification'),
+                    "chunks": job.get('chunks')
+                }
+                entry.update(metrics)
+                self.report['jobs'].append(entry)
+            self._save()
+
+    def finish(self, success):
+        """Record the end of the run and write the report
+
+        Args:
+            success (bool): True if the action completed successfully
+        """
+        with self.lock:
+            self.report['ended'] = time.time()
+            self.report['elapsed'] = round(self.report['ended'] - self.report['started'], 3)
+            self.report['success'] = success
+            self._save()
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+
+## SessionPool.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Pool of reusable paramiko SSH/SFTP sessions shared by DataReplication.py, Discovery.py and wls_hydr.py
+
+import atexit
+import contextlib
+import threading
+import time
+
+import paramiko
+
+
+class PooledSession:
+    """SSH connection to one (user, host, key) endpoint, with a lazily opened SFTP channel
+    """
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.last_used = time.time()
+        self._sftp = None
+
+    def sftp(self):
+        """SFTP client on this connection - opened on first use and kept with the session
+
+        Returns:
+            paramiko.SFTPClient: SFTP client
+        """
+        if self._sftp is None:
+            self._sftp = self.client.open_sftp()
+        return self._sftp
+
+    def is_healthy(self):
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            transport.send_ignore()
+        except Exception:
+            return False
+        return True
+
+    def close(self):
+        try:
+            if self._sftp is not None:
+                self._sftp.close()
+        except Exception:
+            pass
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class SessionPool:
+    """Thread-safe pool of SSH sessions keyed by (user, host, key). A checked out session is used
+    by a single thread until it is checked in again; idle sessions are health checked before being
+    handed out and closed after idle_timeout seconds without use.
+    """
+    def __init__(self, idle_timeout=300):
+        """Constructor
+
+        Args:
+            idle_timeout (int, optional): Seconds after which an unused session is closed. Defaults to 300.
+        """
+        self.idle_timeout = idle_timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+        atexit.register(self.close_all)
+
+    def _expire(self):
+        # must be called with the lock held - returns the sessions to close
+        expired = []
+        now = time.time()
+        for key in list(self.idle.keys()):
+            keep = []
+            for session in self.idle[key]:
+                (expired if now - session.last_used > self.idle_timeout else keep).append(session)
+            if keep:
+                self.idle[key] = keep
+            else:
+                del self.idle[key]
+        return expired
+
+    def checkout(self, username, host, key_path, timeout=None):
+        """Get a session to a host, reusing an idle one if it is still healthy
+
+        Args:
+            username (str): OS user
+            host (str): Host name or IP address
+            key_path (str): Path to the ssh private key
+            timeout (float, optional): Connection timeout in seconds. Defaults to None.
+
+        Raises:
+            Exception: If a new connection is needed and it cannot be established
+
+        Returns:
+            PooledSession: Session that must be returned with checkin()
+        """
+        key = (username, host, key_path)
+        while True:
+            with self.lock:
+                expired = self._expire()
+                session = self.idle[key].pop() if self.idle.get(key) else None
+            for stale in expired:
+                stale.close()
+            if session is None:
+                break
+            if session.is_healthy():
+                return session
+            session.close()
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(username=username, hostname=host, key_filename=key_path, timeout=timeout)
+        return PooledSession(key, client)
+
+    def checkin(self, session, discard=False):
+        """Return a session to the pool
+
+        Args:
+            session (PooledSession): Session obtained with checkout()
+            discard (bool, optional): Close the session instead of keeping it for reuse. Defaults to False.
+        """
+        if discard:
+            session.close()
+            return
+        session.last_used = time.time()
+        with self.lock:
+            self.idle.setdefault(session.key, []).append(session)
+            expired = self._expire()
+        for stale in expired:
+            stale.close()
+
+    @contextlib.contextmanager
+    def session(self, username, host, key_path, timeout=None):
+        """Context manager around checkout() and checkin(). The session is discarded if the block raises.
+
+        Yields:
+            PooledSession: Session to the host
+        """
+        session = self.checkout(username, host, key_path, timeout)
+        try:
+            yield session
+        except Exception:
+            self.checkin(session, discard=True)
+            raise
+        self.checkin(session)
+
+    def close_all(self):
+        """Close all idle sessions
+        """
+        with self.lock:
+            sessions = [session for sessions in self.idle.values() for session in sessions]
+            self.idle.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+## SourceSnapshot.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Point-in-time snapshots of the source directories of the transfers run by DataReplication.py, so that
+### the data is read from a copy that does not change while it is transferred and verified
+
+import hashlib
+import shlex
+import time
+
+# fss:     file system snapshot created with mkdir in the .snapshot directory of the file system (OCI File Storage,
+#          ZFS Storage Appliance shares)
+# zfs:     same, in the .zfs/snapshot directory of a ZFS file system
+# hook:    snapshot created and released by user supplied commands (for example, an LVM snapshot)
+# reflink: copy-on-write clone (cp --reflink=always) in the same file system, removed after the transfer
+SNAPSHOT_MODES = ["none", "fss", "zfs", "hook", "reflink"]
+# directory, in the root of the file system of the source, where reflink clones are created
+CLONE_DIR = ".hydr-snapshots"
+# run with: create|release MODE NAME SOURCE. create prints the path of SOURCE inside the snapshot as last line
+SNAPSHOT_SCRIPT = r"""
+set -o pipefail
+action="$1"; mode="$2"; name="$3"; source="${4%/}"
+mount=$(df -P "$source" | awk 'NR == 2 {print $6}') || exit 1
+[ -n "$mount" ] || exit 1
+rel="${source#"${mount%/}"}"
+case "$mode" in
+    fss) snapdir="${mount%/}/.snapshot" ;;
+    zfs) snapdir="${mount%/}/.zfs/snapshot" ;;
+    reflink) snapdir="${mount%/}/.hydr-snapshots" ;;
+    *) exit 2 ;;
+esac
+case "$action" in
+    create)
+        if [ "$mode" = "reflink" ]; then
+            mkdir -p "$snapdir/$name$rel" || exit 1
+            # the clone directory is skipped when the source is the root of the file system
+            (cd "$source" && find . -mindepth 1 -maxdepth 1 ! -name .hydr-snapshots -print0 | \
+                xargs -0 -r cp -a --reflink=always -t "$snapdir/$name$rel") || { rm -rf "$snapdir/$name"; exit 1; }
+            chmod --reference="$source" "$snapdir/$name$rel" && touch -r "$source" "$snapdir/$name$rel" || exit 1
+        else
+            mkdir "$snapdir/$name" || exit 1
+        fi
+        echo "$snapdir/$name$rel"
+        ;;
+    release)
+        if [ "$mode" = "reflink" ]; then
+            rm -rf "$snapdir/$name"
+        else
+            rmdir "$snapdir/$name"
+        fi
+        ;;
+    *)
+        exit 2
+        ;;
+esac
+"""
+
+
+def snapshot_name(host, origin_path):
+    """Name of a new snapshot of a source directory, unique per host, directory and time
+
+    Returns:
+        str: Snapshot name
+    """
+    digest = hashlib.sha256(f"{host}:{origin_path}".encode()).hexdigest()[:8]
+    return f"hydr_{time.strftime('%Y%m%d%H%M%S')}_{digest}"
+
+
+def snapshot_command(action, mode, name, origin_path, hook="", snapshot_path=""):
+    """Command that creates or releases a snapshot on the source host
+
+    Args:
+        action (str): 'create' or 'release'
+        mode (str): One of SNAPSHOT_MODES, except 'none'
+        name (str): Snapshot name
+        origin_path (str): Source directory
+        hook (str, optional): Command to run in 'hook' mode. It gets the snapshot name, the source directory and,
+            to release, the snapshot path in the HYDR_SNAPSHOT, HYDR_SOURCE and HYDR_SNAPSHOT_PATH environment
+            variables. Defaults to "".
+        snapshot_path (str, optional): Path of the source inside the snapshot, to release. Defaults to "".
+
+    Returns:
+        tuple: (command, standard input) - the standard input is None in 'hook' mode
+    """
+    if mode == "hook":
+        return f"HYDR_SNAPSHOT={shlex.quote(name)} HYDR_SOURCE={shlex.quote(origin_path)} " \
+               f"HYDR_SNAPSHOT_PATH={shlex.quote(snapshot_path)} sh -c {shlex.quote(hook)}", None
+    return f"bash -s -- {action} {mode} {shlex.quote(name)} {shlex.quote(origin_path)}", SNAPSHOT_SCRIPT
+
+
+def snapshot_path(output):
+    """Path of the source inside a new snapshot, from the output of the create command
+
+    Returns:
+        str: Last non empty line of the output, None if there is none
+    """
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    return lines[-1] if lines else None
@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+
+## SshMultiplexer.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Managed OpenSSH ControlMaster sessions, shared by all the rsync and ssh commands run by DataReplication.py
+
+import atexit
+import concurrent.futures
+import hashlib
+import shutil
+import subprocess
+import tempfile
+import threading
+
+
+class SshMultiplexer:
+    """Opens one OpenSSH master connection per (user, host, key) and provides the ssh options
+    that make rsync and ssh commands reuse it instead of doing a new handshake
+    """
+    def __init__(self, logger, control_persist=600):
+        """Constructor
+
+        Args:
+            logger (Logger): Logger object
+            control_persist (int, optional): Seconds an idle master connection is kept open. Defaults to 600.
+        """
+        self.logger = logger
+        self.control_persist = int(control_persist)
+        # control sockets paths are limited to ~100 characters - keep them short
+        self.control_dir = tempfile.mkdtemp(prefix="hydr-mux-")
+        self.masters = {}
+        self.lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def control_path(self, username, host, key_path):
+        endpoint = hashlib.sha256(f"{username}@{host}:{key_path}".encode()).hexdigest()[:16]
+        return f"{self.control_dir}/{endpoint}"
+
+    @staticmethod
+    def base_options(key_path):
+        return ["ssh", "-o", "StrictHostKeyChecking=no", "-i", key_path]
+
+    def start(self, username, host, key_path):
+        """Open the master connection for an endpoint, if not already open
+
+        Args:
+            username (str): OS user
+            host (str): Host name or IP address
+            key_path (str): Path to the ssh private key
+
+        Returns:
+            bool: True if the master connection is open
+        """
+        control_path = self.control_path(username, host, key_path)
+        with self.lock:
+            if control_path in self.masters:
+                return True
+        # -f -N: authenticate and go to background without running any command
+        master_cmd = self.base_options(key_path) + [
+            "-o", "ControlMaster=yes",
+            "-o", f"ControlPath={control_path}",
+            "-o", f"ControlPersist={self.control_persist}",
+            "-o", "ServerAliveInterval=30",
+            "-f", "-N", f"{username}@{host}"
+        ]
+        self.logger.writelog("debug", f"Opening ssh master connection to [{username}@{host}]")
+        try:
+            run = subprocess.run(master_cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, timeout=60)
+        except Exception as e:
+            self.logger.writelog("warn", f"Could not open ssh master connection to [{username}@{host}]: {str(e)}")
+            return False
+        if run.returncode != 0:
+            self.logger.writelog("warn", f"Could not open ssh master connection to [{username}@{host}]: "
+                                         f"{run.stderr.decode(errors='replace').strip()}")
+            return False
+        with self.lock:
+            self.masters[control_path] = (username, host, key_path)
+        return True
+
+    def start_all(self, endpoints, max_workers=8):
+        """Open the master connections for several endpoints in parallel
+
+        Args:
+            endpoints (list[tuple]): (username, host, key_path) tuples
+            max_workers (int, optional): Maximum number of connections opened at the same time. Defaults to 8.
+        """
+        endpoints = list(dict.fromkeys(endpoints))
+        if not endpoints:
+            return
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda endpoint: self.start(*endpoint), endpoints))
+
+    def refresh(self):
+        """Reopen the master connections that are no longer running (closed by ControlPersist or
+        by a network failure). Used by long running processes to keep the connections warm.
+        """
+        with self.lock:
+            masters = dict(self.masters)
+        dead = []
+        for control_path, (username, host, key_path) in masters.items():
+            try:
+                run = subprocess.run(self.base_options(key_path) + ["-o", f"ControlPath={control_path}", "-O", "check", f"{username}@{host}"],
+                                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+                alive = run.returncode == 0
+            except Exception:
+                alive = False
+            if not alive:
+                dead.append((username, host, key_path))
+                with self.lock:
+                    self.masters.pop(control_path, None)
+        if dead:
+            self.logger.writelog("debug", f"Reopening {len(dead)} ssh master connections")
+            self.start_all(dead)
+
+    def ssh_options(self, username, host, key_path):
+        """ssh command line to use for an endpoint. If there is no master connection open for the
+        endpoint, ssh connects directly as usual.
+
+        Returns:
+            str: ssh command line, without the destination
+        """
+        options = self.base_options(key_path)
+        control_path = self.control_path(username, host, key_path)
+        with self.lock:
+            multiplexed = control_path in self.masters
+        if multiplexed:
+            # ControlMaster=no: never let a transfer become a master, its pipes would be held open
+            options += ["-o", "ControlMaster=no", "-o", f"ControlPath={control_path}"]
+        return " ".join(options)
+
+    def stop(self):
+        """Close all master connections and remove the control sockets directory
+        """
+        with self.lock:
+            masters = dict(self.masters)
+            self.masters.clear()
+        for control_path, (username, host, key_path) in masters.items():
+            try:
+                subprocess.run(self.base_options(key_path) + ["-o", f"ControlPath={control_path}", "-O", "exit", f"{username}@{host}"],
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+            except Exception:
+                pass
+        shutil.rmtree(self.control_dir, ignore_errors=True)
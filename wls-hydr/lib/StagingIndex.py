@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+
+## StagingIndex.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Persistent index of the staging gold copy contents, used by DataReplication.py
+
+import sqlite3
+import threading
+import time
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS entries (
+        root TEXT NOT NULL,
+        path TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        inode INTEGER,
+        digest TEXT,
+        PRIMARY KEY (root, path))""",
+    """CREATE TABLE IF NOT EXISTS trees (
+        root TEXT PRIMARY KEY,
+        name TEXT,
+        instance TEXT,
+        data_type TEXT,
+        files INTEGER,
+        bytes INTEGER,
+        changed REAL,
+        pulled REAL,
+        pulled_from TEXT)""",
+    """CREATE TABLE IF NOT EXISTS pushes (
+        root TEXT NOT NULL,
+        host TEXT NOT NULL,
+        name TEXT,
+        pushed REAL,
+        PRIMARY KEY (root, host))"""
+]
+
+
+class StagingIndex:
+    """SQLite index of the staging directories: path -> size, mtime, inode and hash of every
+    staged file, plus the time of the last pull, last content change and last push of each
+    staging directory.
+    """
+    def __init__(self, db_path):
+        """Constructor. Creates the database if it does not exist.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        # transfer jobs update the index from several threads
+        self.lock = threading.Lock()
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def known(self, root):
+        """Values stored for a staging directory, in the format used by Manifest.from_local()
+
+        Args:
+            root (str): Staging directory
+
+        Returns:
+            dict: Relative paths mapped to (size, mtime, inode, digest) tuples
+        """
+        with self.lock, self._connect() as conn:
+            rows = conn.execute("SELECT path, size, mtime, inode, digest FROM entries WHERE root = ? AND kind = 'f'",
+                                (root,)).fetchall()
+        return {row[0]: (row[1], row[2], row[3], row[4]) for row in rows}
+
+    def update(self, root, manifest, job):
+        """Store the manifest of a staging directory. The content change time of the directory
+        is only moved forward if any entry was added, removed or modified.
+
+        Args:
+            root (str): Staging directory
+            manifest (Manifest): Local manifest of the directory
+            job (dict): Transfer job that read or wrote the directory
+
+        Returns:
+            bool: True if the contents changed since the previous update
+        """
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            previous = {row[0]: (row[1], row[2], row[3], row[4]) for row in conn.execute(
+                "SELECT path, kind, size, mtime, digest FROM entries WHERE root = ?", (root,))}
+            changed = set(previous.keys()) != set(manifest.entries.keys())
+            rows = []
+            for path, (kind, size, mtime, digest) in manifest.entries.items():
+                old = previous.get(path)
+                if old is None or old[0] != kind or old[1] != size or old[2] != mtime:
+                    changed = True
+                elif digest is None:
+                    # stat did not change - keep the digest computed in a previous run
+                    digest = old[3]
+                elif old[3] is not None and old[3] != digest:
+                    changed = True
+                rows.append((root, path, kind, size, mtime, manifest.inodes.get(path), digest))
+            conn.execute("DELETE FROM entries WHERE root = ?", (root,))
+            conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            tree = conn.execute("SELECT changed FROM trees WHERE root = ?", (root,)).fetchone()
+            changed_time = now if changed or tree is None or tree[0] is None else tree[0]
+            if tree is None:
+                conn.execute("INSERT INTO trees (root, name, instance, data_type) VALUES (?, ?, ?, ?)",
+                             (root, job['name'], job['instance'], job['data_type']))
+            conn.execute("UPDATE trees SET files = ?, bytes = ?, changed = ? WHERE root = ?",
+                         (len(rows), sum(row[3] for row in rows), changed_time, root))
+        return changed
+
+    def update_tree(self, root, job, changed, size=None):
+        """Record a transfer into a staging directory when no manifest of it was built. The stored
+        entries are kept as they are: Manifest.from_local() only takes digests from entries whose
+        size, mtime and inode are unchanged. The number of files of a changed directory is unknown
+        until the next update().
+
+        Args:
+            root (str): Staging directory
+            job (dict): Transfer job that wrote the directory
+            changed (bool): True if the transfer added, removed or modified any entry
+            size (int): Total size of the files in the directory, None if unknown
+        """
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            tree = conn.execute("SELECT changed FROM trees WHERE root = ?", (root,)).fetchone()
+            changed_time = now if changed or tree is None or tree[0] is None else tree[0]
+            if tree is None:
+                conn.execute("INSERT INTO trees (root, name, instance, data_type) VALUES (?, ?, ?, ?)",
+                             (root, job['name'], job['instance'], job['data_type']))
+            conn.execute("""UPDATE trees SET files = CASE WHEN ? THEN NULL ELSE files END, bytes = COALESCE(?, bytes), changed = ?
+                            WHERE root = ?""", (changed, size, changed_time, root))
+
+    def tree(self, root, host=None):
+        """Stored values of a staging directory
+
+        Args:
+            root (str): Staging directory
+            host (str): Standby host, to include the time of the last push of the directory to it
+
+        Returns:
+            dict: Keys 'files', 'bytes', 'changed' and 'pushed', None if the directory is not indexed
+        """
+        with self.lock, self._connect() as conn:
+            tree = conn.execute("SELECT files, bytes, changed FROM trees WHERE root = ?", (root,)).fetchone()
+            pushed = conn.execute("SELECT pushed FROM pushes WHERE root = ? AND host = ?", (root, host)).fetchone()
+        if tree is None:
+            return None
+        return {"files": tree[0], "bytes": tree[1], "changed": tree[2], "pushed": pushed[0] if pushed else None}
+
+    def record_transfer(self, root, job):
+        """Record a successful pull into or push from a staging directory
+
+        Args:
+            root (str): Staging directory
+            job (dict): Transfer job
+        """
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            if job['transfer_type'] == 'pull':
+                conn.execute("""UPDATE trees SET name = ?, instance = ?, data_type = ?, pulled = ?, pulled_from = ?
+                                WHERE root = ?""",
+                             (job['name'], job['instance'], job['data_type'], now, job['host'], root))
+            else:
+                conn.execute("INSERT OR REPLACE INTO pushes VALUES (?, ?, ?, ?)", (root, job['host'], job['name'], now))
+
+    def status(self):
+        """Status of every indexed staging directory
+
+        Returns:
+            list[dict]: One item per staging directory, with keys 'root', 'name', 'instance', 'data_type',
+                'files', 'bytes', 'linked_bytes', 'changed', 'pulled', 'pulled_from' and 'pushes' (dict of host -> push time).
+                linked_bytes is the size of the files hard linked with files of other staging directories.
+        """
+        with self.lock, self._connect() as conn:
+            trees = conn.execute("""SELECT root, name, instance, data_type, files, bytes, changed, pulled, pulled_from
+                                    FROM trees ORDER BY instance, data_type, root""").fetchall()
+            pushes = conn.execute("SELECT root, host, pushed FROM pushes").fetchall()
+            linked = dict(conn.execute("""SELECT root, SUM(size) FROM entries WHERE kind = 'f' AND inode IN
+                                          (SELECT inode FROM entries WHERE kind = 'f' GROUP BY inode HAVING COUNT(DISTINCT root) > 1)
+                                          GROUP BY root""").fetchall())
+        status = []
+        for root, name, instance, data_type, files, size, changed, pulled, pulled_from in trees:
+            status.append({
+                "root": root,
+                "name": name,
+                "instance": instance,
+                "data_type": data_type,
+                "files": files,
+                "bytes": size,
+                "linked_bytes": linked.get(root, 0),
+                "changed": changed,
+                "pulled": pulled,
+                "pulled_from": pulled_from,
+                "pushes": {host: pushed for push_root, host, pushed in pushes if push_root == root}
+            })
+        return status
@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+
+## SupervisedTransferEngine.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Thread pool engine used by DataReplication.py to run transfer jobs, supervised from an asyncio event loop
+### that enforces per job timeouts, cancellation and a single progress line
+
+import asyncio
+import concurrent.futures
+import contextlib
+import shutil
+import sys
+import time
+
+from TransferScheduler import TransferScheduler
+
+# seconds to wait for a job to stop after its processes were terminated before warning (timeouts) or
+# giving up on it (interrupted runs)
+STOP_GRACE_PERIOD = 60
+
+
+class SupervisedTransferEngine:
+    """Runs transfer jobs on a pool of max_parallel worker threads, like TransferScheduler (same interface,
+    bounded parallelism, per host cap on both ends of direct jobs, job dependencies). The jobs are not
+    asynchronous: each running job is a blocking call in a worker thread, and its rsync and ssh commands are
+    ordinary subprocesses. An asyncio event loop only supervises the threads, to add:
+    - a timeout per job: a job that does not finish in time is stopped and reported as failed
+    - structured cancellation: if the run is interrupted, every running job is stopped before run() returns
+    - one progress line for all the running jobs
+    A thread cannot be killed, so jobs are stopped through the cancel_job callback, which must terminate
+    the processes of the job (including the ones started from its helper threads) so that its blocking
+    calls return. A job that timed out keeps its worker and host slots until its thread returns, so
+    there are never more job threads than max_parallel.
+    """
+    def __init__(self, logger, max_parallel=1, max_per_host=1, job_timeout=0, cancel_job=None, show_progress=False, progress=None):
+        """Constructor
+
+        Args:
+            logger (Logger): Logger object used to report job status
+            max_parallel (int, optional): Maximum number of jobs running at the same time. Defaults to 1.
+            max_per_host (int, optional): Maximum number of jobs running at the same time against
+                the same host. Defaults to 1.
+            job_timeout (int, optional): Seconds a job can run before it is stopped. 0 is no timeout. Defaults to 0.
+            cancel_job (callable, optional): Function called with a job to stop it. Defaults to None.
+            show_progress (bool, optional): Render a progress line in the console. Defaults to False.
+            progress (TransferProgress, optional): rsync progress of the jobs, shown in the progress line.
+                Defaults to None.
+        """
+        self.logger = logger
+        self.max_parallel = max(1, int(max_parallel))
+        self.max_per_host = max(1, int(max_per_host))
+        self.job_timeout = int(job_timeout)
+        self.cancel_job = cancel_job
+        self.show_progress = show_progress
+        self.progress = progress
+        self.running = {}
+
+    def run(self, jobs, worker):
+        """Run all jobs and collect their results
+
+        Args:
+            jobs (list[dict]): Transfer jobs, as for TransferScheduler.run()
+            worker (callable): Function called with a job as only argument. Must return
+                a (success, reason) tuple.
+
+        Returns:
+            list[dict]: One result per job, in the same order as jobs, with keys
+                'job', 'success', 'reason' and 'elapsed'.
+        """
+        return asyncio.run(self._run(jobs, worker))
+
+    @staticmethod
+    def _call(worker, job):
+        try:
+            return worker(job)
+        except Exception as e:
+            return False, f"transfer job raised exception: {str(e)}"
+
+    @staticmethod
+    def _unresolved(jobs, names):
+        # jobs whose dependencies can never finish (dependency cycles)
+        resolved = set()
+        pending = list(jobs)
+        progress = True
+        while progress:
+            progress = False
+            for job in list(pending):
+                if all(name in resolved or name not in names for name in job.get('depends_on', [])):
+                    resolved.add(job['name'])
+                    pending.remove(job)
+                    progress = True
+        return pending
+
+    async def _run(self, jobs, worker):
+        loop = asyncio.get_running_loop()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel)
+        slots = asyncio.Semaphore(self.max_parallel)
+        host_slots = {}
+        names = set(job['name'] for job in jobs)
+        finished = {job['name']: asyncio.Event() for job in jobs}
+        results = {}
+        for job in self._unresolved(jobs, names):
+            results[job['name']] = {"job": job, "success": False, "elapsed": 0,
+                                    "reason": f"unresolved job dependencies: {job.get('depends_on', [])}"}
+            finished[job['name']].set()
+
+        async def run_job(job):
+            dependencies = [name for name in job.get('depends_on', []) if name in names]
+            for name in dependencies:
+                await finished[name].wait()
+            if dependencies:
+                job['dependencies_ok'] = all(results[name]['success'] for name in dependencies)
+            try:
+                # the host slots are taken first, so that a job waiting for its hosts does not hold a worker slot.
+                # They are always taken in the same order, so that two direct jobs cannot wait for each other
+                async with contextlib.AsyncExitStack() as stack:
+                    for host in sorted(TransferScheduler.job_hosts(job)):
+                        await stack.enter_async_context(host_slots.setdefault(host, asyncio.Semaphore(self.max_per_host)))
+                    await stack.enter_async_context(slots)
+                    self.logger.writelog("debug", f"Starting transfer job [{job['name']}] on host [{job['host']}]")
+                    start = time.time()
+                    self.running[job['name']] = start
+                    future = loop.run_in_executor(executor, self._call, worker, job)
+                    try:
+                        success, reason = await asyncio.wait_for(asyncio.shield(future), self.job_timeout or None)
+                    except asyncio.TimeoutError:
+                        self.logger.writelog("warn", f"Transfer job [{job['name']}] timed out after {self.job_timeout} seconds - stopping it")
+                        await self._stop(job, future, until_stopped=True)
+                        success, reason = False, f"transfer job timed out after {self.job_timeout} seconds"
+                    except asyncio.CancelledError:
+                        await self._stop(job, future)
+                        raise
+                    results[job['name']] = {"job": job, "success": success, "reason": reason, "elapsed": time.time() - start}
+            finally:
+                self.running.pop(job['name'], None)
+                finished[job['name']].set()
+
+        tasks = [asyncio.ensure_future(run_job(job)) for job in jobs if job['name'] not in results]
+        progress = asyncio.ensure_future(self._progress(len(jobs), results)) if self.show_progress else None
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # interrupted: stop every running job before returning
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if progress is not None:
+                progress.cancel()
+                await asyncio.gather(progress, return_exceptions=True)
+            executor.shutdown(wait=False)
+        return [results[job['name']] for job in jobs]
+
+    async def _stop(self, job, future, until_stopped=False):
+        # stop a job and wait for its thread. With until_stopped, the wait goes on after the grace period, so that
+        # the slots of the job are not given to another job while its thread still runs
+        if self.cancel_job is not None:
+            self.cancel_job(job)
+        deadline = time.time() + STOP_GRACE_PERIOD
+        warned = False
+        while not future.done():
+            remaining = deadline - time.time()
+            try:
+                # after the grace period, the processes of the job are checked every second
+                await asyncio.wait_for(asyncio.shield(future), remaining if remaining > 0 else 1)
+            except asyncio.CancelledError:
+                # run interrupted while stopping - keep waiting for the job, but only for the grace period
+                until_stopped = False
+                if time.time() >= deadline:
+                    break
+                continue
+            except asyncio.TimeoutError:
+                if not until_stopped:
+                    break
+                if not warned:
+                    self.logger.writelog("warn", f"Transfer job [{job['name']}] did not stop in {STOP_GRACE_PERIOD} seconds - "
+                                                 f"its slots stay taken until it does")
+                    warned = True
+                # processes that the job started after it was cancelled are stopped too
+                if self.cancel_job is not None:
+                    self.cancel_job(job)
+        if not future.done():
+            self.logger.writelog("warn", f"Transfer job [{job['name']}] did not stop in {STOP_GRACE_PERIOD} seconds")
+
+    def _job_status(self, name, elapsed):
+        status = self.progress.status(name) if self.progress is not None else ""
+        return f"{int(elapsed)}s, {status}" if status else f"{int(elapsed)}s"
+
+    async def _progress(self, total, results):
+        try:
+            while True:
+                now = time.time()
+                running = ", ".join(f"{name} ({self._job_status(name, now - start)})" for name, start in sorted(self.running.items()))
+                summary = self.progress.summary() if self.progress is not None else ""
+                line = f"Transfers: {len(results)}/{total} done{' - ' + summary if summary else ''} - running: {running if running else '-'}"
+                width = shutil.get_terminal_size().columns - 1
+                print(f"\r{line[:width].ljust(width)}", end="")
+                sys.stdout.flush()
+                await asyncio.sleep(1)
+        finally:
+            print("")
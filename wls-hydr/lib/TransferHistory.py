@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+
+## TransferHistory.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Rolling history of completed transfer jobs, used by DataReplication.py to estimate transfer times
+
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+# number of job records kept - older records are dropped
+HISTORY_RECORDS = 2000
+
+
+class TransferHistory:
+    """JSON file with one record per completed transfer job: bytes sent over the network, size of
+    the files sent, seconds spent in rsync and total job time. The measured throughput per host and
+    the time each job spends out of rsync (listing, verification) are used to predict the duration
+    of future transfers.
+    """
+    def __init__(self, history_path, max_records=HISTORY_RECORDS):
+        """Constructor. Loads the history file if it exists.
+
+        Args:
+            history_path (str): Path to the history file
+            max_records (int, optional): Number of records kept. Defaults to HISTORY_RECORDS.
+        """
+        self.history_path = history_path
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.records = []
+        if os.path.isfile(history_path):
+            with open(history_path, "r") as f:
+                self.records = json.load(f)
+
+    def _save(self):
+        # must be called with the lock held
+        # each write uses its own temporary file, so that writers in other processes do not replace it
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.history_path)),
+                                        prefix=f".{os.path.basename(self.history_path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.records, f, indent=1)
+            os.replace(tmp_path, self.history_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def record(self, results):
+        """Add the successful jobs of a run to the history
+
+        Args:
+            results (list[dict]): Job results, as returned by TransferScheduler.run(). Jobs without
+                a 'metrics' key (not transferred with rsync) are not recorded.
+        """
+        now = time.time()
+        with self.lock:
+            for result in results:
+                job = result['job']
+                if not result['success'] or not job.get('metrics'):
+                    continue
+                self.records.append({
+                    "time": now,
+                    "name": job['name'],
+                    "transfer_type": job['transfer_type'],
+                    "instance": job['instance'],
+                    "data_type": job['data_type'],
+                    "host": job['host'],
+                    "elapsed": round(result['elapsed'], 3),
+                    **job['metrics']
+                })
+            self.records = self.records[-self.max_records:]
+            self._save()
+
+    def throughput(self, transfer_type, host=None):
+        """Average throughput of the rsync transfers of a type, to a host or to all hosts, measured as
+        size of the files sent (as reported by rsync --dry-run) per second
+
+        Returns:
+            float: Bytes per second, or None if there is no record
+        """
+        records = [record for record in self.records if record['transfer_type'] == transfer_type and
+                   (host is None or record['host'] == host) and record.get('file_bytes') and record.get('transfer_seconds')]
+        if not records:
+            return None
+        return sum(record['file_bytes'] for record in records) / max(sum(record['transfer_seconds'] for record in records), 0.001)
+
+    def overhead(self, job_name, host):
+        """Usual time a job spends out of rsync: listing, verification, directory preparation
+
+        Returns:
+            float: Median seconds, 0 if there is no record
+        """
+        values = [record['elapsed'] - record.get('transfer_seconds', 0) for record in self.records
+                  if record['name'] == job_name and record['host'] == host and not record.get('streamed')]
+        return max(statistics.median(values), 0) if values else 0
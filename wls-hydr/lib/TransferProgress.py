@@ -0,0 +1,171 @@
+#!/usr/bin/python3
+
+## TransferProgress.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Progress of the rsync transfers run by DataReplication.py, parsed from rsync --info=progress2 output
+
+import datetime
+import json
+import re
+import threading
+import time
+
+# rsync --info=progress2 line: bytes, percent, rate, eta (and the transfer counters, ignored)
+PROGRESS2_REGEX = re.compile(r"^\s*([0-9,]+)\s+([0-9]+)%\s+([0-9.,]+)([kKMGT]?B)/s\s+([0-9]+):([0-9]{2}):([0-9]{2})")
+RATE_UNITS = {"B": 1, "kB": 1024, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+
+def format_rate(rate):
+    for unit, divisor in [("GiB/s", 1024 ** 3), ("MiB/s", 1024 ** 2), ("KiB/s", 1024)]:
+        if rate >= divisor:
+            return f"{rate / divisor:.1f} {unit}"
+    return f"{int(rate)} B/s"
+
+
+def format_eta(seconds):
+    return str(datetime.timedelta(seconds=int(seconds))) if seconds is not None else "-"
+
+
+class TransferProgress:
+    """Bytes transferred, percent, rate and ETA of every running rsync transfer, from the
+    --info=progress2 lines of its output. Optionally writes the progress of all the running
+    transfers to a JSON lines file every interval seconds, so that a transfer that stopped
+    progressing can be detected from outside.
+    """
+    def __init__(self, records_path=None, interval=30):
+        """Constructor
+
+        Args:
+            records_path (str, optional): Path to the JSON lines progress file. Defaults to None (no records).
+            interval (int, optional): Seconds between progress records. Defaults to 30.
+        """
+        self.records_path = records_path
+        self.interval = int(interval)
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.stop_event = threading.Event()
+        self.writer = None
+
+    @staticmethod
+    def parse(line):
+        """Parse an rsync --info=progress2 line
+
+        Returns:
+            tuple: (bytes, percent, bytes per second, eta seconds), or None if the line is not a progress line
+        """
+        match = PROGRESS2_REGEX.match(line)
+        if not match:
+            return None
+        transferred, percent, rate, unit, hours, minutes, seconds = match.groups()
+        return (int(transferred.replace(",", "")), int(percent),
+                float(rate.replace(",", "")) * RATE_UNITS.get(unit, 1),
+                int(hours) * 3600 + int(minutes) * 60 + int(seconds))
+
+    def update(self, job_name, host, line):
+        """Update the progress of a transfer from a line of its rsync output
+
+        Returns:
+            bool: True if the line was a progress line
+        """
+        values = self.parse(line)
+        if values is None:
+            return False
+        transferred, percent, rate, eta = values
+        now = time.time()
+        with self.lock:
+            entry = self.jobs.setdefault(job_name, {"host": host, "started": now, "bytes": 0, "progressed": now})
+            if transferred != entry['bytes']:
+                entry['progressed'] = now
+            entry.update({"bytes": transferred, "percent": percent, "rate": rate, "eta": eta, "updated": now})
+        return True
+
+    def finish(self, job_name):
+        with self.lock:
+            self.jobs.pop(job_name, None)
+
+    def status(self, job_name):
+        """Progress of a transfer, for the console
+
+        Returns:
+            str: Percent, rate and ETA, or an empty string if there is no progress for the transfer
+        """
+        with self.lock:
+            entry = dict(self.jobs[job_name]) if job_name in self.jobs else None
+        if entry is None or 'percent' not in entry:
+            return ""
+        return f"{entry['percent']}% {format_rate(entry['rate'])} ETA {format_eta(entry['eta'])}"
+
+    def summary(self):
+        """Aggregate progress of all the running transfers, for the console
+
+        Returns:
+            str: Total rate and longest ETA, or an empty string if no transfer reported progress
+        """
+        with self.lock:
+            entries = [dict(entry) for entry in self.jobs.values() if 'percent' in entry]
+        if not entries:
+            return ""
+        return f"{format_rate(sum(entry['rate'] for entry in entries))} ETA {format_eta(max(entry['eta'] for entry in entries))}"
+
+    def records(self):
+        """Progress records of the running transfers and of the whole run
+
+        Returns:
+            list[dict]: One record per running transfer, followed by one aggregate record (job None)
+        """
+        now = time.time()
+        with self.lock:
+            entries = {name: dict(entry) for name, entry in self.jobs.items()}
+        records = []
+        for name, entry in sorted(entries.items()):
+            records.append({
+                "time": round(now, 3),
+                "job": name,
+                "host": entry['host'],
+                "bytes": entry['bytes'],
+                "percent": entry.get('percent'),
+                "bytes_per_second": int(entry.get('rate', 0)),
+                "eta_seconds": entry.get('eta'),
+                "running_seconds": int(now - entry['started']),
+                "seconds_since_progress": int(now - entry['progressed'])
+            })
+        records.append({
+            "time": round(now, 3),
+            "job": None,
+            "running_jobs": len(entries),
+            "bytes": sum(entry['bytes'] for entry in entries.values()),
+            "bytes_per_second": int(sum(entry.get('rate', 0) for entry in entries.values())),
+            "eta_seconds": max([entry['eta'] for entry in entries.values() if 'eta' in entry], default=None)
+        })
+        return records
+
+    def _write_records(self):
+        with open(self.records_path, "a") as f:
+            for record in self.records():
+                f.write(json.dumps(record) + "\n")
+
+    def _writer(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self._write_records()
+            except OSError:
+                pass
+
+    def start(self):
+        """Start writing progress records, if a records file and an interval are set
+        """
+        if self.records_path and self.interval > 0 and self.writer is None:
+            self.stop_event.clear()
+            self.writer = threading.Thread(target=self._writer, daemon=True)
+            self.writer.start()
+
+    def stop(self):
+        """Stop writing progress records
+        """
+        if self.writer is not None:
+            self.stop_event.set()
+            self.writer.join()
+            self.writer = None
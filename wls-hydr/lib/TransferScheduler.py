@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+
+## TransferScheduler.py script version 1.0.
+##
+## Copyright (c) 2024 Oracle and/or its affiliates
+## Licensed under the Universal Permissive License v 1.0 as shown at https://oss.oracle.com/licenses/upl/
+##
+### Bounded scheduler used by DataReplication.py to run transfer jobs concurrently
+
+import concurrent.futures
+import time
+
+
+class TransferScheduler:
+    """Runs transfer jobs on a bounded worker pool with a per-host concurrency cap
+    """
+    def __init__(self, logger, max_parallel=1, max_per_host=1):
+        """Constructor
+
+        Args:
+            logger (Logger): Logger object used to report job status
+            max_parallel (int, optional): Maximum number of jobs running at the same time. Defaults to 1.
+            max_per_host (int, optional): Maximum number of jobs running at the same time against
+                the same host. Defaults to 1.
+        """
+        self.logger = logger
+        self.max_parallel = max(1, int(max_parallel))
+        self.max_per_host = max(1, int(max_per_host))
+
+    @staticmethod
+    def job_hosts(job):
+        """Hosts whose slots a job takes: its host and, for direct jobs (copied from a primary host
+        straight to a standby host), also the host it writes to
+
+        Args:
+            job (dict): Transfer job
+
+        Returns:
+            list[str]: Hosts
+        """
+        hosts = [job['host']]
+        if job.get('target_host') and job['target_host'] not in hosts:
+            hosts.append(job['target_host'])
+        return hosts
+
+    def _host_free(self, host_load, job):
+        return all(host_load.get(host, 0) < self.max_per_host for host in self.job_hosts(job))
+
+    def _add_load(self, host_load, job, count):
+        for host in self.job_hosts(job):
+            host_load[host] = host_load.get(host, 0) + count
+
+    def run(self, jobs, worker):
+        """Run all jobs and collect their results. Jobs are started in list order whenever
+        a worker slot and a slot for each host of the job are available, and all the jobs they depend on
+        have finished. Before a job with dependencies is started, its 'dependencies_ok' key is set
+        to True if all of them succeeded.
+
+        Args:
+            jobs (list[dict]): Transfer jobs. Each job must have the 'name' and 'host' keys, and
+                can have a 'depends_on' key with the names of the jobs that must finish first and
+                a 'target_host' key with the host a direct job writes to.
+            worker (callable): Function called with a job as only argument. Must return
+                a (success, reason) tuple.
+
+        Returns:
+            list[dict]: One result per job, in the same order as jobs, with keys
+                'job', 'success', 'reason' and 'elapsed'.
+        """
+        results = {}
+        names = set(job['name'] for job in jobs)
+        pending = list(jobs)
+        running = {}
+        host_load = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while pending or running:
+                # start every pending job that fits in the available slots
+                for job in list(pending):
+                    if len(running) >= self.max_parallel:
+                        break
+                    if not self._host_free(host_load, job):
+                        continue
+                    dependencies = [name for name in job.get('depends_on', []) if name in names]
+                    if any(name not in results for name in dependencies):
+                        continue
+                    if dependencies:
+                        job['dependencies_ok'] = all(results[name]['success'] for name in dependencies)
+                    pending.remove(job)
+                    self._add_load(host_load, job, 1)
+                    self.logger.writelog("debug", f"Starting transfer job [{job['name']}] on host [{job['host']}]")
+                    future = executor.submit(self._run_job, worker, job)
+                    running[future] = job
+                if not running:
+                    # nothing running and nothing can start: the remaining jobs wait for each other
+                    for job in pending:
+                        results[job['name']] = {"job": job, "success": False, "elapsed": 0,
+                                                "reason": f"unresolved job dependencies: {job.get('depends_on', [])}"}
+                    break
+                done, _ = concurrent.futures.wait(running.keys(), return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    self._add_load(host_load, job, -1)
+                    results[job['name']] = future.result()
+        return [results[job['name']] for job in jobs]
+
+    def simulate(self, jobs, durations):
+        """Predict the schedule of a run: jobs are started with the same rules as run(), and each
+        job takes its estimated duration
+
+        Args:
+            jobs (list[dict]): Transfer jobs, as for run()
+            durations (dict): Job names mapped to their estimated duration in seconds
+
+        Returns:
+            dict: Job names mapped to dicts with keys 'start', 'end' and 'after': the name of the
+                job whose end allowed the job to start (None for the jobs started first)
+        """
+        schedule = {}
+        names = set(job['name'] for job in jobs)
+        pending = list(jobs)
+        running = {}
+        host_load = {}
+        now = 0
+        last_finished = None
+        while pending or running:
+            for job in list(pending):
+                if len(running) >= self.max_parallel:
+                    break
+                if not self._host_free(host_load, job):
+                    continue
+                dependencies = [name for name in job.get('depends_on', []) if name in names]
+                if any(name not in schedule or name in running for name in dependencies):
+                    continue
+                pending.remove(job)
+                self._add_load(host_load, job, 1)
+                schedule[job['name']] = {"start": now, "end": now + durations.get(job['name'], 0), "after": last_finished}
+                running[job['name']] = job
+            if not running:
+                # jobs waiting for each other are never started
+                break
+            last_finished = min(running, key=lambda name: schedule[name]['end'])
+            now = schedule[last_finished]['end']
+            self._add_load(host_load, running.pop(last_finished), -1)
+        return schedule
+
+    @staticmethod
+    def critical_path(schedule):
+        """Chain of jobs that determines the end of a simulated run, following from the job that
+        ends last the jobs it waited for
+
+        Args:
+            schedule (dict): Schedule returned by simulate()
+
+        Returns:
+            list[str]: Job names, in execution order
+        """
+        if not schedule:
+            return []
+        path = [max(schedule, key=lambda name: schedule[name]['end'])]
+        while schedule[path[-1]]['after'] is not None:
+            path.append(schedule[path[-1]]['after'])
+        return list(reversed(path))
+
+    def _run_job(self, worker, job):
+        start = time.time()
+        try:
+            success, reason = worker(job)
+        except Exception as e:
+            success, reason = False, f"transfer job raised exception: {str(e)}"
+        return {
+            "job": job,
+            "success": success,
+            "reason": reason,
+            "elapsed": time.time() - start
+        }
@@ -38,6 +38,11 @@ class Utils:
         except ValueError:
             return False
 
+    @staticmethod
+    def target_env(name):
+        # a named standby target is read from config/<name>.env, section [<NAME>_ENV] - oci is the oci.env file
+        return f"{Constants.BASEDIR}/config/{name}.env", f"{name.upper()}_ENV"
+
     @staticmethod  
     def validate_hostname(hostname):
         # max 63 characters
@@ -103,6 +108,21 @@ class Utils:
             return False
         return True
     
+    @staticmethod
+    def validate_time_windows(value):
+        # comma separated HH:MM-HH:MM=NUMBER items - empty is valid
+        pattern = r"([01]?[0-9]|2[0-3]):[0-5][0-9]\s*-\s*([01]?[0-9]|2[0-4]):[0-5][0-9]\s*=\s*[0-9]+"
+        for window in value.replace("\n", ",").split(","):
+            if window.strip() and not re.fullmatch(pattern, window.strip()):
+                return False
+        return True
+    
+    @staticmethod
+    def validate_verify(value):
+        # full or sample:<fraction>, with 0 < fraction <= 1
+        match = re.fullmatch(r"sample:([0-9]*\.?[0-9]+)", value)
+        return value == "full" or (match is not None and 0 < float(match.group(1)) <= 1)
+
     @staticmethod
     def validate_yesno(value):
         if value not in ["Yes", "No"]:
@@ -217,7 +237,7 @@ class Utils:
                 'exclude_wls_shared_config'
             ]
         }
-        if validation_type in ['pull', 'lifecycle', 'tnsnames']:
+        if validation_type in ['pull', 'lifecycle', 'tnsnames', 'direct']:
             MANDATORY_KEYS.update({
                 PRIMARY: [
                 'wls_osuser',
@@ -226,7 +246,7 @@ class Utils:
                 'wls_nodes'                
                 ]
             })
-        if validation_type in ['push', 'lifecycle', 'tnsnames']:
+        if validation_type in ['push', 'lifecycle', 'tnsnames', 'direct']:
             MANDATORY_KEYS.update({
                 STANDBY: [
                 'wls_osuser',
@@ -235,6 +255,8 @@ class Utils:
                 'wls_nodes'                
                 ]
             })
+        if validation_type == 'direct':
+            MANDATORY_KEYS[Constants.OPTIONS_CFG_TAG].append('direct_ssh_key')
         if validation_type == 'tnsnames':
             MANDATORY_KEYS.update({
                 Constants.TNS_TAG: [
@@ -269,8 +291,100 @@ class Utils:
         # return now because items are missing and we might end up trying to check a missing value later on
         if not valid:
             return valid, errors
+
+        # optional numeric options - checked only if present in config file
+        for item in ['max_parallel_transfers', 'max_transfers_per_host', 'manifest_workers', 'lifecycle_interval']:
+            if config.has_option(Constants.OPTIONS_CFG_TAG, item):
+                value = config[Constants.OPTIONS_CFG_TAG][item]
+                if not Utils.validate_int(value) or int(value) < 1:
+                    valid = False
+                    errors.append(f"{item.upper()} value [{value}] must be a number greater than 0 in section {Constants.OPTIONS_CFG_TAG}")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'ssh_control_persist'):
+            value = config[Constants.OPTIONS_CFG_TAG]['ssh_control_persist']
+            if not Utils.validate_int(value) or int(value) < 0:
+                valid = False
+                errors.append(f"SSH_CONTROL_PERSIST value [{value}] must be a number greater than or equal to 0 in section {Constants.OPTIONS_CFG_TAG}")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'relay_data_types'):
+            for item in config[Constants.OPTIONS_CFG_TAG]['relay_data_types'].replace(",", " ").split():
+                if item not in ['products', 'jdk']:
+                    valid = False
+                    errors.append(f"RELAY_DATA_TYPES value [{item}] must be one of: products, jdk")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'standby_targets'):
+            for item in config[Constants.OPTIONS_CFG_TAG]['standby_targets'].replace(",", " ").split():
+                if not re.match(r"^[A-Za-z0-9_-]+$", item) or Utils.target_env(item)[1] == PRIMARY:
+                    valid = False
+                    errors.append(f"STANDBY_TARGETS value [{item}] must be the name of a standby env file in the config folder, without the .env extension")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'source_snapshot'):
+            value = config[Constants.OPTIONS_CFG_TAG]['source_snapshot']
+            if value not in ['none', 'fss', 'zfs', 'hook', 'reflink']:
+                valid = False
+                errors.append(f"SOURCE_SNAPSHOT value [{value}] must be one of: none, fss, zfs, hook, reflink")
+            elif value == 'hook' and not (config.get(Constants.OPTIONS_CFG_TAG, 'snapshot_create_command', fallback='') and
+                                          config.get(Constants.OPTIONS_CFG_TAG, 'snapshot_release_command', fallback='')):
+                valid = False
+                errors.append("SNAPSHOT_CREATE_COMMAND and SNAPSHOT_RELEASE_COMMAND must be supplied when SOURCE_SNAPSHOT is hook")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'bandwidth_limit'):
+            value = config[Constants.OPTIONS_CFG_TAG]['bandwidth_limit']
+            if not Utils.validate_int(value) or int(value) < 0:
+                valid = False
+                errors.append(f"BANDWIDTH_LIMIT value [{value}] must be a number greater than or equal to 0 in section {Constants.OPTIONS_CFG_TAG}")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'bandwidth_windows'):
+            value = config[Constants.OPTIONS_CFG_TAG]['bandwidth_windows']
+            if not Utils.validate_time_windows(value):
+                valid = False
+                errors.append(f"BANDWIDTH_WINDOWS value [{value}] must be a comma separated list of HH:MM-HH:MM=KBPS windows")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'compression'):
+            if config[Constants.OPTIONS_CFG_TAG]['compression'] not in ['default', 'none', 'zlib', 'zstd', 'lz4', 'auto']:
+                valid = False
+                errors.append(f"COMPRESSION value [{config[Constants.OPTIONS_CFG_TAG]['compression']}] must be one of: default, none, zlib, zstd, lz4, auto")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'compression_level'):
+            value = config[Constants.OPTIONS_CFG_TAG]['compression_level']
+            if value and not Utils.validate_int(value):
+                valid = False
+                errors.append(f"COMPRESSION_LEVEL value [{value}] must be a number in section {Constants.OPTIONS_CFG_TAG}")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'initial_copy_mode'):
+            if config[Constants.OPTIONS_CFG_TAG]['initial_copy_mode'] not in ['rsync', 'stream']:
+                valid = False
+                errors.append(f"INITIAL_COPY_MODE value [{config[Constants.OPTIONS_CFG_TAG]['initial_copy_mode']}] must be one of: rsync, stream")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'stream_compression'):
+            if config[Constants.OPTIONS_CFG_TAG]['stream_compression'] not in ['none', 'gzip', 'zstd']:
+                valid = False
+                errors.append(f"STREAM_COMPRESSION value [{config[Constants.OPTIONS_CFG_TAG]['stream_compression']}] must be one of: none, gzip, zstd")
+        for item in ['dedup_products', 'change_agent', 'chunk_store', 'chunk_zip_entries']:
+            if config.has_option(Constants.OPTIONS_CFG_TAG, item):
+                if config[Constants.OPTIONS_CFG_TAG][item].lower() not in config.BOOLEAN_STATES:
+                    valid = False
+                    errors.append(f"{item.upper()} value [{config[Constants.OPTIONS_CFG_TAG][item]}] must be True or False")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'engine'):
+            if config[Constants.OPTIONS_CFG_TAG]['engine'] not in ['threads', 'supervised']:
+                valid = False
+                errors.append(f"ENGINE value [{config[Constants.OPTIONS_CFG_TAG]['engine']}] must be one of: threads, supervised")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'job_timeout'):
+            value = config[Constants.OPTIONS_CFG_TAG]['job_timeout']
+            if not Utils.validate_int(value) or int(value) < 0:
+                valid = False
+                errors.append(f"JOB_TIMEOUT value [{value}] must be a number greater than or equal to 0 in section {Constants.OPTIONS_CFG_TAG}")
+        for item in ['chunk_max_archive_mb', 'chunk_seed_mb']:
+            if config.has_option(Constants.OPTIONS_CFG_TAG, item):
+                value = config[Constants.OPTIONS_CFG_TAG][item]
+                if not Utils.validate_int(value) or int(value) < 0:
+                    valid = False
+                    errors.append(f"{item.upper()} value [{value}] must be a number greater than or equal to 0 in section {Constants.OPTIONS_CFG_TAG}")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'progress_interval'):
+            value = config[Constants.OPTIONS_CFG_TAG]['progress_interval']
+            if not Utils.validate_int(value) or int(value) < 0:
+                valid = False
+                errors.append(f"PROGRESS_INTERVAL value [{value}] must be a number greater than or equal to 0 in section {Constants.OPTIONS_CFG_TAG}")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'verify_method'):
+            if config[Constants.OPTIONS_CFG_TAG]['verify_method'] not in ['rsync', 'manifest']:
+                valid = False
+                errors.append(f"VERIFY_METHOD value [{config[Constants.OPTIONS_CFG_TAG]['verify_method']}] must be one of: rsync, manifest")
+        if config.has_option(Constants.OPTIONS_CFG_TAG, 'verify'):
+            if not Utils.validate_verify(config[Constants.OPTIONS_CFG_TAG]['verify']):
+                valid = False
+                errors.append(f"VERIFY value [{config[Constants.OPTIONS_CFG_TAG]['verify']}] must be full or sample:<fraction>, with a fraction between 0 and 1")
         
-        if validation_type in ['pull', 'lifecycle', 'tnsnames']:
+        if validation_type in ['pull', 'lifecycle', 'tnsnames', 'direct']:
             primary_ohs_nodes = config[PRIMARY]['ohs_nodes'].split("\n") if config[PRIMARY]['ohs_nodes'] else []
             primary_wls_nodes = config[PRIMARY]['wls_nodes'].split("\n")
             # check that we have at least 1 wls node
@@ -305,7 +419,7 @@ class Utils:
                     valid = False
                     errors.append(f"Primary WLS private key file [{config[PRIMARY]['wls_ssh_key']}] has incorrect premissions: [{wls_key_perms}] as opposed to [600]")
 
-        if validation_type in ['push', 'lifecycle', 'tnsnames']:
+        if validation_type in ['push', 'lifecycle', 'tnsnames', 'direct']:
             standby_ohs_nodes = config[STANDBY]['ohs_nodes'].split("\n") if config[STANDBY]['ohs_nodes'] else []
             standby_wls_nodes = config[STANDBY]['wls_nodes'].split("\n")
             if len(standby_wls_nodes) < 1:
@@ -338,6 +452,13 @@ class Utils:
                 if wls_key_perms != '600':
                     valid = False
                     errors.append(f"Standby WLS private key file [{config[STANDBY]['wls_ssh_key']}] has incorrect premissions: [{wls_key_perms}] as opposed to [600]")
+            # a standby target can limit the transfers run against it
+            for item in ['max_parallel_transfers', 'max_transfers_per_host']:
+                if config.has_option(STANDBY, item):
+                    value = config[STANDBY][item]
+                    if not Utils.validate_int(value) or int(value) < 1:
+                        valid = False
+                        errors.append(f"{item.upper()} value [{value}] must be a number greater than 0 in section {STANDBY}")
 
         if validation_type == 'lifecycle':
             if len(primary_ohs_nodes) != len(standby_ohs_nodes):
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+import BandwidthGovernor as governor_module
+from BandwidthGovernor import BandwidthGovernor, MIN_JOB_LIMIT
+
+
+class ListLogger:
+    def __init__(self):
+        self.lines = []
+
+    def writelog(self, level, message):
+        self.lines.append((level, message))
+
+
+class BandwidthGovernorTest(unittest.TestCase):
+    def setUp(self):
+        self.wait_interval = governor_module.WAIT_INTERVAL
+        governor_module.WAIT_INTERVAL = 0.05
+
+    def tearDown(self):
+        governor_module.WAIT_INTERVAL = self.wait_interval
+
+    def start_jobs(self, governor, count):
+        for index in range(count):
+            governor.start_job(f"job{index}")
+
+    def test_grants_never_exceed_budget(self):
+        governor = BandwidthGovernor(ListLogger(), 10000)
+        self.start_jobs(governor, 4)
+        limits = [governor.acquire(f"job{index}") for index in range(4)]
+        self.assertEqual(limits, [2500, 2500, 2500, 2500])
+        self.assertLessEqual(governor.granted(), 10000)
+
+    def test_single_job_gets_whole_budget(self):
+        governor = BandwidthGovernor(ListLogger(), 10000)
+        self.assertEqual(governor.acquire("job"), 10000)
+        governor.release("job", 10000 * 1024 * 10, 10)
+        # the job used all its limit - it keeps the whole budget
+        self.assertEqual(governor.acquire("job"), 10000)
+
+    def test_budget_left_by_finished_jobs_is_used(self):
+        governor = BandwidthGovernor(ListLogger(), 10000)
+        self.start_jobs(governor, 4)
+        self.assertEqual(governor.acquire("job0"), 2500)
+        for index in range(1, 4):
+            governor.finish_job(f"job{index}")
+        governor.release("job0", 2500 * 1024 * 10, 10)
+        self.assertEqual(governor.acquire("job0"), 10000)
+
+    def test_observed_throughput_raises_and_lowers_limits(self):
+        governor = BandwidthGovernor(ListLogger(), 10000)
+        self.start_jobs(governor, 2)
+        self.assertEqual(governor.acquire("job0"), 5000)
+        # job0 used its whole limit, job1 finished - job0 can now use the whole budget
+        governor.release("job0", 5000 * 1024 * 10, 10)
+        governor.finish_job("job1")
+        self.assertEqual(governor.acquire("job0"), 10000)
+        # job0 was seen using 1000 KiB/s - it gets that plus headroom and a new job gets the rest
+        governor.release("job0", 1000 * 1024 * 10, 10)
+        governor.start_job("job2")
+        self.assertEqual(governor.acquire("job0"), 1250)
+        self.assertEqual(governor.acquire("job2"), 8750)
+        self.assertEqual(governor.granted(), 10000)
+
+    def test_transfer_waits_until_budget_is_released(self):
+        governor = BandwidthGovernor(ListLogger(), 10000)
+        governor.acquire("job0")
+        limits = []
+        waiting = threading.Thread(target=lambda: limits.append(governor.acquire("job1")))
+        waiting.start()
+        time.sleep(0.2)
+        self.assertEqual(limits, [])
+        governor.release("job0", 0, 0)
+        waiting.join(5)
+        self.assertEqual(limits, [10000])
+
+    def test_cancelled_while_waiting(self):
+        governor = BandwidthGovernor(ListLogger(), 10000)
+        governor.acquire("job0")
+        with self.assertRaises(RuntimeError):
+            governor.acquire("job1", cancelled=lambda: True)
+        self.assertEqual(list(governor.active), ["job0"])
+
+    def test_sum_of_limits_within_budget_under_concurrency(self):
+        budget = 5000
+        governor = BandwidthGovernor(ListLogger(), budget)
+        errors = []
+
+        def transfer(index):
+            governor.start_job(f"job{index}")
+            for round_number in range(5):
+                name = f"job{index}"
+                limit = governor.acquire(name)
+                if limit < min(MIN_JOB_LIMIT, budget) or governor.granted() > budget:
+                    errors.append((name, limit, governor.granted()))
+                time.sleep(0.001)
+                governor.release(name, 1024 * 1024 * (index + 1) * 5, 5)
+            governor.finish_job(f"job{index}")
+
+        threads = [threading.Thread(target=transfer, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        self.assertEqual(governor.granted(), 0)
+
+    def test_small_budget(self):
+        governor = BandwidthGovernor(ListLogger(), 10)
+        self.start_jobs(governor, 4)
+        self.assertEqual(governor.acquire("job0"), 10)
+
+    def test_unlimited_budget(self):
+        governor = BandwidthGovernor(ListLogger(), 0)
+        self.assertEqual([governor.acquire(f"job{index}") for index in range(3)], [0, 0, 0])
+
+    def test_windows(self):
+        windows = BandwidthGovernor.parse_windows("08:00-19:00=20000, 19:00-08:00=0")
+        self.assertEqual(windows, [(480, 1140, 20000), (1140, 480, 0)])
+        with self.assertRaises(ValueError):
+            BandwidthGovernor.parse_windows("8-19=100")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from ChunkStore import (CUT_MASK, GEAR, HASH_MASK, MAX_CHUNK, MIN_CHUNK, ChunkIndex, chunk_file, content_chunks,
+                        is_archive)
+
+
+def reference_chunks(data, start, end):
+    # straightforward gear hash chunking, to check that content_chunks() keeps the same boundaries
+    ends = []
+    position = start
+    while position < end:
+        limit = min(position + MAX_CHUNK, end)
+        cut = limit
+        if limit - position > MIN_CHUNK:
+            value = 0
+            for index in range(position + MIN_CHUNK, limit):
+                value = ((value << 1) + GEAR[data[index]]) & HASH_MASK
+                if not value & CUT_MASK:
+                    cut = index + 1
+                    break
+        ends.append(cut)
+        position = cut
+    return ends
+
+
+class ContentChunksTest(unittest.TestCase):
+    def setUp(self):
+        self.data = random.Random(1).randbytes(2 * 1024 * 1024)
+
+    def test_same_boundaries_as_reference(self):
+        self.assertEqual(content_chunks(self.data, 0, len(self.data)), reference_chunks(self.data, 0, len(self.data)))
+        self.assertEqual(content_chunks(self.data, 1000, 700000), reference_chunks(self.data, 1000, 700000))
+
+    def test_chunk_sizes(self):
+        ends = content_chunks(self.data, 0, len(self.data))
+        self.assertEqual(ends[-1], len(self.data))
+        sizes = [end - start for start, end in zip([0] + ends[:-1], ends)]
+        for size in sizes[:-1]:
+            self.assertGreater(size, MIN_CHUNK)
+            self.assertLessEqual(size, MAX_CHUNK)
+
+    def test_insertion_keeps_later_chunks(self):
+        def digests(data):
+            ends = content_chunks(data, 0, len(data))
+            return {hashlib.sha256(data[start:end]).hexdigest() for start, end in zip([0] + ends[:-1], ends)}
+        original = digests(self.data)
+        changed = digests(b"inserted bytes" + self.data)
+        self.assertGreaterEqual(len(original & changed), len(original) - 2)
+
+
+class ChunkIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.paths = []
+        generator = random.Random(2)
+        for index in range(3):
+            path = os.path.join(self.workdir.name, f"lib{index}.jar")
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+                for entry in range(20):
+                    archive.writestr(f"com/example/Class{entry}.class", generator.randbytes(generator.randrange(1000, 60000)))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_chunks_rebuild_file(self):
+        digest, chunks = chunk_file(self.paths[0])
+        with open(self.paths[0], "rb") as f:
+            data = f.read()
+        self.assertEqual(digest, hashlib.sha256(data).hexdigest())
+        self.assertEqual(b"".join(data[offset:offset + length] for _, offset, length in chunks), data)
+        for chunk_digest, offset, length in chunks:
+            self.assertEqual(chunk_digest, hashlib.sha256(data[offset:offset + length]).hexdigest())
+
+    def test_recipes_in_worker_processes(self):
+        index = ChunkIndex(os.path.join(self.workdir.name, "chunk_index.db"))
+        self.assertIsNone(index.cached(self.paths[0]))
+        recipes = index.recipes(self.paths, workers=2)
+        self.assertEqual(recipes, {path: chunk_file(path) for path in self.paths})
+        self.assertEqual(index.cached(self.paths[1]), recipes[self.paths[1]])
+        self.assertEqual(index.recipe(self.paths[2]), recipes[self.paths[2]])
+
+    def test_is_archive(self):
+        self.assertTrue(is_archive("wlserver/server/lib/weblogic.JAR"))
+        self.assertFalse(is_archive("wlserver/server/lib/weblogic.policy"))
+
+
+if __name__ == "__main__":
+    unittest.main()
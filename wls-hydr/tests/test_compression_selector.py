@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from CompressionSelector import CALIBRATION_TTL, CompressionSelector, rsync_options
+
+
+class ListLogger:
+    def __init__(self):
+        self.lines = []
+
+    def writelog(self, level, message):
+        self.lines.append((level, message))
+
+
+class RecordingSelector(CompressionSelector):
+    """Selector that returns preset calibration results instead of sending samples to the hosts"""
+    def __init__(self, logger, cache_path, results):
+        super().__init__(logger, cache_path)
+        self.codecs = ["none", "zlib", "zstd", "lz4"]
+        self.results = results
+        self.calibrations = []
+
+    def calibrate(self, username, host, ssh_cmd, direction="push"):
+        self.calibrations.append((host, direction))
+        return {"codec": self.results[direction], "calibrated": time.time(), "throughput": {}}
+
+
+class CompressionSelectorTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.workdir.name, "compression_calibration.json")
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_directions_are_calibrated_separately(self):
+        selector = RecordingSelector(ListLogger(), self.cache_path, {"push": "zstd", "pull": "none"})
+        self.assertEqual(selector.options("oracle", "host1", "key", "ssh"), rsync_options("zstd"))
+        self.assertEqual(selector.options("oracle", "host1", "key", "ssh", "pull"), rsync_options("none"))
+        self.assertEqual(selector.options("oracle", "host1", "key", "ssh", "pull"), rsync_options("none"))
+        self.assertEqual(selector.calibrations, [("host1", "push"), ("host1", "pull")])
+        with open(self.cache_path) as f:
+            self.assertEqual(sorted(json.load(f)), ["pull:host1", "push:host1"])
+
+    def test_cache_is_reused_until_expired(self):
+        with open(self.cache_path, "w") as f:
+            json.dump({"pull:host1": {"codec": "lz4", "calibrated": time.time(), "throughput": {}},
+                       "push:host1": {"codec": "lz4", "calibrated": time.time() - CALIBRATION_TTL - 1, "throughput": {}},
+                       "host1": {"codec": "zlib", "calibrated": time.time(), "throughput": {}}}, f)
+        selector = RecordingSelector(ListLogger(), self.cache_path, {"push": "zstd", "pull": "none"})
+        self.assertEqual(selector.options("oracle", "host1", "key", "ssh", "pull"), rsync_options("lz4"))
+        self.assertEqual(selector.options("oracle", "host1", "key", "ssh", "push"), rsync_options("zstd"))
+        self.assertEqual(selector.calibrations, [("host1", "push")])
+
+    def test_unknown_direction(self):
+        selector = RecordingSelector(ListLogger(), self.cache_path, {})
+        with self.assertRaises(ValueError):
+            selector.options("oracle", "host1", "key", "ssh", "direct")
+
+    def test_rsync_options(self):
+        self.assertEqual(rsync_options("none"), "")
+        self.assertEqual(rsync_options("default"), "-z")
+        self.assertEqual(rsync_options("zstd", 3), "-z --compress-choice=zstd --compress-level=3")
+
+
+if __name__ == "__main__":
+    unittest.main()
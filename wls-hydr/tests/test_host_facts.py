@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from HostFacts import facts_command, memory_gb, node_differences, parse_facts
+
+
+def new_facts(**kwargs):
+    facts = {"os_version": "8.9", "cpu_count": "4", "mem_total_kb": "16000000", "uid": "1001", "gid": "1002",
+             "fqdn": "host1.example.com", "ips": ["10.0.0.1"], "mounts": {"/u01": "/u01"}, "hosts": {}}
+    facts.update(kwargs)
+    return facts
+
+
+class HostFactsTest(unittest.TestCase):
+    def test_parse_facts(self):
+        output = "Warning: Permanently added 'host1' to the list of known hosts.\n" + json.dumps(
+            {"os_version": "8.9", "cpu_count": "4", "mem_total_kb": "16000000", "uid": "1001", "gid": "1002",
+             "fqdn": "host1", "ips": "10.0.0.1 10.0.1.1 ", "mounts": {"/u01": "/u01"},
+             "hosts": {"db1": "10.0.2.1", "missing": ""}})
+        facts = parse_facts(output)
+        self.assertEqual(facts['ips'], ["10.0.0.1", "10.0.1.1"])
+        self.assertEqual(facts['hosts'], {"db1": ["10.0.2.1"], "missing": []})
+        with self.assertRaises(ValueError):
+            parse_facts("bash: command not found\n")
+
+    def test_facts_command_runs_locally(self):
+        # the command only needs bash and coreutils - run it on this host, with paths and names that need quoting
+        command = facts_command("root", ["/", "/path with 'quotes'"], ["localhost"])
+        run = subprocess.run(["bash", "-c", command], capture_output=True, text=True, timeout=60)
+        facts = parse_facts(run.stdout)
+        self.assertEqual(facts['uid'], str(os.getuid()))
+        self.assertEqual(facts['mounts']["/"], "/")
+        self.assertIn("/path with 'quotes'", facts['mounts'])
+        self.assertIn("localhost", facts['hosts'])
+
+    def test_node_differences(self):
+        nodes = [new_facts(), new_facts(cpu_count="8", mounts={"/u01": "/"}), {}, new_facts()]
+        differences = dict(node_differences(nodes))
+        self.assertEqual(sorted(differences), ["cpu_count", "mount point of /u01"])
+        self.assertEqual(differences['cpu_count'], ["4", "8", None, "4"])
+        self.assertEqual(node_differences([new_facts(), {}]), [])
+
+    def test_memory_gb(self):
+        self.assertEqual(memory_gb(new_facts()), 16)
+        self.assertIsNone(memory_gb(new_facts(mem_total_kb="")))
+
+
+if __name__ == "__main__":
+    unittest.main()
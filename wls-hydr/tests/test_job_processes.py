@@ -0,0 +1,78 @@
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+import DataReplication
+from SupervisedTransferEngine import SupervisedTransferEngine
+
+
+class ListLogger:
+    def __init__(self):
+        self.lines = []
+
+    def writelog(self, level, message):
+        self.lines.append((level, message))
+
+
+def start_sleep():
+    return DataReplication.start_process(["sleep", "60"])
+
+
+class JobProcessesTest(unittest.TestCase):
+    def test_helper_thread_processes_are_stopped_with_the_job(self):
+        processes = []
+
+        def worker(job):
+            # the job starts its process from a helper thread, like the manifests built while rsync copies
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+                process = executor.submit(DataReplication.in_job_context(start_sleep)).result()
+            processes.append(process)
+            process.wait()
+            return process.returncode == 0, "sleep stopped"
+
+        engine = SupervisedTransferEngine(ListLogger(), 1, 1, job_timeout=1, cancel_job=DataReplication.cancel_job_processes)
+        start = time.time()
+        results = engine.run([{"name": "slow", "host": "host1"}], DataReplication.tracked_worker(worker))
+        self.assertLess(time.time() - start, 30)
+        self.assertFalse(results[0]['success'])
+        self.assertIn("timed out", results[0]['reason'])
+        self.assertIsNotNone(processes[0].poll())
+        self.assertEqual(DataReplication.job_processes, {})
+
+    def test_helper_thread_that_outlives_its_job(self):
+        helpers = []
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        started = threading.Event()
+
+        def helper():
+            started.wait(30)
+            return DataReplication.job_cancelled(), start_sleep()
+
+        def worker(job):
+            # the job returns without waiting for its helper thread
+            helpers.append(executor.submit(DataReplication.in_job_context(helper)))
+            return True, ""
+
+        try:
+            DataReplication.tracked_worker(worker)({"name": "finished", "host": "host1"})
+            started.set()
+            cancelled, process = helpers[0].result(30)
+        finally:
+            executor.shutdown()
+        self.assertTrue(cancelled)
+        self.assertIsNotNone(process.wait(30))
+        self.assertNotEqual(process.returncode, 0)
+
+    def test_processes_outside_jobs_are_not_tracked(self):
+        self.assertFalse(DataReplication.job_cancelled())
+        process = DataReplication.start_process(["true"])
+        self.assertEqual(process.wait(30), 0)
+        self.assertEqual(DataReplication.job_processes, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
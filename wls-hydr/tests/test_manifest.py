@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+import DataReplication
+from Manifest import ExcludeFilter, Manifest, is_volatile
+
+
+class IsVolatileTest(unittest.TestCase):
+    def test_volatile_paths(self):
+        for path in ["servers/AdminServer/logs/AdminServer.log",
+                     "servers/AdminServer/logs/access.log00001",
+                     "servers/WLS1/logs/diagnostic_images/image.zip",
+                     "nodemanager/nodemanager.log",
+                     "nodemanager/nodemanager.log.1",
+                     "servers/WLS1/data/store/default/_WLS_WLS1000000.DAT",
+                     "instances/ohs1/logs/access_log.1723456789"]:
+            self.assertTrue(is_volatile(path), path)
+
+    def test_products_paths_are_not_volatile(self):
+        for path in ["wlserver/server/lib/weblogic.jar",
+                     "wlserver/modules/com.oracle.weblogic.management.jar",
+                     "oracle_common/modules/oracle.odl/ojdl.jar",
+                     "oracle_common/common/bin/logging.properties",
+                     "jdk/lib/logging.properties",
+                     "config/fmwconfig/logging.xml",
+                     "servers/WLS1/data/ldap/ldapfiles/EmbeddedLDAP.data",
+                     "catalog/DATA/file.txt",
+                     "changelog.txt",
+                     "logs"]:
+            self.assertFalse(is_volatile(path), path)
+
+
+class ManifestDiffTest(unittest.TestCase):
+    def test_diff(self):
+        source = Manifest({"a.jar": ("f", 10, 100.0, "d1"),
+                           "b.jar": ("f", 10, 100.0, "d2"),
+                           "c.jar": ("f", 10, 100.0, "d3"),
+                           "link": ("l", 5, 100.0, "a.jar"),
+                           "logs/server.log": ("f", 10, 100.0, "d4")})
+        target = Manifest({"a.jar": ("f", 10, 100.0, "d1"),
+                           "b.jar": ("f", 10, 100.0, "other"),
+                           "link": ("l", 5, 100.0, "a.jar"),
+                           "logs/server.log": ("f", 20, 100.0, "d5")})
+        self.assertEqual(source.diff(target), ["b.jar", "c.jar", "logs/server.log"])
+        self.assertEqual(source.diff(target, ignore=is_volatile), ["b.jar", "c.jar"])
+
+    def test_diff_modify_window(self):
+        source = Manifest({"a.jar": ("f", 10, 100.0, None)})
+        target = Manifest({"a.jar": ("f", 10, 101.5, None)})
+        self.assertEqual(source.diff(target), [])
+        self.assertEqual(source.diff(target, modify_window=1), ["a.jar"])
+
+    def test_fingerprint_ignores_digests(self):
+        first = Manifest({"a.jar": ("f", 10, 100.2, "d1")})
+        second = Manifest({"a.jar": ("f", 10, 100.7, None)})
+        self.assertEqual(first.fingerprint(), second.fingerprint())
+        self.assertNotEqual(first.fingerprint(), Manifest({"a.jar": ("f", 11, 100.2, "d1")}).fingerprint())
+
+    def test_from_remote_output(self):
+        output = "f\t10\t100.5\t\t./lib/a.jar\n" \
+                 "l\t5\t100.0\ta.jar\t./lib/link\n" \
+                 "f\t3\t100.0\t\t./tmp/x\n" \
+                 "==HYDR_MANIFEST_HASHES==\n" \
+                 "d1  ./lib/a.jar\n"
+        manifest = Manifest.from_remote_output(output, ["tmp/"])
+        self.assertEqual(manifest.entries, {"lib/a.jar": ("f", 10, 100.5, "d1"), "lib/link": ("l", 5, 100.0, "a.jar")})
+
+    def test_partial_remote_command(self):
+        # the remote command only needs a POSIX shell and GNU findutils/coreutils - run it locally
+        with tempfile.TemporaryDirectory() as root:
+            os.makedirs(f"{root}/lib")
+            for name in ["a.jar", "b c.jar", "c.jar"]:
+                with open(f"{root}/lib/{name}", "w") as f:
+                    f.write(name)
+            os.symlink("a.jar", f"{root}/lib/link")
+            run = subprocess.run(["bash", "-c", Manifest.remote_command(root, partial=True)], capture_output=True, text=True,
+                                 input="lib/a.jar\nlib/b c.jar\nlib/missing\nlib/link\n")
+            remote = Manifest.from_remote_output(run.stdout)
+            local = Manifest.from_local(root, paths=["lib/a.jar", "lib/b c.jar", "lib/missing", "lib/link"])
+            self.assertEqual(sorted(remote.entries), ["lib/a.jar", "lib/b c.jar", "lib/link"])
+            self.assertEqual(remote.diff(local), [])
+            self.assertEqual(local.diff(remote), [])
+
+    def test_remote_manifest_does_not_hash_excluded_files(self):
+        commands = []
+
+        def run_locally(username, host, key_path, command, input_data=None):
+            commands.append((command, input_data))
+            run = subprocess.run(["bash", "-c", command], capture_output=True, text=True, input=input_data)
+            return run.returncode, run.stdout, run.stderr
+
+        with tempfile.TemporaryDirectory() as root:
+            for path in ["lib/a.jar", "servers/WLS1/tmp/big.tmp", "servers/WLS1/WLS1.lok"]:
+                os.makedirs(os.path.dirname(f"{root}/{path}"), exist_ok=True)
+                with open(f"{root}/{path}", "w") as f:
+                    f.write(path)
+            excludes = ["/servers/*/tmp", "*.lok"]
+            with mock.patch.object(DataReplication, "run_remote_command", run_locally):
+                remote = DataReplication.build_manifest(True, "oracle", "host1", "key", root, excludes, 2)
+        self.assertEqual(sorted(remote.entries), ["lib/a.jar"])
+        self.assertIsNotNone(remote.entries["lib/a.jar"][3])
+        # the listing reads no file and only the paths kept are hashed
+        self.assertEqual(len(commands), 2)
+        self.assertNotIn("sha256sum", commands[0][0])
+        self.assertEqual(commands[1][1], "lib/a.jar")
+
+
+class ExcludeFilterTest(unittest.TestCase):
+    def test_excluded(self):
+        exclude_filter = ExcludeFilter(["/servers/*/tmp", "*.lok", "cache/", "**/data/nodemanager"])
+        self.assertTrue(exclude_filter.excluded("servers/WLS1/tmp/file"))
+        self.assertFalse(exclude_filter.excluded("other/servers/WLS1/tmp/file"))
+        self.assertTrue(exclude_filter.excluded("servers/WLS1/WLS1.lok"))
+        self.assertTrue(exclude_filter.excluded("a/cache/file"))
+        self.assertFalse(exclude_filter.excluded("a/cache"))
+        self.assertTrue(exclude_filter.excluded("x/y/data/nodemanager/file"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from RunJournal import RunJournal
+from TransferHistory import TransferHistory
+
+
+def new_job(name, host="host1"):
+    return {"name": name, "host": host, "transfer_type": "push", "instance": "wls", "data_type": "products",
+            "origin_path": f"/stage/{name}", "destination_path": f"/u01/{name}", "metrics": {"transfer_seconds": 1}}
+
+
+class RunJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.workdir.name, "journal.json")
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def test_record_and_resume(self):
+        journal = RunJournal(self.journal_path)
+        job = new_job("products")
+        journal.record(job, "abc")
+        reloaded = RunJournal(self.journal_path)
+        self.assertTrue(reloaded.completed(job, "abc"))
+        self.assertFalse(reloaded.completed(job, "changed"))
+        self.assertFalse(reloaded.completed(dict(job, destination_path="/other"), "abc"))
+        reloaded.reset([job])
+        self.assertFalse(RunJournal(self.journal_path).completed(job, "abc"))
+
+    def test_concurrent_writers_share_one_journal(self):
+        # every standby target records its jobs in the same journal from its own thread
+        journal = RunJournal(self.journal_path)
+        targets = [[new_job(f"job{index}@TARGET{target}") for index in range(30)] for target in range(4)]
+        errors = []
+
+        def run_target(jobs):
+            try:
+                journal.reset(jobs)
+                for job in jobs:
+                    journal.record(job, "fingerprint")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run_target, args=(jobs,)) for jobs in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        reloaded = RunJournal(self.journal_path)
+        for jobs in targets:
+            for job in jobs:
+                self.assertTrue(reloaded.completed(job, "fingerprint"), job['name'])
+        self.assertEqual([name for name in os.listdir(self.workdir.name) if name.endswith(".tmp")], [])
+
+    def test_writers_in_separate_objects_do_not_fail(self):
+        # writers that do not share the object (other processes) must not fail on each other's temporary file
+        journals = [RunJournal(self.journal_path) for _ in range(4)]
+        errors = []
+
+        def write(journal, index):
+            try:
+                for round_number in range(30):
+                    journal.record(new_job(f"job{index}_{round_number}"), "fingerprint")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(journal, index)) for index, journal in enumerate(journals)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        with open(self.journal_path) as f:
+            json.load(f)
+
+
+class TransferHistoryTest(unittest.TestCase):
+    def test_concurrent_records(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            history = TransferHistory(os.path.join(workdir, "history.json"))
+            threads = [threading.Thread(target=history.record,
+                                        args=([{"job": new_job(f"job{index}"), "success": True, "elapsed": 2}],))
+                       for index in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(30)
+            reloaded = TransferHistory(os.path.join(workdir, "history.json"))
+            self.assertEqual(sorted(record['name'] for record in reloaded.records), sorted(f"job{index}" for index in range(10)))
+            self.assertEqual(reloaded.overhead("job1", "host1"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
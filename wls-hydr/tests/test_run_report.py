@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from RunReport import RunReport, add_rsync_stats, parse_rsync_stats
+
+RSYNC_STATS = """
+Number of files: 1,234 (reg: 1,000, dir: 234)
+Number of created files: 10 (reg: 10)
+Number of deleted files: 0
+Number of regular files transferred: 12
+Total file size: 1,000,000 bytes
+Total transferred file size: 50,000 bytes
+Literal data: 20,000 bytes
+Matched data: 30,000 bytes
+File list size: 4,096
+Total bytes sent: 25,000
+Total bytes received: 5,000
+
+sent 25,000 bytes  received 5,000 bytes  10,000.00 bytes/sec
+total size is 1,000,000  speedup is 33.33
+"""
+
+
+class RsyncStatsTest(unittest.TestCase):
+    def test_parse_rsync_stats(self):
+        self.assertEqual(parse_rsync_stats(RSYNC_STATS), {
+            "files": 1234, "created_files": 10, "deleted_files": 0, "files_transferred": 12, "total_size": 1000000,
+            "file_bytes": 50000, "literal_bytes": 20000, "matched_bytes": 30000, "bytes_sent": 25000, "bytes_received": 5000})
+        self.assertEqual(parse_rsync_stats("rsync error: some files could not be transferred (code 23)"), {})
+
+    def test_add_rsync_stats(self):
+        # the tree metrics come from the first run of the job, the rest are added up over the retries
+        metrics = {}
+        add_rsync_stats(metrics, parse_rsync_stats(RSYNC_STATS))
+        add_rsync_stats(metrics, {"files": 12, "total_size": 100, "files_transferred": 2, "bytes_sent": 1000})
+        self.assertEqual(metrics['files'], 1234)
+        self.assertEqual(metrics['total_size'], 1000000)
+        self.assertEqual(metrics['files_transferred'], 14)
+        self.assertEqual(metrics['bytes'], 31000)
+
+
+class RunReportTest(unittest.TestCase):
+    def test_report(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            report = RunReport(os.path.join(workdir, "report.json"), "pull")
+            metrics = {"transfer_seconds": 3.5, "retries": 1}
+            add_rsync_stats(metrics, parse_rsync_stats(RSYNC_STATS))
+            job = {"name": "wls_products1", "transfer_type": "pull", "instance": "wls", "data_type": "products",
+                   "host": "host1", "metrics": metrics}
+            failed = dict(job, name="wls_config1", data_type="config", metrics={})
+            report.add_results([{"job": job, "success": True, "reason": "", "elapsed": 4.25},
+                                {"job": failed, "success": False, "reason": "rsync failed", "elapsed": 1}])
+            report.finish(False)
+            with open(report.report_path) as f:
+                saved = json.load(f)
+        self.assertFalse(saved['success'])
+        self.assertEqual(saved['jobs'][0]['rsync_seconds'], 3.5)
+        self.assertEqual(saved['jobs'][0]['speedup'], 33.33)
+        self.assertEqual(saved['jobs'][0]['files_transferred'], 12)
+        self.assertIsNone(saved['jobs'][1]['speedup'])
+        self.assertEqual(saved['totals']['jobs'], 2)
+        self.assertEqual(saved['totals']['failed_jobs'], 1)
+        self.assertEqual(saved['totals']['retries'], 1)
+        self.assertEqual(saved['totals']['bytes'], 30000)
+
+
+if __name__ == "__main__":
+    unittest.main()
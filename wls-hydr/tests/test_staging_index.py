@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from Manifest import Manifest
+from StagingIndex import StagingIndex
+
+PULL = {"name": "wls_products1", "instance": "1", "data_type": "products", "transfer_type": "pull", "host": "primary1"}
+PUSH = {"name": "wls_products1", "instance": "1", "data_type": "products", "transfer_type": "push", "host": "standby1"}
+
+
+class StagingIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = StagingIndex(f"{self.directory.name}/staging_index.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_update_moves_change_time_only_on_changes(self):
+        manifest = Manifest({"a.jar": ("f", 10, 100.0, "d1"), "lib": ("l", 3, 100.0, "a.jar")})
+        self.assertTrue(self.index.update("/stage/products", manifest, PULL))
+        changed = self.index.tree("/stage/products")['changed']
+        self.assertFalse(self.index.update("/stage/products", manifest, PULL))
+        self.assertEqual(self.index.tree("/stage/products"), {"files": 2, "bytes": 13, "changed": changed, "pushed": None})
+        self.assertTrue(self.index.update("/stage/products", Manifest({"a.jar": ("f", 11, 101.0, None)}), PULL))
+        self.assertGreaterEqual(self.index.tree("/stage/products")['changed'], changed)
+
+    def test_update_tree_keeps_entries(self):
+        self.index.update("/stage/products", Manifest({"a.jar": ("f", 10, 100.0, "d1")}), PULL)
+        changed = self.index.tree("/stage/products")['changed']
+        self.index.update_tree("/stage/products", PULL, False, 10)
+        self.assertEqual(self.index.tree("/stage/products"), {"files": 1, "bytes": 10, "changed": changed, "pushed": None})
+        self.index.update_tree("/stage/products", PULL, True, 20)
+        tree = self.index.tree("/stage/products")
+        self.assertIsNone(tree['files'])
+        self.assertEqual(tree['bytes'], 20)
+        self.assertGreaterEqual(tree['changed'], changed)
+        # the digests are still available to the next manifest of the directory
+        self.assertEqual(self.index.known("/stage/products"), {"a.jar": (10, 100.0, None, "d1")})
+
+    def test_pushes_per_host(self):
+        self.assertIsNone(self.index.tree("/stage/products"))
+        self.index.update_tree("/stage/products", PULL, True)
+        self.index.record_transfer("/stage/products", PUSH)
+        tree = self.index.tree("/stage/products", "standby1")
+        self.assertGreaterEqual(tree['pushed'], tree['changed'])
+        self.assertIsNone(self.index.tree("/stage/products", "standby2")['pushed'])
+        self.assertEqual(self.index.status()[0]['pushes'], {"standby1": tree['pushed']})
+
+
+if __name__ == "__main__":
+    unittest.main()
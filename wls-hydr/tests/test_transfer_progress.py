@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+from TransferProgress import TransferProgress, format_eta, format_rate
+
+
+class TransferProgressTest(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(TransferProgress.parse("  1,234,567  42%   12.34MB/s    0:01:05 (xfr#10, to-chk=5/100)"),
+                         (1234567, 42, 12.34 * 1024 ** 2, 65))
+        self.assertEqual(TransferProgress.parse("         32,768 100%  512.00kB/s    0:00:00"), (32768, 100, 512 * 1024, 0))
+        self.assertEqual(TransferProgress.parse("     1,000   1%  1,024.00GB/s  123:00:00"), (1000, 1, 1024 * 1024 ** 3, 442800))
+        self.assertIsNone(TransferProgress.parse("Number of files: 100 (reg: 90, dir: 10)"))
+        self.assertIsNone(TransferProgress.parse("sent 1,000 bytes  received 50 bytes  1,000.00 bytes/sec"))
+
+    def test_status_and_summary(self):
+        progress = TransferProgress()
+        self.assertFalse(progress.update("job1", "host1", "lib/weblogic.jar\n"))
+        self.assertEqual(progress.status("job1"), "")
+        self.assertTrue(progress.update("job1", "host1", "  1,000  10%    1.00MB/s    0:00:30\r"))
+        self.assertTrue(progress.update("job2", "host2", "  2,000  20%    2.00MB/s    0:01:00\r"))
+        self.assertEqual(progress.status("job1"), "10% 1.0 MiB/s ETA 0:00:30")
+        self.assertEqual(progress.summary(), "3.0 MiB/s ETA 0:01:00")
+        progress.finish("job2")
+        self.assertEqual(progress.summary(), "1.0 MiB/s ETA 0:00:30")
+        progress.finish("job1")
+        self.assertEqual(progress.summary(), "")
+
+    def test_records(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            progress = TransferProgress(os.path.join(workdir, "progress.jsonl"), interval=0)
+            progress.update("job1", "host1", "  1,000  10%    1.00kB/s    0:00:30")
+            progress._write_records()
+            with open(progress.records_path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([record['job'] for record in records], ["job1", None])
+        self.assertEqual(records[0]['bytes_per_second'], 1024)
+        self.assertEqual(records[1]['running_jobs'], 1)
+        self.assertEqual(records[1]['eta_seconds'], 30)
+
+    def test_formats(self):
+        self.assertEqual(format_rate(512), "512 B/s")
+        self.assertEqual(format_rate(3 * 1024 ** 3), "3.0 GiB/s")
+        self.assertEqual(format_eta(3725), "1:02:05")
+        self.assertEqual(format_eta(None), "-")
+
+
+if __name__ == "__main__":
+    unittest.main()
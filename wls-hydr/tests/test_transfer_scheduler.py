@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(f"{os.path.dirname(os.path.realpath(__file__))}/../lib"))
+import SupervisedTransferEngine as engine_module
+from SupervisedTransferEngine import SupervisedTransferEngine
+from TransferScheduler import TransferScheduler
+
+
+class ListLogger:
+    def __init__(self):
+        self.lines = []
+
+    def writelog(self, level, message):
+        self.lines.append((level, message))
+
+
+class LoadRecorder:
+    """Worker that records the highest number of jobs running at the same time, in total and per host"""
+    def __init__(self, duration=0.05):
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.running = 0
+        self.host_load = {}
+        self.max_running = 0
+        self.max_host_load = {}
+        self.order = []
+
+    def __call__(self, job):
+        hosts = TransferScheduler.job_hosts(job)
+        with self.lock:
+            self.order.append(job['name'])
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            for host in hosts:
+                self.host_load[host] = self.host_load.get(host, 0) + 1
+                self.max_host_load[host] = max(self.max_host_load.get(host, 0), self.host_load[host])
+        time.sleep(self.duration)
+        with self.lock:
+            self.running -= 1
+            for host in hosts:
+                self.host_load[host] -= 1
+        return job.get('succeeds', True), ""
+
+
+def new_job(name, host, **kwargs):
+    return dict({"name": name, "host": host}, **kwargs)
+
+
+class TransferSchedulerTest(unittest.TestCase):
+    engines = [lambda self, *args: TransferScheduler(ListLogger(), *args),
+               lambda self, *args: SupervisedTransferEngine(ListLogger(), *args)]
+
+    def test_limits(self):
+        for engine in self.engines:
+            worker = LoadRecorder()
+            jobs = [new_job(f"job{index}", f"host{index % 2}") for index in range(8)]
+            results = engine(self, 3, 1).run(jobs, worker)
+            self.assertTrue(all(result['success'] for result in results))
+            self.assertEqual([result['job']['name'] for result in results], [job['name'] for job in jobs])
+            self.assertLessEqual(worker.max_running, 3)
+            self.assertEqual(worker.max_host_load, {"host0": 1, "host1": 1})
+
+    def test_direct_jobs_count_both_hosts(self):
+        # direct jobs from two primary hosts all write to the same standby host
+        for engine in self.engines:
+            worker = LoadRecorder()
+            jobs = [new_job(f"direct{index}", f"primary{index}", target_host="standby1", transfer_type="direct")
+                    for index in range(4)]
+            engine(self, 4, 2).run(jobs, worker)
+            self.assertEqual(worker.max_host_load["standby1"], 2)
+
+    def test_dependencies(self):
+        for engine in self.engines:
+            worker = LoadRecorder()
+            jobs = [new_job("products2", "host1", depends_on=["products1"]),
+                    new_job("products1", "host2", succeeds=False),
+                    new_job("cycle1", "host3", depends_on=["cycle2"]),
+                    new_job("cycle2", "host3", depends_on=["cycle1"])]
+            results = {result['job']['name']: result for result in engine(self, 4, 4).run(jobs, worker)}
+            self.assertLess(worker.order.index("products1"), worker.order.index("products2"))
+            self.assertFalse(jobs[0]['dependencies_ok'])
+            self.assertFalse(results['cycle1']['success'])
+            self.assertIn("unresolved job dependencies", results['cycle2']['reason'])
+
+    def test_worker_exception(self):
+        def worker(job):
+            raise ValueError("boom")
+        for engine in self.engines:
+            results = engine(self, 1, 1).run([new_job("job", "host")], worker)
+            self.assertFalse(results[0]['success'])
+            self.assertIn("boom", results[0]['reason'])
+
+    def test_supervised_timeout(self):
+        stopped = []
+        engine = SupervisedTransferEngine(ListLogger(), 1, 1, job_timeout=1, cancel_job=stopped.append)
+        results = engine.run([new_job("slow", "host")], LoadRecorder(duration=1.5))
+        self.assertFalse(results[0]['success'])
+        self.assertIn("timed out", results[0]['reason'])
+        self.assertEqual([job['name'] for job in stopped], ["slow"])
+
+    def test_timed_out_job_keeps_its_slot(self):
+        # the worker ignores the cancellation - the next job must wait for its thread to return
+        grace_period = engine_module.STOP_GRACE_PERIOD
+        engine_module.STOP_GRACE_PERIOD = 0.2
+        try:
+            logger = ListLogger()
+            worker = LoadRecorder(duration=1.5)
+            engine = SupervisedTransferEngine(logger, 1, 1, job_timeout=1, cancel_job=lambda job: None)
+            results = engine.run([new_job("slow1", "host1"), new_job("slow2", "host2")], worker)
+        finally:
+            engine_module.STOP_GRACE_PERIOD = grace_period
+        self.assertEqual(worker.max_running, 1)
+        self.assertFalse(any(result['success'] for result in results))
+        self.assertTrue(any("slots stay taken" in message for _, message in logger.lines))
+
+
+class SimulateTest(unittest.TestCase):
+    def test_simulate_and_critical_path(self):
+        scheduler = TransferScheduler(ListLogger(), 2, 1)
+        jobs = [new_job("products1", "host1"),
+                new_job("products2", "host2", depends_on=["products1"]),
+                new_job("config1", "host1"),
+                new_job("config2", "host2")]
+        schedule = scheduler.simulate(jobs, {"products1": 100, "products2": 50, "config1": 10, "config2": 10})
+        self.assertEqual(schedule["products1"], {"start": 0, "end": 100, "after": None})
+        self.assertEqual(schedule["config2"]['start'], 0)
+        self.assertEqual(schedule["config1"]['start'], 100)
+        self.assertEqual(schedule["products2"]['start'], 100)
+        self.assertEqual(TransferScheduler.critical_path(schedule), ["products1", "products2"])
+
+    def test_simulate_direct_jobs(self):
+        scheduler = TransferScheduler(ListLogger(), 4, 1)
+        jobs = [new_job(f"direct{index}", f"primary{index}", target_host="standby1") for index in range(3)]
+        schedule = scheduler.simulate(jobs, {job['name']: 10 for job in jobs})
+        self.assertEqual(sorted(entry['start'] for entry in schedule.values()), [0, 10, 20])
+        self.assertEqual(len(TransferScheduler.critical_path(schedule)), 3)
+
+    def test_job_hosts(self):
+        self.assertEqual(TransferScheduler.job_hosts(new_job("a", "host1")), ["host1"])
+        self.assertEqual(TransferScheduler.job_hosts(new_job("a", "host1", target_host="host2")), ["host1", "host2"])
+        self.assertEqual(TransferScheduler.critical_path({}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,11 +18,11 @@ try:
     from lib.Utils import Utils
     from lib.Utils import Constants as CONSTANTS
     from lib.Utils import Status as STATUS
+    from lib.SessionPool import SessionPool
     import configparser
     import subprocess
     import warnings
     import requests
-    import paramiko
     import copy
     import shlex
     import time
@@ -2021,8 +2021,8 @@ def main():
     # if we can't establish a connection by then we'll assume something failed
     # same applies for init script check
     logger.writelog("info", "Checking that compute instances are available over SSH")
-    ssh = paramiko.SSHClient()
-    ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    # opc sessions to the new instances - reused by all the checks and commands below
+    session_pool = SessionPool()
     timeout_minutes = 20
     timeout = 60 * timeout_minutes
     not_up = True
@@ -2031,11 +2031,8 @@ def main():
         for node in instances_info:
             if not node['ssh_connectivity']:
                 try:
-                    ssh.connect(username='opc',
-                                hostname=node['ip'],
-                                key_filename=sysconfig['oci']['ssh_private_key'],
-                                timeout=10)
-                    ssh.close()
+                    with session_pool.session('opc', node['ip'], sysconfig['oci']['ssh_private_key'], timeout=10):
+                        pass
                     node['ssh_connectivity'] = True
                 except Exception as e:
                     logger.writelog("info", f"Instance {node['name']} not yet accessible over SSH: {str(e)}")
@@ -2058,9 +2055,8 @@ def main():
         for node in instances_info:
             if not node['init_script_finished']:
                 try:
-                    ssh.connect(username='opc',
-                                hostname=node['ip'],
-                                key_filename=sysconfig['oci']['ssh_private_key'])
+                    session = session_pool.checkout('opc', node['ip'], sysconfig['oci']['ssh_private_key'])
+                    ssh = session.client
                 except Exception as e:
                     logger.writelog("error", f"Could not connect to instance {node['name']} to check init script execution status: {str(e)}")
                     exit_failure(logger, sysconfig_file, 1)
@@ -2083,7 +2079,7 @@ def main():
                     else:
                         node['init_script_finished'] = True
                 init_statuses.append(out)
-                ssh.close()
+                session_pool.checkin(session)
         init_running = any(init_statuses)
         if init_running:
             if time.time() - start_time >= timeout:
@@ -2095,12 +2091,9 @@ def main():
     # check init script execution result on WLS nodes
     for idx in range(0, int(sysconfig['oci']['wls']['nodes_count'])):
         logger.writelog("info", f"Checking init script execution status on WLS node {sysconfig['oci']['wls']['nodes'][idx]['name']}")
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         try:
-            ssh.connect(username='opc',
-                        hostname=sysconfig['oci']['wls']['nodes'][idx]['ip'],
-                        key_filename=sysconfig['oci']['ssh_private_key'])
+            session = session_pool.checkout('opc', sysconfig['oci']['wls']['nodes'][idx]['ip'], sysconfig['oci']['ssh_private_key'])
+            ssh = session.client
         except Exception as e:
             logger.writelog("error", f"Could not connect to instance {sysconfig['oci']['wls']['nodes'][idx]['name']} to check init script results: {str(e)}")
             exit_failure(logger, sysconfig_file, 1)
@@ -2109,7 +2102,7 @@ def main():
         stdin, stdout, stderr = ssh.exec_command(cmd)
         out = stdout.read().decode()
         err = stderr.read().decode()
-        ssh.close()
+        session_pool.checkin(session)
         logger.writelog("debug", f"stdout: {out}")
         logger.writelog("debug", f"stderr: {err}")
         if err:
@@ -2133,12 +2126,9 @@ def main():
     if OHS_USED:
         for idx in range(0, int(sysconfig['oci']['ohs']['nodes_count'])):
             logger.writelog("info", f"Checking init script execution status on OHS node {sysconfig['oci']['ohs']['nodes'][idx]['name']}")
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
             try:
-                ssh.connect(username='opc',
-                            hostname=sysconfig['oci']['ohs']['nodes'][idx]['ip'],
-                            key_filename=sysconfig['oci']['ssh_private_key'])
+                session = session_pool.checkout('opc', sysconfig['oci']['ohs']['nodes'][idx]['ip'], sysconfig['oci']['ssh_private_key'])
+                ssh = session.client
             except Exception as e:
                 logger.writelog("error", f"Could not connect to instance {sysconfig['oci']['ohs']['nodes'][idx]['name']} to check init script results: {str(e)}")
                 exit_failure(logger, sysconfig_file, 1)
@@ -2147,7 +2137,7 @@ def main():
             stdin, stdout, stderr = ssh.exec_command(cmd)
             out = stdout.read().decode()
             err = stderr.read().decode()
-            ssh.close()
+            session_pool.checkin(session)
             logger.writelog("debug", f"stdout: {out}")
             logger.writelog("debug", f"stderr: {err}")
             if err:
@@ -2188,12 +2178,9 @@ def main():
         sysconfig['oci']['storage']['block_volumes'][idx]['iqn'] = ret.iqn
         save_sysconfig(sysconfig, sysconfig_file)
         # connect to node
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         try:
-            ssh.connect(username='opc',
-                        hostname=sysconfig['oci']['wls']['nodes'][idx]['ip'],
-                        key_filename=sysconfig['oci']['ssh_private_key'])
+            session = session_pool.checkout('opc', sysconfig['oci']['wls']['nodes'][idx]['ip'], sysconfig['oci']['ssh_private_key'])
+            ssh = session.client
         except Exception as e:
             logger.writelog("error", f"Could not connect to instance {sysconfig['oci']['wls']['nodes'][idx]['name']}: {repr(e)}")
             continue
@@ -2204,7 +2191,7 @@ def main():
         err = stderr.read().decode()
         if err:
             logger.writelog("error", f"Could not run sudo lsblk on node: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         before = out.split("\n")
         # now run iscsi commands
@@ -2219,7 +2206,7 @@ def main():
             logger.writelog("error", "Failed running iscsi command")
             logger.writelog("debug", f"Command: {cmd}")
             logger.writelog("debug", f"Failure reason: {stderr.read().decode()}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         cmd = "sudo iscsiadm -m node -o update -T {0} -n node.startup -v automatic".format(
             sysconfig['oci']['storage']['block_volumes'][idx]['iqn']
@@ -2231,7 +2218,7 @@ def main():
             logger.writelog("error", "Failed running iscsi command")
             logger.writelog("debug", f"Command: {cmd}")
             logger.writelog("debug", f"Failure reason: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         cmd = "sudo iscsiadm -m node -T {0} -p {1}:3260 -l".format(
             sysconfig['oci']['storage']['block_volumes'][idx]['iqn'],
@@ -2244,7 +2231,7 @@ def main():
             logger.writelog("error", "Failed running iscsi command")
             logger.writelog("debug", f"Command: {cmd}")
             logger.writelog("debug", f"Failure reason: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         # get list of devices after running iscsi commands
         stdin, stdout, stderr = ssh.exec_command('sudo lsblk')
@@ -2260,7 +2247,7 @@ def main():
         err = stderr.read().decode()
         if err:
             logger.writelog("error", f"Could not format volume: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         # get uuid in order to updated /etc/fstab
         logger.writelog("info", "Getting volume UUID")
@@ -2270,7 +2257,7 @@ def main():
         err = stderr.read().decode()
         if err:
             logger.writelog("error", f"Could not get volume UUID: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         out = stdout.read().decode().split("\n")
         uuid = ""
@@ -2281,7 +2268,7 @@ def main():
                 break
         if not uuid:
             logger.writelog("error", "Could not get volume uuid")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         # saving just the uuid in sysconfig and keeping 'UUID="<uuid value>"' in uuid variable 
         sysconfig['oci']['storage']['block_volumes'][idx]['uuid'] = uuid.split('"')[1]
@@ -2301,7 +2288,7 @@ def main():
                 sysconfig['prem']['wls']['mountpoints']['private'],
                 err
             ))
-            ssh.close()
+            session_pool.checkin(session)
             continue
         # update /etc/fstab
         cmd = "echo '{0} {1} xfs defaults,_netdev,nofail 0 2' | sudo tee -a  /etc/fstab".format(
@@ -2313,7 +2300,7 @@ def main():
         err = stderr.read().decode()
         if err:
             logger.writelog("error", f"Could not update /etc/fstab: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         # mount block volume
         logger.writelog("info", "Mounting block volume")
@@ -2323,7 +2310,7 @@ def main():
         err = stderr.read().decode()
         if err:
             logger.writelog("error", f"Failed mounting block volume: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         # check if volume monuted
         logger.writelog("info", "Checking if block volume succesfully mounted")
@@ -2333,7 +2320,7 @@ def main():
         err = stderr.read().decode()
         if err:
             logger.writelog("warn", f"Failed to check if block volume successfully mounted: {err}")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         out = stdout.read().decode().split("\n")
         mounted = False
@@ -2342,7 +2329,7 @@ def main():
                 mounted = True
         if not mounted:
             logger.writelog("error", "Volume not mounted - check locally on node")
-            ssh.close()
+            session_pool.checkin(session)
             continue
         logger.writelog("info", "Block volume succesfully mounted")
         logger.writelog("info", "Changing {0} mountpoint ownership to {1}:{2}".format(
@@ -2373,7 +2360,9 @@ def main():
                 sysconfig['prem']['wls']['user_name'],
                 sysconfig['prem']['wls']['group_name']
         ))
-        ssh.close()
+        session_pool.checkin(session)
+
+    session_pool.close_all()
 
     PRIVATE_VIEW_EXISTS = False
     ZONE_EXISTS = False